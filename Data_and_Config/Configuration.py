@@ -2,18 +2,103 @@
 # This file contains all configuration parameters and variables
 #
 
-URL_BASE = "http://testovani.kitner.cz"
+import os
+
+# Local stand-in server (Tools/StandInServer.py)
+# LOCAL_SERVER=1 switches all suites from the remote host to the in-process emulator
+LOCAL_SERVER = os.environ.get("LOCAL_SERVER", "0") == "1"
+LOCAL_SERVER_HOST = "127.0.0.1"
+LOCAL_SERVER_PORT = int(os.environ.get("LOCAL_SERVER_PORT", "8765"))
+
+URL_REMOTE = "http://testovani.kitner.cz"
+URL_LOCAL = f"http://{LOCAL_SERVER_HOST}:{LOCAL_SERVER_PORT}"
+
+URL_BASE = URL_LOCAL if LOCAL_SERVER else URL_REMOTE
 URL_COURSES = f"{URL_BASE}/courses"
 URL_HOME = f"{URL_BASE}/home"
+URL_LOGIN = f"{URL_BASE}/login"
+URL_REGISTER = f"{URL_BASE}/register"
 URL_FORGOT_PASSWORD = f"{URL_BASE}/forgot-password"
 URL_REGKURZ_FORM = f"{URL_BASE}/regkurz/formsave.php"
 
-PORT = 80
+PORT = LOCAL_SERVER_PORT if LOCAL_SERVER else 80
+
+# Parallel runs (Tools/ParallelRunner.py): worker index and id of the whole run
+WORKER_ID = int(os.environ.get("WORKER_ID", "0"))
+WORKER_COUNT = int(os.environ.get("WORKER_COUNT", "1"))
+RUN_ID = os.environ.get("RUN_ID") or os.urandom(3).hex()
+
+# Directory for run artifacts (reports, caches, timings...)
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARTIFACTS_DIR = os.environ.get("ARTIFACTS_DIR", os.path.join(PROJECT_DIR, ".artifacts"))
+
+# Identity pool (Tools/Identity.py): records generated per batch and claimed per process at once
+IDENTITY_BATCH_SIZE = int(os.environ.get("IDENTITY_BATCH_SIZE", "10000"))
+IDENTITY_BLOCK_SIZE = 32
+
+# Number of registered accounts kept ready by the account factory (Tools/AccountFactory.py)
+ACCOUNT_POOL_SIZE = int(os.environ.get("ACCOUNT_POOL_SIZE", "2"))
+
+# Flakiness tracker (Tools/Flakiness.py): retries of known-flaky failures, quarantine threshold
+FLAKY_RETRIES = int(os.environ.get("FLAKY_RETRIES", "2"))  # 0 disables the retries
+FLAKY_QUARANTINE_RATE = 0.1  # flaky runs / recorded runs
+FLAKY_MIN_RUNS = 5
+
+# Record/replay of API responses (Tools/Cassette.py): off, record, replay or refresh
+CASSETTE_MODE = os.environ.get("CASSETTE_MODE", "off")
+CASSETTE_DIR = os.path.join(ARTIFACTS_DIR, "cassette")
+CASSETTE_MAX_BYTES = int(os.environ.get("CASSETTE_MAX_BYTES", str(50 * 1024 * 1024)))  # 50 MB
+
+# Structured log of the API exchanges (Tools/ExchangeLog.py): 0 off, 1 sizes and hashes, 2 bodies
+EXCHANGE_LOG_LEVEL = int(os.environ.get("EXCHANGE_LOG_LEVEL", "1"))
+EXCHANGE_LOG_MAX_FIELD = 256  # longer strings are truncated and hashed in the log
 
-# Time between clicks and checks in milliseconds
-TIME_BETWEEN_CLICKS = 100  # 100 ms
-TIME_BETWEEN_CHECKS = 200  # 200 ms
+# Per-step timing spans of E2E helpers and Playwright actions (Tools/Tracing.py)
+TRACE_STEPS = os.environ.get("TRACE_STEPS", "0") == "1"
+
+# On-failure capture (Tools/FailureCapture.py): ring buffer of the last actions, DOM snapshots and
+# network events per test, written compressed only for failed tests
+FAILURE_CAPTURE = os.environ.get("FAILURE_CAPTURE", "1") == "1"
+FAILURE_CAPTURE_EVENTS = int(os.environ.get("FAILURE_CAPTURE_EVENTS", "200"))
+FAILURE_CAPTURE_MAX_BYTES = 8 * 1024 * 1024  # in-memory buffer of one test
+# per run, shared by all parallel workers
+FAILURE_CAPTURE_MAX_DISK = int(os.environ.get("FAILURE_CAPTURE_MAX_DISK", str(100 * 1024 * 1024)))
+
+# Resource blocking profile of E2E pages (Tools/ResourceBlocking.py)
+RESOURCE_BLOCKING = os.environ.get("RESOURCE_BLOCKING", "1") == "1"
+BLOCKED_RESOURCE_TYPES = ("image", "font", "media")
+
+# Micro-benchmarks (Tools/Benchmarks.py): allowed slowdown against the baseline (0.25 = 25 %)
+BENCHMARK_TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", "0.25"))
+
+# Maximum number of concurrent requests in API batch mode
+API_CONCURRENCY = int(os.environ.get("API_CONCURRENCY", "10"))
+
+# HTTP client of the API suites: playwright (APIRequestContext) or pool (Tools/HttpPool.py)
+HTTP_CLIENT = os.environ.get("HTTP_CLIENT", "playwright")
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", str(API_CONCURRENCY)))  # connections per origin
+HTTP_KEEP_ALIVE = os.environ.get("HTTP_KEEP_ALIVE", "1") == "1"
+
+# Number of pre-warmed browser contexts kept in the E2E context pool
+CONTEXT_POOL_SIZE = int(os.environ.get("CONTEXT_POOL_SIZE", "2"))
+
+# Resource governor of long E2E runs (Tools/ResourceGovernor.py): a pooled context is closed after
+# CONTEXT_MAX_USES tests; above MEMORY_RECYCLE_MB of driver + browser RSS the idle contexts are recycled,
+# above MEMORY_RESTART_MB (after recycling) the browser is restarted; at most once per MEMORY_COOLDOWN_TESTS tests
+RESOURCE_GOVERNOR = os.environ.get("RESOURCE_GOVERNOR", "1") == "1"
+CONTEXT_MAX_USES = int(os.environ.get("CONTEXT_MAX_USES", "25"))
+MEMORY_RECYCLE_MB = int(os.environ.get("MEMORY_RECYCLE_MB", "1024"))
+MEMORY_RESTART_MB = int(os.environ.get("MEMORY_RESTART_MB", "1536"))
+MEMORY_COOLDOWN_TESTS = int(os.environ.get("MEMORY_COOLDOWN_TESTS", "50"))
+
+# Maximum number of concurrent pages of the async E2E scenario runner (Tools/AsyncE2E.py)
+E2E_CONCURRENCY = int(os.environ.get("E2E_CONCURRENCY", "4"))
 
 # Timeouts
 TIMEOUT_BROWSER = 3000  # 10000  # in milliseconds (3 s)
 TC_TIMEOUT_PW_KW = 20 * 60 * 1000  # 20 minutes
+
+# Adaptive waits (Tools/WaitScheduler.py): timeout = p99 of observed durations * margin, clamped
+WAIT_MIN_TIMEOUT = TIMEOUT_BROWSER  # in milliseconds, adaptive waits only lengthen slow keys
+WAIT_MAX_TIMEOUT = 10000  # in milliseconds
+WAIT_MARGIN = 2.0
@@ -0,0 +1,131 @@
+"""
+Factory of registered accounts created over HTTP instead of the registration form
+
+An account is registered with two requests (GET /register for the session cookie and CSRF token,
+POST /register) and logged out again, all on one pooled request context. A background thread keeps
+ACCOUNT_POOL_SIZE ready accounts, so a test that only needs an existing user takes one immediately.
+With a limit (the number of collected tests that take an account) it registers no more accounts than
+the run needs: the refill stops once the limit is reached, and only a test that takes more (e.g. a
+retried one) raises it. Tests about the registration form itself still register through the browser.
+
+The thread runs its own Playwright instance: the sync API cannot be shared with the thread running
+the browser tests.
+
+"""
+
+import html
+import queue
+import re
+import threading
+
+from Data_and_Config.Configuration import *
+from Tools.Identity import get_identity_pool
+
+TOKEN_PATTERN = re.compile(r'name="_token"\s+value="([^"]+)"')
+ERROR_PATTERN = re.compile(r'data-test="\w+_input_errors"[^>]*>([^<]*)<')
+
+
+class AccountCreationError(Exception):
+    pass
+
+
+def _csrf_token(page_html):
+    match = TOKEN_PATTERN.search(page_html)
+    if not match:
+        raise AccountCreationError("CSRF token not found on the page")
+    return html.unescape(match.group(1))
+
+
+# Registers the identity with the session of request_context and logs it out again
+# Returns the identity; raises AccountCreationError with the form errors when the site refuses it
+def register_account(request_context, identity, base_url=URL_BASE):
+    response = request_context.get(f"{base_url}/register")
+    token = _csrf_token(response.text())
+
+    response = request_context.post(
+        f"{base_url}/register",
+        form={
+            "_token": token,
+            "name": identity.name,
+            "email": identity.email,
+            "password": identity.password,
+            "password_confirmation": identity.password,
+        },
+    )
+    if response.url.rstrip("/") != f"{base_url}/home":
+        errors = [html.unescape(error) for error in ERROR_PATTERN.findall(response.text())]
+        raise AccountCreationError(
+            f"Registration of {identity.email} failed ({response.status} {response.url}): {'; '.join(errors)}"
+        )
+
+    # The session is logged in after the registration: log out, the context is reused for the next account
+    request_context.post(f"{base_url}/logout", form={"_token": _csrf_token(response.text())})
+    return identity
+
+
+class AccountFactory:
+    def __init__(self, size=ACCOUNT_POOL_SIZE, base_url=URL_BASE, identities=None, limit=None):
+        self.base_url = base_url
+        self.identities = identities or get_identity_pool()
+        self.ready = queue.Queue(maxsize=max(1, size))
+        self.stopping = threading.Event()
+        self.wanted = threading.Event()  # set when take() raised the limit
+        self.lock = threading.Lock()
+        self.thread = None
+        self.error = None
+        self.created = 0
+        self.taken = 0
+        self.limit = limit  # accounts to register in total, None: refill until stopped
+
+    def start(self):
+        self.thread = threading.Thread(target=self._refill, name="account-factory", daemon=True)
+        self.thread.start()
+        return self
+
+    def _refill(self):
+        from playwright.sync_api import sync_playwright
+
+        try:
+            with sync_playwright() as playwright:
+                request_context = playwright.request.new_context()
+                try:
+                    while not self.stopping.is_set():
+                        if self.limit is not None and self.created >= self.limit:
+                            self.wanted.wait(timeout=0.2)
+                            self.wanted.clear()
+                            continue
+                        account = register_account(request_context, self.identities.next(), self.base_url)
+                        self.created += 1
+                        while not self.stopping.is_set():
+                            try:
+                                self.ready.put(account, timeout=0.2)
+                                break
+                            except queue.Full:
+                                continue
+                finally:
+                    request_context.dispose()
+        except Exception as error:
+            self.error = error
+
+    # Registered account (Identity) never handed out before; waits for the refill thread if the pool is empty
+    def take(self, timeout=30):
+        with self.lock:
+            self.taken += 1
+            if self.limit is not None and self.taken > self.limit:
+                self.limit = self.taken
+                self.wanted.set()
+        waited = 0.0
+        while True:
+            try:
+                return self.ready.get(timeout=0.2)
+            except queue.Empty:
+                waited += 0.2
+            if self.error:
+                raise AccountCreationError(f"Account factory stopped: {self.error}") from self.error
+            if waited >= timeout:
+                raise AccountCreationError(f"No account ready within {timeout} s")
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread:
+            self.thread.join()
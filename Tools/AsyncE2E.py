@@ -0,0 +1,256 @@
+"""
+Async E2E helpers and a runner of concurrent scenarios in one browser
+
+The helpers are the async counterparts of the ones in courses_e2e_test.py (same locators, texts
+and adaptive waits). ScenarioRunner runs independent scenarios, `async def scenario(page)`, as
+concurrent pages of one browser process, at most `concurrency` at a time: every scenario gets its
+own context (isolation="context", separate cookies) or its own page of one shared context
+(isolation="page", for scenarios that do not log in). Like the registration batch sender, the event
+loop runs in its own thread, so the runner also works next to the sync Playwright runtime of pytest.
+
+A sync browser cannot be driven from an async event loop, so the runner starts its own driver and
+browser: inside a pytest session that is a second browser next to the session one, for the duration
+of run() (about the start-up time and memory of one more browser process).
+
+    results = ScenarioRunner(concurrency=4).run({"registration-1": scenario, ...})
+    LOCAL_SERVER=1 python -m Tools.AsyncE2E --scenarios 8 --concurrency 4
+
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from playwright.async_api import async_playwright, expect
+
+from Data_and_Config.TestData import *
+from Data_and_Config.Configuration import *
+from Tools.WaitScheduler import page_key, waits
+
+ISOLATION_MODES = ("context", "page")
+
+
+async def login_with_verification(page, email, password, should_be_logged_in):
+    await login_without_verification(page, email, password)
+    if should_be_logged_in:
+        await verify_user_is_logged_in(page)
+    else:
+        await verify_user_is_not_logged_in(page)
+
+
+async def login_without_verification(page, email, password):
+    print(PRINT_LOGGING_IN_USER.format(email=email, password=password))
+    await page.click(LOCATOR_LOGIN_LINK)
+    await page.fill(LOCATOR_EMAIL_INPUT, email)
+    await page.fill(LOCATOR_PASSWORD_INPUT, password)
+    await page.click(LOCATOR_LOGIN_BUTTON)
+
+
+async def verify_user_is_logged_in(page):
+    logout_button = page.locator(LOCATOR_LOGOUT_BUTTON).first
+    await waits.run_async(
+        page_key("logged_in", page),
+        lambda timeout: expect(logout_button).to_have_text(TEXT_LOGOUT_BUTTON, timeout=timeout),
+    )
+
+
+async def verify_user_is_not_logged_in(page):
+    login_link = page.locator(LOCATOR_LOGIN_LINK).first
+    await waits.run_async(
+        page_key("logged_out", page),
+        lambda timeout: expect(login_link).to_have_text(TEXT_LOGIN_LINK, timeout=timeout),
+    )
+
+
+async def logout(page):
+    logout_button = page.locator(LOCATOR_LOGOUT_BUTTON)
+    await waits.run_async(page_key("logout", page), lambda timeout: logout_button.click(timeout=timeout))
+    print(PRINT_USER_LOGGED_OUT)
+    await verify_user_is_not_logged_in(page)
+
+
+async def open_login_page(page):
+    await page.locator(LOCATOR_LOGIN_LINK).click()
+
+
+async def open_registration_page(page):
+    await open_login_page(page)
+    await page.locator(LOCATOR_REGISTER_LINK).click()
+
+
+async def register_user(page, identity):
+    print(
+        PRINT_REGISTERING_USER.format(
+            fake_name=identity.name, fake_email=identity.email, fake_password=identity.password
+        )
+    )
+    await open_registration_page(page)
+    await page.fill(LOCATOR_NAME_INPUT, identity.name)
+    await page.fill(LOCATOR_EMAIL_INPUT, identity.email)
+    await page.fill(LOCATOR_PASSWORD_INPUT, identity.password)
+    await page.fill(LOCATOR_PASSWORD_AGAIN_INPUT, identity.password)
+    await page.click(LOCATOR_REGISTER_BUTTON)
+    await waits.run_async("register:/home", lambda timeout: expect(page).to_have_url(URL_HOME, timeout=timeout))
+    await expect(page.locator(LOCATOR_LOGOUT_BUTTON)).to_have_text(TEXT_LOGOUT_BUTTON)
+    await expect(page.locator(LOCATOR_HOME_SECTION)).to_contain_text(WELCOME_USER.format(fake_name=identity.name))
+
+    return identity.email, identity.password, identity.name
+
+
+# Registration, logout and re-login with the new credentials (test_registration_success as a scenario)
+def registration_scenario(identity):
+    async def scenario(page):
+        email, password, _ = await register_user(page, identity)
+        await logout(page)
+        await login_with_verification(page, email, password, True)
+
+    return scenario
+
+
+class ScenarioResult:
+    def __init__(self, name):
+        self.name = name
+        self.error = None
+        self.started = None
+        self.duration = None
+
+    @property
+    def passed(self):
+        return self.error is None
+
+    def __repr__(self):
+        state = "passed" if self.passed else f"failed: {self.error!r}"
+        duration = "not run" if self.duration is None else f"{self.duration:.2f} s"
+        return f"ScenarioResult({self.name!r}, {state}, {duration})"
+
+
+class ScenarioRunner:
+    def __init__(
+        self,
+        concurrency=E2E_CONCURRENCY,
+        isolation="context",
+        browser_name="chromium",
+        launch_args=None,
+        context_args=None,
+        start_url=URL_COURSES,
+    ):
+        if isolation not in ISOLATION_MODES:
+            raise ValueError(f"isolation must be one of {ISOLATION_MODES}, got {isolation!r}")
+        self.concurrency = max(1, concurrency)
+        self.isolation = isolation
+        self.browser_name = browser_name
+        self.launch_args = dict(launch_args or {})
+        self.context_args = dict(context_args or {})
+        self.start_url = start_url
+        self.peak = 0  # most scenarios that ran at the same time
+        self.elapsed = None
+
+    async def _new_context(self, browser):
+        context = await browser.new_context(**self.context_args)
+        context.set_default_timeout(TIMEOUT_BROWSER)
+        return context
+
+    async def _run_all(self, scenarios):
+        results = {name: ScenarioResult(name) for name in scenarios}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        running = 0
+
+        async with async_playwright() as playwright:
+            browser = await getattr(playwright, self.browser_name).launch(**self.launch_args)
+            shared = await self._new_context(browser) if self.isolation == "page" else None
+
+            async def run(name, scenario):
+                nonlocal running
+                result = results[name]
+                async with semaphore:
+                    running += 1
+                    self.peak = max(self.peak, running)
+                    result.started = time.monotonic()
+                    context = page = None
+                    try:
+                        context = shared or await self._new_context(browser)
+                        page = await context.new_page()
+                        await page.goto(self.start_url)
+                        await scenario(page)
+                    except Exception as error:
+                        result.error = error
+                    finally:
+                        result.duration = time.monotonic() - result.started
+                        if shared and page:
+                            await page.close()
+                        elif not shared and context:
+                            await context.close()
+                        running -= 1
+
+            started = time.monotonic()
+            await asyncio.gather(*(run(name, scenario) for name, scenario in scenarios.items()))
+            self.elapsed = time.monotonic() - started
+            await browser.close()
+        return list(results.values())
+
+    # Runs {name: async scenario(page)} concurrently, returns their ScenarioResults in the same order
+    def run(self, scenarios):
+        outcome = {}
+
+        def run():
+            try:
+                outcome["results"] = asyncio.run(self._run_all(scenarios))
+            except BaseException as error:
+                outcome["error"] = error
+
+        thread = threading.Thread(target=run, name="e2e-scenarios")
+        thread.start()
+        thread.join()
+
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["results"]
+
+
+# One assertion over all scenarios, reports every failed one
+def assert_scenarios(results):
+    failures = [
+        f"{result.name}: {type(result.error).__name__}: {result.error}" for result in results if not result.passed
+    ]
+    assert not failures, "\n".join(failures)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent registration scenarios in one browser")
+    parser.add_argument("--scenarios", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=E2E_CONCURRENCY)
+    parser.add_argument("--isolation", choices=ISOLATION_MODES, default="context")
+    parser.add_argument("--browser", default="chromium", choices=("chromium", "firefox", "webkit"))
+    args = parser.parse_args(argv)
+
+    from Tools.Identity import get_identity_pool
+
+    # The helpers check URL_HOME, so the stand-in server is selected by LOCAL_SERVER=1 like in the suites
+    server = None
+    if LOCAL_SERVER:
+        from Tools.StandInServer import StandInServer
+
+        server = StandInServer(LOCAL_SERVER_HOST, LOCAL_SERVER_PORT).start()
+
+    pool = get_identity_pool()
+    scenarios = {f"registration-{index}": registration_scenario(pool.next()) for index in range(args.scenarios)}
+    runner = ScenarioRunner(args.concurrency, args.isolation, args.browser)
+    try:
+        results = runner.run(scenarios)
+    finally:
+        if server:
+            server.stop()
+
+    for result in results:
+        print(result)
+    busy = sum(result.duration for result in results)
+    print(
+        f"\n{len(results)} scenarios in {runner.elapsed:.2f} s with up to {runner.peak} concurrent pages "
+        f"(sum of scenario times {busy:.2f} s)"
+    )
+    return 0 if all(result.passed for result in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,387 @@
+"""
+Micro-benchmarks of the framework's own costs with baseline regression gating
+
+Measures what the harness adds to every test, against the in-process stand-in server:
+
+    payload_construction   build_registration_payload over the registration case table
+    case_table_load        loading and expanding RegistrationCases.jsonl (case parametrization)
+    faker_identity         one Faker("cs_CZ") identity, as generated before the identity pool
+    identity_pool          reading one identity from the memory-mapped pool (Tools/Identity.py)
+    response_assertion     exchange log record and status assertion of one response
+    api_context_setup      new APIRequestContext and its disposal (the api_context fixture)
+    registration_request   one valid formsave.php request through an APIRequestContext
+    browser_context        new browser context and its closing
+    courses_navigation     page.goto(/courses) on an open page
+
+Each benchmark is calibrated to run at least BENCHMARK_MIN_TIME per repeat; its metric is the median
+time per operation over the repeats. Results are compared with the latest baseline in
+Data_and_Config/Benchmarks (baseline-v<N>.json, committed; --baseline N for another one) and the run fails when
+a metric is slower than the baseline by more than its tolerance (BENCHMARK_TOLERANCE by default).
+--save-baseline stores the results as the next version. Benchmarks whose dependency is not
+available (e.g. no browser installed) are reported as skipped.
+
+    python -m Tools.Benchmarks --save-baseline
+    python -m Tools.Benchmarks --only payload_construction,response_assertion --tolerance 0.1
+
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from Data_and_Config.Configuration import *
+
+BENCHMARK_DIR = os.path.join(ARTIFACTS_DIR, "benchmarks")  # scratch files of the benchmarks
+BASELINE_DIR = os.path.join(PROJECT_DIR, "Data_and_Config", "Benchmarks")  # tracked in git
+BASELINE_PATTERN = re.compile(r"baseline-v(\d+)\.json$")
+BENCHMARK_REPEATS = 5
+BENCHMARK_MIN_TIME = 0.05  # seconds per repeat
+
+BENCHMARKS = {}
+
+
+class BenchmarkSkipped(Exception):
+    pass
+
+
+# Registers `setup(env) -> operation`; tolerance is the minimum tolerance of a noisy benchmark
+def benchmark(name, tolerance=None):
+    def register(setup):
+        BENCHMARKS[name] = (setup, tolerance)
+        return setup
+
+    return register
+
+
+# Shared, lazily started dependencies of the benchmarks
+class BenchmarkEnvironment:
+    def __init__(self, base_url=URL_BASE):
+        self.base_url = base_url
+        self.cleanups = []
+        self._playwright = None
+        self._browser = None
+
+    @property
+    def playwright(self):
+        if self._playwright is None:
+            from playwright.sync_api import sync_playwright
+
+            manager = sync_playwright()
+            self._playwright = manager.start()
+            self.cleanups.append(manager.__exit__)
+        return self._playwright
+
+    @property
+    def browser(self):
+        if self._browser is None:
+            try:
+                self._browser = self.playwright.chromium.launch()
+            except Exception as error:
+                raise BenchmarkSkipped(f"no browser: {str(error).splitlines()[0]}")
+            self.cleanups.append(self._browser.close)
+        return self._browser
+
+    def close(self):
+        for cleanup in reversed(self.cleanups):
+            try:
+                cleanup()
+            except Exception:
+                pass
+        self.cleanups = []
+
+
+def _registration_cases():
+    from Tools.CaseTable import load_case_table
+
+    return [case for case in load_case_table("RegistrationCases.jsonl") if "expected_error" not in case]
+
+
+@benchmark("payload_construction")
+def _payload_construction(env):
+    from Tools.CaseTable import case_fields
+    from Tools.Registration import build_registration_payload
+
+    cases = [case_fields(case) for case in _registration_cases()]
+
+    def operation():
+        for fields in cases:
+            build_registration_payload(**fields)
+
+    return operation
+
+
+# The loader caches tables per path, the cache is cleared so every operation reads and expands the file
+@benchmark("case_table_load")
+def _case_table_load(env):
+    from Tools import CaseTable
+
+    def operation():
+        CaseTable._cache.clear()
+        CaseTable.load_case_table("RegistrationCases.jsonl")
+
+    return operation
+
+
+@benchmark("faker_identity")
+def _faker_identity(env):
+    from faker import Faker
+
+    fake = Faker("cs_CZ")
+
+    def operation():
+        fake.first_name()
+        fake.user_name()
+        fake.free_email_domain()
+        fake.password(length=10, special_chars=True, digits=True, upper_case=True, lower_case=True)
+
+    return operation
+
+
+# Reads of one claimed block: taking identities with next() would use up the pool during the run
+# and time the generation of a new batch
+@benchmark("identity_pool")
+def _identity_pool(env):
+    from Tools.Identity import IdentityPool, claim_block
+
+    pool = IdentityPool()
+    env.cleanups.append(pool.close)
+    batch, start, end = claim_block()
+    indexes = itertools.cycle(range(start, end))
+    return lambda: pool._read(batch, next(indexes))
+
+
+# Stand-in for an APIResponse: the assertion path only reads the status and the body
+class _Response:
+    status = 200
+
+    def body(self):
+        return b'{"result": "ok", "id": 1}'
+
+
+@benchmark("response_assertion")
+def _response_assertion(env):
+    from Tools.ExchangeLog import ExchangeLog
+
+    log = ExchangeLog(os.path.join(BENCHMARK_DIR, "exchanges.jsonl"))
+    env.cleanups.append(log.close)
+    payload = _registration_cases()[0]
+    response = _Response()
+
+    def operation():
+        exchange = log.record("POST", URL_REGKURZ_FORM, payload, response)
+        assert response.status == 200, exchange.render("Expected 200")
+
+    return operation
+
+
+@benchmark("api_context_setup", tolerance=0.5)
+def _api_context_setup(env):
+    request = env.playwright.request
+    return lambda: request.new_context().dispose()
+
+
+@benchmark("registration_request", tolerance=0.5)
+def _registration_request(env):
+    from Tools.CaseTable import case_fields
+    from Tools.Registration import build_registration_payload
+
+    context = env.playwright.request.new_context()
+    env.cleanups.append(context.dispose)
+    case = next(case for case in _registration_cases() if case["expected_status"] == 200)
+    payload = build_registration_payload(**case_fields(case))
+    url = f"{env.base_url}/regkurz/formsave.php"
+
+    def operation():
+        assert context.post(url, data=payload).status == case["expected_status"]
+
+    return operation
+
+
+@benchmark("browser_context", tolerance=0.5)
+def _browser_context(env):
+    browser = env.browser
+    return lambda: browser.new_context().close()
+
+
+@benchmark("courses_navigation", tolerance=0.5)
+def _courses_navigation(env):
+    context = env.browser.new_context()
+    env.cleanups.append(context.close)
+    page = context.new_page()
+    url = f"{env.base_url}/courses"
+    return lambda: page.goto(url)
+
+
+# Median seconds per operation: loops calibrated to BENCHMARK_MIN_TIME, then `repeats` timed repeats
+def measure(operation, repeats=BENCHMARK_REPEATS, min_time=BENCHMARK_MIN_TIME):
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    samples = [elapsed / loops]
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        "median_us": round(statistics.median(samples) * 1e6, 3),
+        "min_us": round(min(samples) * 1e6, 3),
+        "loops": loops,
+    }
+
+
+def run_benchmarks(names, env, repeats=BENCHMARK_REPEATS):
+    results = {}
+    for name in names:
+        setup, _ = BENCHMARKS[name]
+        try:
+            operation = setup(env)
+            results[name] = measure(operation, repeats)
+        except BenchmarkSkipped as skipped:
+            results[name] = {"skipped": str(skipped)}
+    return results
+
+
+def baseline_versions(directory=BASELINE_DIR):
+    versions = []
+    for path in glob.glob(os.path.join(directory, "baseline-v*.json")):
+        match = BASELINE_PATTERN.search(path)
+        if match:
+            versions.append(int(match.group(1)))
+    return sorted(versions)
+
+
+def load_baseline(version=None, directory=BASELINE_DIR):
+    versions = baseline_versions(directory)
+    if not versions:
+        return None
+    version = versions[-1] if version is None else version
+    with open(os.path.join(directory, f"baseline-v{version}.json"), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine()}
+
+
+# Stores the results as the next baseline version, returns its path
+def save_baseline(results, directory=BASELINE_DIR):
+    versions = baseline_versions(directory)
+    version = versions[-1] + 1 if versions else 1
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"baseline-v{version}.json")
+    measured = {name: result for name, result in results.items() if "skipped" not in result}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "version": version,
+                "created": time.time(),
+                "revision": _revision(),
+                "environment": environment(),
+                "metrics": measured,
+            },
+            file,
+            indent=2,
+        )
+    return path
+
+
+# [(name, baseline us, current us, change, tolerance, regressed), ...] of the metrics both runs have
+def compare(results, baseline, tolerance=BENCHMARK_TOLERANCE):
+    rows = []
+    for name, result in results.items():
+        previous = baseline["metrics"].get(name)
+        if "skipped" in result or previous is None:
+            continue
+        limit = max(tolerance, BENCHMARKS[name][1] or 0) if name in BENCHMARKS else tolerance
+        change = result["median_us"] / previous["median_us"] - 1 if previous["median_us"] else 0.0
+        rows.append((name, previous["median_us"], result["median_us"], change, limit, change > limit))
+    return rows
+
+
+def _format_us(value):
+    if value >= 1000:
+        return f"{value / 1000:.2f} ms"
+    return f"{value:.2f} us"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the test harness with baseline gating")
+    parser.add_argument("--only", default=None, help="comma-separated benchmark names")
+    parser.add_argument("--repeats", type=int, default=BENCHMARK_REPEATS)
+    parser.add_argument("--tolerance", type=float, default=BENCHMARK_TOLERANCE, help="allowed slowdown (0.2 = 20 %%)")
+    parser.add_argument("--baseline", type=int, default=None, help="baseline version to compare with (latest)")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the next baseline")
+    parser.add_argument("--remote", action="store_true", help="use the configured host instead of a stand-in server")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)} (available: {', '.join(BENCHMARKS)})")
+
+    server = None
+    base_url = URL_BASE
+    if not args.remote:
+        from Tools.StandInServer import StandInServer
+
+        server = StandInServer(port=0).start()
+        base_url = server.url
+
+    env = BenchmarkEnvironment(base_url)
+    try:
+        results = run_benchmarks(names, env, args.repeats)
+    finally:
+        env.close()
+        if server:
+            server.stop()
+
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:<22} skipped ({result['skipped']})")
+        else:
+            print(f"{name:<22} {_format_us(result['median_us']):>12}  ({result['loops']} loops x {args.repeats})")
+
+    exit_code = 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print("\nNo baseline yet (run with --save-baseline)")
+    else:
+        print(f"\nCompared with baseline v{baseline['version']} (revision {baseline.get('revision') or '?'}):")
+        if baseline.get("environment") != environment():
+            print(f"  Note: recorded on a different environment {baseline.get('environment')}", file=sys.stderr)
+        for name, previous, current, change, limit, regressed in compare(results, baseline, args.tolerance):
+            flag = f"  REGRESSION (> {limit:.0%})" if regressed else ""
+            print(f"  {name:<22} {_format_us(previous):>12} -> {_format_us(current):>12} {change:>+8.1%}{flag}")
+            exit_code = 1 if regressed else exit_code
+
+    if args.save_baseline:
+        print(f"\nBaseline saved: {save_baseline(results)}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,158 @@
+"""
+Table-driven registration cases (pytest plugin)
+
+A case table is a JSONL file in Data_and_Config. The first record holds the base payload,
+every following record is one case with its overrides and expectation:
+
+    {"base": {"course": "2", "name": "Jan", ...}}
+    {"id": "without_course", "description": "...", "course": "", "expected_status": 500}
+
+Special keys of a case record:
+    id               unique case name, used as the pytest parameter id
+    description      free text
+    expected_status  expected HTTP status
+    expected_error   expected precondition error (AssertionError message) instead of a status
+    omit             list of base fields to drop from the payload
+    raw              raw request body sent as is (e.g. malformed JSON)
+
+Usage in a test module:
+
+    @pytest.mark.case_table("RegistrationCases.jsonl")
+    def test_registration(api_context, case): ...
+
+    @pytest.mark.case_table("RegistrationCases.jsonl", batch=True)
+    def test_registration_batch(cases): ...
+
+Per-case tests run by default, --case-batch runs the batch tests instead (whole table in one go).
+--case-shard=K/N keeps only the K-th (1..N) of N stable shards of every table.
+
+"""
+
+import json
+import os
+import zlib
+
+import pytest
+
+CASE_TABLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data_and_Config")
+
+CASE_META_KEYS = ("id", "description", "expected_status", "expected_error", "raw")
+
+_cache = {}
+
+
+def _resolve(path):
+    return path if os.path.isabs(path) else os.path.join(CASE_TABLE_DIR, path)
+
+
+# Loads the table and merges each case over the base payload
+# A repeated id, or a case with the same fields and expectation as an earlier one, is an error in the table
+def load_case_table(path):
+    path = _resolve(path)
+    if path in _cache:
+        return _cache[path]
+
+    base = {}
+    cases = []
+    ids = set()
+    seen = {}  # signature: id
+    with open(path, encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith("//"):
+                continue
+            record = json.loads(line)
+            if "base" in record:
+                base = record["base"]
+                continue
+
+            case = dict(base)
+            for field in record.pop("omit", []):
+                case.pop(field, None)
+            case.update(record)
+            case.setdefault("id", f"line{line_number}")
+
+            if case["id"] in ids:
+                raise ValueError(f"{path}:{line_number}: duplicate case id {case['id']!r}")
+            ids.add(case["id"])
+
+            signature = json.dumps(
+                {key: value for key, value in case.items() if key not in ("id", "description")},
+                sort_keys=True,
+                ensure_ascii=False,
+            )
+            if signature in seen:
+                raise ValueError(f"{path}:{line_number}: case {case['id']!r} duplicates case {seen[signature]!r}")
+            seen[signature] = case["id"]
+            cases.append(case)
+
+    _cache[path] = cases
+    return cases
+
+
+# Form inputs of a case (everything except the expectation/meta keys)
+def case_fields(case):
+    return {key: value for key, value in case.items() if key not in CASE_META_KEYS}
+
+
+# "K/N" -> (K, N), shards are numbered from 1
+def parse_shard(shard):
+    try:
+        index, count = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"--case-shard must be K/N, got {shard!r}") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"--case-shard K/N needs 1 <= K <= N, got {shard!r}")
+    return index, count
+
+
+def shard_cases(cases, shard):
+    if not shard:
+        return cases
+    index, count = parse_shard(shard)
+    return [case for case in cases if zlib.crc32(case["id"].encode("utf-8")) % count == index - 1]
+
+
+# Plugin hooks
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("case_table", "table-driven registration cases")
+    group.addoption("--case-batch", action="store_true", help="run case tables through the bulk sender")
+    group.addoption(
+        "--case-shard", default=None, metavar="K/N", help="run only shard K (1..N) of N of every case table"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "case_table(path, batch=False): parametrize a test from a JSONL case table")
+    if config.getoption("case_shard"):
+        try:
+            parse_shard(config.getoption("case_shard"))
+        except ValueError as error:
+            raise pytest.UsageError(str(error)) from None
+
+
+def pytest_generate_tests(metafunc):
+    marker = metafunc.definition.get_closest_marker("case_table")
+    if marker is None:
+        return
+    cases = shard_cases(load_case_table(marker.args[0]), metafunc.config.getoption("case_shard"))
+    if marker.kwargs.get("batch"):
+        metafunc.parametrize("cases", [cases], ids=[os.path.basename(marker.args[0])])
+    else:
+        metafunc.parametrize("case", cases, ids=[case["id"] for case in cases])
+
+
+def pytest_collection_modifyitems(config, items):
+    batch = config.getoption("case_batch")
+    selected, deselected = [], []
+    for item in items:
+        marker = item.get_closest_marker("case_table")
+        if marker is not None and bool(marker.kwargs.get("batch")) != batch:
+            deselected.append(item)
+        else:
+            selected.append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
@@ -0,0 +1,269 @@
+"""
+Record/replay cassette for the API request contexts
+
+Responses are stored on disk (ARTIFACTS_DIR/cassette), keyed by a canonical hash of method, URL,
+headers and body. The cassette is limited to CASSETTE_MAX_BYTES, least recently used entries are evicted.
+Parallel workers share one cassette, its index.json is merged under a file lock whenever one of them saves.
+
+CASSETTE_MODE:
+    off      requests go to the server, nothing is stored (default)
+    record   stored responses are replayed, missing ones are fetched and stored
+    replay   stored responses only, a missing one fails the test (no network at all)
+    refresh  every request goes to the server, statuses that differ from the stored ones are reported as drift
+
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from Data_and_Config.Configuration import *
+from Tools.FileLock import file_lock
+
+CASSETTE_MODES = ("off", "record", "replay", "refresh")
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+# Response replayed from the cassette (or just fetched and read), offers the parts of APIResponse the suites use
+class CassetteResponse:
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    @property
+    def ok(self):
+        return 200 <= self.status <= 299
+
+    def body(self):
+        return self._body
+
+    def text(self):
+        return self._body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self._body)
+
+    def dispose(self):
+        pass
+
+
+def _canonical_body(data):
+    if data is None:
+        return ""
+    if isinstance(data, bytes):
+        return data.decode("utf-8", errors="replace")
+    if isinstance(data, str):
+        return data
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def request_key(method, url, headers=None, data=None):
+    canonical = json.dumps(
+        {
+            "method": method.upper(),
+            "url": url,
+            "headers": sorted((name.lower(), str(value)) for name, value in (headers or {}).items()),
+            "body": _canonical_body(data),
+        },
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    def __init__(self, path=CASSETTE_DIR, max_bytes=CASSETTE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.index_path = os.path.join(path, "index.json")
+        self.index = self._load_index()
+        self.evicted = set()  # keys this process removed, not taken over from the stored index again
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.drifts = []
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, f"{key}.json")
+
+    def get(self, key):
+        with self.lock:
+            entry = self._read(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.index[key]["last_used"] = time.time()
+            self.hits += 1
+            return entry
+
+    # Stored entry without counting it as a replay (hits, misses and last_used are left as they are)
+    def peek(self, key):
+        with self.lock:
+            return self._read(key)
+
+    def _read(self, key):
+        if key not in self.index or not os.path.exists(self._entry_path(key)):
+            return None
+        with open(self._entry_path(key), encoding="utf-8") as file:
+            return json.load(file)
+
+    def put(self, key, entry):
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        with self.lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._entry_path(key), "wb") as file:
+                file.write(data)
+            self.index[key] = {"size": len(data), "last_used": time.time()}
+            self.evicted.discard(key)
+            self.recorded += 1
+            self._save_index()
+
+    def _evict(self):
+        total = sum(item["size"] for item in self.index.values())
+        for key in sorted(self.index, key=lambda key: self.index[key]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.index.pop(key)["size"]
+            self.evicted.add(key)
+            try:
+                os.remove(self._entry_path(key))
+            except FileNotFoundError:
+                pass
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path, encoding="utf-8") as file:
+            return json.load(file)
+
+    # Parallel workers share the index: the stored one is merged in under a file lock (entries recorded by
+    # other workers are kept, the later last_used wins, entries evicted by any worker are dropped), then the
+    # cassette is evicted down to max_bytes and the index written atomically
+    def _save_index(self):
+        with file_lock(f"{self.index_path}.lock"):
+            for key, item in self._load_index().items():
+                if key not in self.evicted and item["last_used"] > self.index.get(key, {"last_used": 0})["last_used"]:
+                    self.index[key] = item
+            for key in [key for key in self.index if not os.path.exists(self._entry_path(key))]:
+                del self.index[key]
+            self._evict()
+            temporary = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump(self.index, file)
+            os.replace(temporary, self.index_path)
+
+    def save(self):
+        with self.lock:
+            if self.index:
+                os.makedirs(self.path, exist_ok=True)
+                self._save_index()
+
+
+# Wraps an APIRequestContext, get/post/fetch go through the cassette according to the mode
+class CassetteRequestContext:
+    def __init__(self, context, cassette, mode=CASSETTE_MODE):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"CASSETTE_MODE must be one of {CASSETTE_MODES}, got {mode!r}")
+        self.context = context
+        self.cassette = cassette
+        self.mode = mode
+
+    def get(self, url, **kwargs):
+        return self.fetch(url, method="GET", **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.fetch(url, method="POST", **kwargs)
+
+    def fetch(self, url, method="GET", headers=None, data=None, **kwargs):
+        if self.mode == "off":
+            return self.context.fetch(url, method=method, headers=headers, data=data, **kwargs)
+
+        key, replayed = self._replayed(method, url, headers, data)
+        if replayed is not None:
+            return replayed
+        response = self.context.fetch(url, method=method, headers=headers, data=data, **kwargs)
+        return self._record(key, method, url, response.status, response.headers, response.body())
+
+    # (key, stored response or None); in replay mode a missing response raises CassetteMiss
+    def _replayed(self, method, url, headers, data):
+        key = request_key(method, url, headers, data)
+        stored = None if self.mode == "refresh" else self.cassette.get(key)
+        if stored is not None:
+            return key, CassetteResponse(url, stored["status"], stored["headers"], stored["body"].encode("utf-8"))
+        if self.mode == "replay":
+            raise CassetteMiss(f"No recorded response for {method} {url} (key {key[:12]})")
+        return key, None
+
+    # Stores the fetched response (reporting a drifted status in refresh mode) and returns it
+    def _record(self, key, method, url, status, headers, body):
+        entry = {
+            "method": method,
+            "url": url,
+            "status": status,
+            "headers": dict(headers),
+            "body": body.decode("utf-8", errors="replace"),
+        }
+        if self.mode == "refresh":
+            previous = self.cassette.peek(key)
+            if previous is not None and previous["status"] != entry["status"]:
+                self.cassette.drifts.append(
+                    {"method": method, "url": url, "key": key, "was": previous["status"], "now": entry["status"]}
+                )
+        self.cassette.put(key, entry)
+        return CassetteResponse(url, entry["status"], entry["headers"], entry["body"].encode("utf-8"))
+
+    def dispose(self):
+        self.context.dispose()
+
+
+# Same for an async APIRequestContext (bulk sender of Tools/Registration.py); the response is always read
+# into a CassetteResponse, in "off" mode too, so its body can be logged without awaiting it again
+class AsyncCassetteRequestContext(CassetteRequestContext):
+    async def get(self, url, **kwargs):
+        return await self.fetch(url, method="GET", **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.fetch(url, method="POST", **kwargs)
+
+    async def fetch(self, url, method="GET", headers=None, data=None, **kwargs):
+        key = None
+        if self.mode != "off":
+            key, replayed = self._replayed(method, url, headers, data)
+            if replayed is not None:
+                return replayed
+        response = await self.context.fetch(url, method=method, headers=headers, data=data, **kwargs)
+        body = await response.body()
+        if key is None:
+            return CassetteResponse(url, response.status, response.headers, body)
+        return self._record(key, method, url, response.status, response.headers, body)
+
+    async def dispose(self):
+        await self.context.dispose()
+
+
+_cassette = None
+
+
+# Cassette shared by all API fixtures of the session
+def get_cassette():
+    global _cassette
+    if _cassette is None:
+        _cassette = Cassette()
+    return _cassette
+
+
+def cassette_context(context, mode=CASSETTE_MODE):
+    if mode == "off":
+        return context
+    return CassetteRequestContext(context, get_cassette(), mode)
+
+
+def async_cassette_context(context, mode=CASSETTE_MODE):
+    return AsyncCassetteRequestContext(context, None if mode == "off" else get_cassette(), mode)
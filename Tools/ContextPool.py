@@ -0,0 +1,158 @@
+"""
+Pool of pre-warmed browser contexts shared by the E2E tests
+
+Creating a context and loading the courses page is paid once per pooled context instead of once per test.
+A checked-in context is cleaned (cookies, storage, extra pages) and sent back to the courses page,
+so the next test starts on a clean, already loaded page. A context is closed instead of reused after
+max_uses tests, because cleaning does not release everything a context collects (caches, workers, heap);
+recycle() and restart_browser() are called by the resource governor (Tools/ResourceGovernor.py).
+
+"""
+
+from Data_and_Config.Configuration import *
+
+CLEAR_STORAGE_SCRIPT = "() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }"
+RESTORE_STORAGE_SCRIPT = "items => { for (const { name, value } of items) localStorage.setItem(name, value); }"
+
+
+class ContextPool:
+    def __init__(
+        self,
+        browser,
+        size=CONTEXT_POOL_SIZE,
+        context_args=None,
+        start_url=URL_COURSES,
+        blocker=None,
+        max_uses=CONTEXT_MAX_USES,
+        launch=None,
+    ):
+        self.browser = browser
+        self.blocker = blocker
+        self.size = max(1, size)
+        self.context_args = dict(context_args or {})
+        self.start_url = start_url
+        self.max_uses = max_uses
+        self.launch = launch  # launches a new browser for restart_browser()
+        self.idle = []
+        self.uses = {}  # context: tests it served
+        self.created = 0
+        self.reused = 0
+        self.retired = 0  # contexts closed after max_uses tests or by recycle()
+        self.restarts = 0
+
+    def warm_up(self):
+        while len(self.idle) < self.size:
+            self.idle.append(self._new_context())
+        return self
+
+    def _new_context(self):
+        context = self.browser.new_context(**self.context_args)
+        context.set_default_timeout(TIMEOUT_BROWSER)
+        if self.blocker:
+            self.blocker.install(context)
+        page = context.new_page()
+        page.goto(self.start_url)
+        self.created += 1
+        return context, page
+
+    # Returns (context, page) with the page already on start_url
+    # storage_state (dict from context.storage_state()) restores the cookies and localStorage of a saved login
+    # reload loads start_url again, e.g. after the blocker's allow-list changed (the warm page was loaded without)
+    def checkout(self, storage_state=None, reload=False):
+        if self.idle:
+            context, page = self.idle.pop()
+            self.reused += 1
+        else:
+            context, page = self._new_context()
+
+        if storage_state:
+            context.add_cookies(storage_state.get("cookies", []))
+            self._restore_local_storage(page, storage_state.get("origins", []))
+            page.goto(self.start_url)
+        elif reload or page.url != self.start_url:
+            page.goto(self.start_url)
+        return context, page
+
+    # localStorage can only be written from a page of its origin: the page is usually there already (start_url),
+    # other origins are visited first; the caller loads start_url again afterwards
+    def _restore_local_storage(self, page, origins):
+        for origin in origins:
+            if not origin.get("localStorage"):
+                continue
+            if not page.url.startswith(origin["origin"] + "/"):
+                page.goto(origin["origin"])
+            page.evaluate(RESTORE_STORAGE_SCRIPT, origin["localStorage"])
+
+    def checkin(self, context, page):
+        try:
+            for other in context.pages:
+                if other is not page:
+                    other.close()
+            page.evaluate(CLEAR_STORAGE_SCRIPT)
+            context.clear_cookies()
+            context.clear_permissions()
+            page.goto(self.start_url)
+        except Exception:
+            # Broken context (crashed page, closed browser...) is not returned to the pool
+            self._close(context)
+            return
+
+        self.uses[context] = self.uses.get(context, 0) + 1
+        if self.max_uses and self.uses[context] >= self.max_uses:
+            self.retired += 1
+            self._close(context)
+        elif len(self.idle) < self.size:
+            self.idle.append((context, page))
+        else:
+            self._close(context)
+
+    # Replaces the idle contexts with new ones
+    def recycle(self):
+        self.retired += len(self.idle)
+        self.close()
+        return self.warm_up()
+
+    # Closes the browser with its idle contexts and continues with a new one from launch()
+    def restart_browser(self):
+        self.close()
+        try:
+            self.browser.close()
+        except Exception:
+            pass
+        self.browser = self.launch()
+        self.restarts += 1
+        return self.warm_up()
+
+    def close(self):
+        while self.idle:
+            context, _ = self.idle.pop()
+            self._close(context)
+
+    def _close(self, context):
+        self.uses.pop(context, None)
+        try:
+            context.close()
+        except Exception:
+            pass
+
+
+# Saved login (storage_state) of one user, created on first use and dropped when the session ends
+# (e.g. the test logged the user out, which invalidates the server-side session)
+class StorageStateCache:
+    def __init__(self, login):
+        self.login = login
+        self.state = None
+
+    def get(self, pool):
+        if self.state is None:
+            context, page = pool.checkout()
+            try:
+                self.login(page)
+                self.state = context.storage_state()
+            finally:
+                # Only the client side is cleaned, the server-side session stays valid for the saved cookies
+                pool.checkin(context, page)
+        return self.state
+
+    def invalidate(self):
+        self.state = None
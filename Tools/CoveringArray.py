@@ -0,0 +1,263 @@
+"""
+Combinatorial reduction of the registration case matrix (covering arrays)
+
+Every send_registration input is a factor with equivalence classes of valid and invalid values.
+The valid classes are combined into a covering array of the chosen strength t: every combination
+of t classes of any t factors appears in at least one case (t=2: pairwise). Rows are built greedily,
+each one starting from a combination not covered yet and choosing the class of every other factor
+that covers the most new combinations (best of several random candidates per row); the smallest
+array of several randomized runs is kept, without rows the others make redundant.
+
+Invalid classes are not combined with each other, because the first rejected field would mask the
+others: each one gets exactly one case, carried by a valid row, so a 500 points at that single class.
+
+The report shows the t-way coverage reached after every case:
+
+    python -m Tools.CoveringArray --strength 2 --output RegistrationPairwiseCases.jsonl
+    python -m Tools.CoveringArray --strength 3 --seed 7
+
+"""
+
+import argparse
+import itertools
+import json
+import random
+
+from Tools.CaseTable import _resolve
+from Tools.Registration import build_registration_payload
+from Tools.RegistrationSchema import expected_status
+
+# Fields that are not factors, shared by all cases
+BASE = {
+    "course": "1",
+    "name": "Jan",
+    "surname": "Novak",
+    "email": "jan.novak@abc.cz",
+    "phone": "608123123",
+    "person": "fyz",
+    "address": "Brno",
+    "count": "1",
+    "comment": None,
+    "consent": True,
+}
+
+# factor: ({valid class: fields}, {invalid class: fields})
+FACTORS = {
+    "course": (
+        {"course_1": {"course": "1"}, "course_2": {"course": "2"}, "course_3": {"course": "3"}},
+        {"course_empty": {"course": ""}, "course_unknown": {"course": "4"}},
+    ),
+    "person": (
+        {"fyz": {"person": "fyz", "address": "Brno"}, "pra": {"person": "pra", "ico": "25596641"}},
+        {},
+    ),
+    "email": (
+        {"email_plain": {"email": "jan.novak@abc.cz"}, "email_tagged": {"email": "j+tag@sub.example.com"}},
+        {"email_missing_at": {"email": "johndoeexample.com"}, "email_missing_domain": {"email": "jane@"}},
+    ),
+    "phone": (
+        {
+            "phone_national": {"phone": "608123123"},
+            "phone_international": {"phone": "+420608123123"},
+            "phone_spaced": {"phone": "608 123 123"},
+        },
+        {
+            "phone_too_short": {"phone": "12345"},
+            "phone_letters": {"phone": "608ABC123"},
+            "phone_empty": {"phone": ""},
+        },
+    ),
+    "name": (
+        {"name_ascii": {"name": "Jan"}, "name_diacritics": {"name": "Jiří"}, "name_digits": {"name": "12345"}},
+        {"name_empty": {"name": ""}},
+    ),
+    "count": (
+        {"count_one": {"count": "1"}, "count_many": {"count": "25"}},
+        {"count_zero": {"count": "0"}, "count_text": {"count": "abc"}},
+    ),
+    "comment": (
+        {"comment_none": {"comment": None}, "comment_text": {"comment": "Prosím o fakturu."}},
+        {"comment_html": {"comment": "<b>"}},
+    ),
+    "consent": (
+        {"consent_given": {"consent": True}, "consent_on": {"consent": "on"}},
+        {"consent_refused": {"consent": False}},
+    ),
+}
+
+
+# All t-way combinations: {(factor indexes, level indexes), ...}
+def all_combinations(levels, strength):
+    return {
+        (factors, values)
+        for factors in itertools.combinations(range(len(levels)), strength)
+        for values in itertools.product(*(range(levels[factor]) for factor in factors))
+    }
+
+
+def _covered(row, strength):
+    return {
+        (factors, tuple(row[factor] for factor in factors))
+        for factors in itertools.combinations(range(len(row)), strength)
+    }
+
+
+# One candidate row: starts from an uncovered combination, then every other factor (in random order)
+# gets the level that covers the most uncovered combinations with the factors assigned so far
+def _candidate_row(levels, strength, uncovered, pool, rng):
+    row = [None] * len(levels)
+    factors, values = rng.choice(pool)
+    for factor, value in zip(factors, values):
+        row[factor] = value
+    for factor in rng.sample(range(len(levels)), len(levels)):
+        if row[factor] is not None:
+            continue
+        assigned = [other for other in range(len(levels)) if row[other] is not None]
+        best, best_gain = [], -1
+        for value in range(levels[factor]):
+            gain = 0
+            for others in itertools.combinations(assigned, strength - 1):
+                combination = tuple(sorted(others + (factor,)))
+                key = tuple(value if index == factor else row[index] for index in combination)
+                gain += (combination, key) in uncovered
+            if gain > best_gain:
+                best, best_gain = [value], gain
+            elif gain == best_gain:
+                best.append(value)
+        row[factor] = rng.choice(best)
+    return row
+
+
+def _greedy(levels, strength, rng, candidates):
+    uncovered = all_combinations(levels, strength)
+    rows = []
+    while uncovered:
+        pool = sorted(uncovered)
+        best_row, best_covered = None, set()
+        for _ in range(candidates):
+            row = _candidate_row(levels, strength, uncovered, pool, rng)
+            covered = _covered(row, strength) & uncovered
+            if len(covered) > len(best_covered):
+                best_row, best_covered = row, covered
+        rows.append(best_row)
+        uncovered -= best_covered
+    return rows
+
+
+# Drops rows whose combinations are all covered by the other rows (latest rows first)
+def _drop_redundant(rows, strength):
+    rows = list(rows)
+    for index in range(len(rows) - 1, -1, -1):
+        others = set().union(*(_covered(row, strength) for position, row in enumerate(rows) if position != index))
+        if _covered(rows[index], strength) <= others:
+            del rows[index]
+    return rows
+
+
+# Greedy covering array of strength t, the smallest of `restarts` runs: [[level index per factor], ...]
+def covering_array(levels, strength=2, seed=0, candidates=30, restarts=10):
+    strength = min(strength, len(levels))
+    rng = random.Random(seed)
+    best = None
+    for _ in range(restarts):
+        rows = _drop_redundant(_greedy(levels, strength, rng, candidates), strength)
+        if best is None or len(rows) < len(best):
+            best = rows
+    return best
+
+
+# Lower bound of any covering array: product of the t largest level counts
+def lower_bound(levels, strength):
+    bound = 1
+    for count in sorted(levels, reverse=True)[:strength]:
+        bound *= count
+    return bound
+
+
+class CaseMatrix:
+    def __init__(self, factors=FACTORS, base=BASE):
+        self.factors = factors
+        self.base = base
+        self.names = list(factors)
+        self.valid = [list(factors[name][0]) for name in self.names]  # valid class names per factor
+        self.levels = [len(classes) for classes in self.valid]
+
+    def fields(self, classes):
+        fields = dict(self.base)
+        for name, class_name in classes.items():
+            valid, invalid = self.factors[name]
+            fields.update(valid.get(class_name) or invalid[class_name])
+        if fields["person"] == "pra":
+            fields.pop("address", None)
+        return fields
+
+    # Cases of the covering array, then one case per invalid class
+    # Returns [(id, {factor: class}, fields, new t-way combinations covered), ...]
+    def generate(self, strength=2, seed=0):
+        strength = min(strength, len(self.levels))
+        rows = covering_array(self.levels, strength, seed)
+        uncovered = all_combinations(self.levels, strength)
+        cases = []
+        for number, row in enumerate(rows, 1):
+            classes = {name: self.valid[index][level] for index, (name, level) in enumerate(zip(self.names, row))}
+            new = _covered(row, strength) & uncovered
+            uncovered -= new
+            cases.append((f"t{strength}_{number:02d}", classes, self.fields(classes), len(new)))
+        carriers = itertools.cycle(cases[:])
+        for name in self.names:
+            for class_name in self.factors[name][1]:
+                classes = dict(next(carriers)[1], **{name: class_name})
+                cases.append((f"t{strength}_{class_name}", classes, self.fields(classes), 0))
+        return cases
+
+
+# Case table in the Data_and_Config format (base record + per-case overrides)
+def write_case_table(cases, path, base=BASE):
+    with open(_resolve(path), "w", encoding="utf-8") as file:
+        file.write(json.dumps({"base": base}, ensure_ascii=False) + "\n")
+        for case_id, classes, fields, _ in cases:
+            status = expected_status(build_registration_payload(**fields))
+            record = {
+                "id": case_id,
+                "description": ("✅ " if status == 200 else "❌ ") + ", ".join(classes.values()),
+            }
+            record.update({key: value for key, value in fields.items() if base.get(key, object()) != value})
+            omitted = [key for key in base if key not in fields]
+            if omitted:
+                record["omit"] = omitted
+            record["expected_status"] = status
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Covering array of the registration form factors")
+    parser.add_argument("--strength", type=int, default=2, help="interaction strength t (2 = pairwise)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="case table to write (in Data_and_Config)")
+    args = parser.parse_args(argv)
+
+    matrix = CaseMatrix()
+    cases = matrix.generate(args.strength, args.seed)
+    total = len(all_combinations(matrix.levels, min(args.strength, len(matrix.levels))))
+    exhaustive = 1
+    for count in matrix.levels:
+        exhaustive *= count
+    invalid = sum(len(invalid) for _, invalid in FACTORS.values())
+
+    print(f"{len(matrix.names)} factors, valid classes {matrix.levels}: {exhaustive} exhaustive combinations")
+    print(
+        f"{args.strength}-way combinations: {total}, covering array rows: {len(cases) - invalid} "
+        f"(lower bound {lower_bound(matrix.levels, args.strength)}), invalid classes: {invalid}\n"
+    )
+    covered = 0
+    for number, (case_id, classes, _, new) in enumerate(cases, 1):
+        covered += new
+        print(f"{number:>3} {case_id:<28} +{new:<3} {covered / total:>7.1%}  {', '.join(classes.values())}")
+    if args.output:
+        write_case_table(cases, args.output)
+        print(f"\nCase table: {_resolve(args.output)} ({len(cases)} cases)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,154 @@
+"""
+Structured log of the API exchanges (one JSONL record per request/response)
+
+The response body is read once per exchange and decoded at most once. Records are built, serialized
+and written by a background thread to ARTIFACTS_DIR/exchanges/worker-<id>.jsonl (new file every run),
+so the test thread only queues the exchange. EXCHANGE_LOG_LEVEL selects what a record contains:
+
+    0  nothing is written
+    1  test, method, URL, status, body sizes and hashes (default)
+    2  as 1 plus the bodies, fields longer than EXCHANGE_LOG_MAX_FIELD truncated (with length and hash)
+
+The full, pretty-printed exchange is rendered only as the message of a failed assertion:
+
+    exchange = exchange_log.record("POST", url, payload, response)
+    assert response.status == expected_status, exchange.render(f"Expected {expected_status}")
+
+"""
+
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+
+from Data_and_Config.Configuration import *
+
+EXCHANGE_LOG_DIR = os.path.join(ARTIFACTS_DIR, "exchanges")
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _encode(payload):
+    if payload is None:
+        return b""
+    if isinstance(payload, bytes):
+        return payload
+    if isinstance(payload, str):
+        return payload.encode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Long strings are replaced by their beginning, length and hash
+def _compact(value, limit=EXCHANGE_LOG_MAX_FIELD):
+    if isinstance(value, dict):
+        return {key: _compact(item, limit) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_compact(item, limit) for item in value]
+    if isinstance(value, str) and len(value) > limit:
+        return {"truncated": value[:limit], "length": len(value), "sha256": _digest(value.encode("utf-8"))}
+    return value
+
+
+class Exchange:
+    def __init__(self, test, method, url, payload, status, body):
+        self.test = test
+        self.method = method
+        self.url = url
+        self.payload = payload
+        self.status = status
+        self.body = body  # bytes, read once from the response
+        self.time = time.time()
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.body.decode("utf-8", errors="replace")
+        return self._text
+
+    def record(self, level):
+        request_body = _encode(self.payload)
+        record = {
+            "time": self.time,
+            "test": self.test,
+            "method": self.method,
+            "url": self.url,
+            "status": self.status,
+            "request": {"size": len(request_body), "sha256": _digest(request_body)},
+            "response": {"size": len(self.body), "sha256": _digest(self.body)},
+        }
+        if level >= 2:
+            payload = self.payload
+            if isinstance(payload, bytes):
+                payload = payload.decode("utf-8", errors="replace")
+            record["request"]["body"] = _compact(payload)
+            try:
+                record["response"]["body"] = _compact(json.loads(self.text))
+            except ValueError:
+                record["response"]["body"] = _compact(self.text)
+        return record
+
+    # Full exchange for the message of a failed assertion
+    def render(self, message=""):
+        if isinstance(self.payload, (dict, list)):
+            payload = json.dumps(self.payload, indent=2, ensure_ascii=False)
+        else:
+            payload = self.payload if isinstance(self.payload, str) else repr(self.payload)
+        return (
+            f"{message}\n>>> {self.test}\n{self.method} {self.url}\nPayload: {payload}\n"
+            f"Response:\nStatus: {self.status}\nBody: {self.text}"
+        )
+
+
+class ExchangeLog:
+    def __init__(self, path=None, level=EXCHANGE_LOG_LEVEL):
+        self.path = path or os.path.join(EXCHANGE_LOG_DIR, f"worker-{WORKER_ID}.jsonl")
+        self.level = level
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.written = 0
+        self.mode = "w"
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self.thread = threading.Thread(target=self._write, name="exchange-log", daemon=True)
+                self.thread.start()
+
+    def _write(self):
+        with open(self.path, self.mode, encoding="utf-8") as file:
+            self.mode = "a"
+            while True:
+                exchange = self.queue.get()
+                if exchange is None:
+                    break
+                file.write(json.dumps(exchange.record(self.level), ensure_ascii=False) + "\n")
+                self.written += 1
+                if self.queue.empty():
+                    file.flush()
+
+    # Reads the response once and queues its record; returns the Exchange for assertion messages
+    def record(self, method, url, payload, response):
+        test = os.environ.get("PYTEST_CURRENT_TEST", "<unknown>").split(" ")[0]
+        exchange = Exchange(test, method, url, payload, response.status, response.body())
+        if self.level >= 1:
+            self._start()
+            self.queue.put(exchange)
+        return exchange
+
+    # Writes the queued records and stops the writer (a later record starts it again)
+    def close(self):
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread:
+            self.queue.put(None)
+            thread.join()
+
+
+exchange_log = ExchangeLog()
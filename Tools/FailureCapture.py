@@ -0,0 +1,260 @@
+"""
+On-failure capture of the last Playwright actions, DOM snapshots and network events
+
+While a test runs, every Playwright action (the methods of Tools/Tracing.py PLAYWRIGHT_ACTIONS),
+the DOM after navigations and clicks, and the requests, responses, console messages and page errors
+of the pages it touches go to an in-memory ring buffer of at most FAILURE_CAPTURE_EVENTS events
+and FAILURE_CAPTURE_MAX_BYTES bytes; the oldest events are dropped first. When the test fails, a
+screenshot and the final DOM are added and the buffer is written gzip-compressed to
+ARTIFACTS_DIR/failures/<test>.jsonl.gz; when it passes, the buffer is discarded. At most
+FAILURE_CAPTURE_MAX_DISK bytes are written per run (split evenly between the workers of a parallel run),
+later failures are only listed.
+
+Disabled with FAILURE_CAPTURE=0.
+
+    python -m Tools.FailureCapture .artifacts/failures/<test>.jsonl.gz --screenshot failure.jpg
+
+"""
+
+import argparse
+import base64
+import collections
+import functools
+import gzip
+import json
+import os
+import re
+import time
+
+import pytest
+
+from Data_and_Config.Configuration import *
+from Tools.Tracing import PLAYWRIGHT_ACTIONS, _action_target
+
+FAILURES_DIR = os.path.join(ARTIFACTS_DIR, "failures")
+SNAPSHOT_CATEGORIES = ("navigation", "click")  # actions followed by a DOM snapshot
+UNSAFE_CHARACTERS = re.compile(r"[^\w.-]+")
+
+
+# Events of one test, bounded by count and by the size of their JSON
+class RingBuffer:
+    def __init__(self, max_events=FAILURE_CAPTURE_EVENTS, max_bytes=FAILURE_CAPTURE_MAX_BYTES):
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.events = collections.deque()  # (size, json line)
+        self.size = 0
+        self.dropped = 0
+        self.origin = time.monotonic()
+
+    def add(self, kind, **data):
+        data = {"t": round(time.monotonic() - self.origin, 4), "kind": kind, **data}
+        line = json.dumps(data, ensure_ascii=False, default=str)
+        if len(line) > self.max_bytes // 4:
+            # One event may not take more than a quarter of the buffer (large DOM snapshots, screenshots)
+            for key, value in list(data.items()):
+                if isinstance(value, str) and len(value) > self.max_bytes // 8:
+                    data[key] = None if key == "jpeg" else value[: self.max_bytes // 8]
+                    data["truncated"] = True
+            line = json.dumps(data, ensure_ascii=False, default=str)
+        self.events.append((len(line), line))
+        self.size += len(line)
+        while self.events and (len(self.events) > self.max_events or self.size > self.max_bytes):
+            size, _ = self.events.popleft()
+            self.size -= size
+            self.dropped += 1
+
+    def lines(self):
+        return [line for _, line in self.events]
+
+
+class FailureCapture:
+    def __init__(self, directory=FAILURES_DIR, max_disk=FAILURE_CAPTURE_MAX_DISK // WORKER_COUNT):
+        self.directory = directory
+        self.max_disk = max_disk
+        self.buffer = None
+        self.test = None
+        self.pages = []  # pages of the current test, the last one is screenshotted on failure
+        self.listeners = []  # (page, event, handler)
+        self.written_bytes = 0
+        self.written = []  # (test, path)
+        self.skipped = []  # tests whose capture did not fit under max_disk
+
+    def begin(self, test):
+        self.buffer = RingBuffer()
+        self.test = test
+
+    def record(self, kind, **data):
+        if self.buffer is not None:
+            self.buffer.add(kind, **data)
+
+    # Starts listening to the network, console and errors of the page (once per test)
+    def watch(self, page):
+        if self.buffer is None or page in self.pages:
+            return
+        self.pages.append(page)
+        handlers = {
+            "request": lambda request: self.record(
+                "request", method=request.method, url=request.url, resource=request.resource_type
+            ),
+            "response": lambda response: self.record("response", status=response.status, url=response.url),
+            "requestfailed": lambda request: self.record("requestfailed", url=request.url, error=request.failure),
+            "console": lambda message: self.record("console", level=message.type, text=message.text),
+            "pageerror": lambda error: self.record("pageerror", error=str(error)),
+        }
+        for event, handler in handlers.items():
+            page.on(event, handler)
+            self.listeners.append((page, event, handler))
+
+    def snapshot(self, page, reason):
+        try:
+            self.record("dom", reason=reason, url=page.url, html=page.content())
+        except Exception as error:
+            self.record("dom", reason=reason, error=str(error).splitlines()[0])
+
+    # Screenshot and DOM of the last page, taken right after the failure (before the fixtures clean up)
+    def capture_failure(self):
+        if self.buffer is None or not self.pages:
+            return
+        page = self.pages[-1]
+        try:
+            image = page.screenshot(full_page=True, type="jpeg", quality=70, timeout=TIMEOUT_BROWSER)
+            self.record("screenshot", url=page.url, jpeg=base64.b64encode(image).decode("ascii"))
+        except Exception as error:
+            self.record("screenshot", error=str(error).splitlines()[0])
+        self.snapshot(page, "failure")
+
+    def path(self, test):
+        return os.path.join(self.directory, UNSAFE_CHARACTERS.sub("_", test).strip("_")[:150] + ".jsonl.gz")
+
+    # Writes the buffer of a failed test that used a page, discards any other; returns the path or None
+    def finish(self, failed):
+        buffer, test, pages = self.buffer, self.test, self.pages
+        for page, event, handler in self.listeners:
+            try:
+                page.remove_listener(event, handler)
+            except Exception:
+                pass
+        self.buffer, self.test, self.pages, self.listeners = None, None, [], []
+        if not failed or buffer is None or not pages:
+            return None
+
+        header = {"test": test, "events": len(buffer.events), "dropped": buffer.dropped, "bytes": buffer.size}
+        data = gzip.compress("\n".join([json.dumps(header)] + buffer.lines()).encode("utf-8") + b"\n")
+        if self.written_bytes + len(data) > self.max_disk:
+            self.skipped.append(test)
+            return None
+        path = self.path(test)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(data)
+        self.written_bytes += len(data)
+        self.written.append((test, path))
+        return path
+
+
+failure_capture = FailureCapture()
+
+
+def _page_of(api_object):
+    page = getattr(api_object, "page", None)  # Locator
+    return page if page is not None else api_object
+
+
+def _captured_method(method, class_name, category):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if failure_capture.buffer is None:
+            return method(self, *args, **kwargs)
+        page = _page_of(self) if class_name in ("Page", "Locator") else None
+        if page is not None:
+            failure_capture.watch(page)
+        event = {"name": f"{class_name}.{method.__name__}", "target": _action_target(self, args)}
+        started = time.monotonic()
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception as error:
+            event["error"] = str(error).splitlines()[0] if str(error) else type(error).__name__
+            raise
+        finally:
+            failure_capture.record("action", ms=round((time.monotonic() - started) * 1000), **event)
+        if page is not None and category in SNAPSHOT_CATEGORIES:
+            failure_capture.snapshot(page, event["name"])
+        return result
+
+    wrapper.__captured__ = True
+    return wrapper
+
+
+# Wraps the Playwright sync API methods listed in PLAYWRIGHT_ACTIONS (once per process)
+def instrument_playwright():
+    import playwright.sync_api as sync_api
+
+    for class_name, categories in PLAYWRIGHT_ACTIONS.items():
+        cls = getattr(sync_api, class_name)
+        for category, methods in categories.items():
+            for method_name in methods:
+                method = getattr(cls, method_name)
+                if not method.__dict__.get("__captured__", False):
+                    setattr(cls, method_name, _captured_method(method, class_name, category))
+
+
+# Plugin part (registered in conftest.py)
+
+
+class FailureCaptureRecorder:
+    def __init__(self, capture=failure_capture):
+        self.capture = capture
+        self.failed = False
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.capture.begin(item.nodeid)
+        self.failed = False
+        yield
+        self.capture.finish(self.failed)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        if report.when == "setup":
+            self.failed = False  # a retried test is judged by its last attempt
+        if report.failed and not self.failed:
+            self.failed = True
+            message = str(call.excinfo.value)[:2000] if call.excinfo else ""
+            self.capture.record("failure", phase=report.when, message=message)
+            self.capture.capture_failure()
+            if self.capture.pages:
+                report.sections.append(("Failure capture", self.capture.path(item.nodeid)))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.capture.written or self.capture.skipped:
+            terminalreporter.write_sep("-", "failure captures")
+            for test, path in self.capture.written:
+                terminalreporter.write_line(f"{test}: {path}")
+            for test in self.capture.skipped:
+                terminalreporter.write_line(f"{test}: not written, FAILURE_CAPTURE_MAX_DISK reached")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Timeline of a failure capture")
+    parser.add_argument("path")
+    parser.add_argument("--screenshot", default=None, help="write the failure screenshot to this JPEG file")
+    args = parser.parse_args(argv)
+
+    with gzip.open(args.path, "rt", encoding="utf-8") as file:
+        header, *events = [json.loads(line) for line in file if line.strip()]
+    print(f"{header['test']}: {header['events']} events ({header['dropped']} older ones dropped)")
+    for event in events:
+        details = {key: value for key, value in event.items() if key not in ("t", "kind", "html", "jpeg")}
+        size = f" [{len(event['html'])} chars of HTML]" if "html" in event else ""
+        print(f"{event['t']:>9.3f}s {event['kind']:<14} {json.dumps(details, ensure_ascii=False)[:160]}{size}")
+        if event["kind"] == "screenshot" and event.get("jpeg") and args.screenshot:
+            with open(args.screenshot, "wb") as out:
+                out.write(base64.b64decode(event["jpeg"]))
+            print(f"{'':>10} screenshot written to {args.screenshot}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,38 @@
+"""
+Exclusive lock of a file shared by parallel worker processes (flock, exclusive file creation on Windows)
+
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fcntl:
+        with open(path, "a+") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return
+    # Fallback: exclusive creation of the lock file
+    while True:
+        try:
+            handle = os.open(path + ".excl", os.O_CREAT | os.O_EXCL)
+            break
+        except FileExistsError:
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(handle)
+        os.remove(path + ".excl")
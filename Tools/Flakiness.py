@@ -0,0 +1,232 @@
+"""
+Flakiness tracker: failure signatures, targeted retries and a quarantine report
+
+Every attempt of every test is stored in ARTIFACTS_DIR/flakiness.sqlite with the signature of its
+failure: the exception type and the locator it waited for (or the normalized first line of the message),
+e.g. "TimeoutError @ [data-test=status_div]". A signature is known to be flaky for a test once the
+test failed with it and passed on the same code: a later attempt of the same run passed, or runs
+failing with it and passing interleave. A failure with a known-flaky signature of that test is retried
+right away, alone, at most FLAKY_RETRIES times; any other failure (e.g. a new regression of a test that
+used to pass) is reported at once.
+
+Tests whose flake rate over their recorded runs is above FLAKY_QUARANTINE_RATE are listed in the
+terminal summary and in ARTIFACTS_DIR/quarantine.json.
+
+    python -m Tools.Flakiness     # flake rate of every test with failures, known-flaky signatures
+
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+
+import pytest
+from _pytest.runner import runtestprotocol
+
+from Data_and_Config.Configuration import *
+
+FLAKINESS_DB = os.path.join(ARTIFACTS_DIR, "flakiness.sqlite")
+QUARANTINE_FILE = os.path.join(ARTIFACTS_DIR, "quarantine.json")
+FLAKINESS_KEEP = 200  # attempts kept per test
+
+LOCATOR_PATTERN = re.compile(r"""(?:locator|get_by_\w+)\((["'])(.*?)\1""")
+VOLATILE_PATTERN = re.compile(r"\d+|0x[0-9a-f]+|'[^']*'|\"[^\"]*\"")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    nodeid TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    attempt INTEGER NOT NULL,
+    outcome TEXT NOT NULL,
+    signature TEXT,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_nodeid ON attempts (nodeid);
+CREATE INDEX IF NOT EXISTS attempts_signature ON attempts (signature);
+"""
+
+
+# "TimeoutError @ [data-test=logout_button]" or "AssertionError: assert N == N"
+def failure_signature(report):
+    crash = getattr(report.longrepr, "reprcrash", None)
+    text = crash.message if crash else str(report.longrepr or "")
+    first_line = text.strip().splitlines()[0] if text.strip() else ""
+    exception, _, message = first_line.partition(": ")
+    exception = exception.rsplit(".", 1)[-1] if message else "Error"
+    locator = LOCATOR_PATTERN.search(text)
+    if locator:
+        return f"{exception} @ {locator.group(2)}"
+    return f"{exception}: {VOLATILE_PATTERN.sub('N', message or first_line)[:120]}"
+
+
+class FlakinessStore:
+    def __init__(self, path=FLAKINESS_DB):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Parallel workers write to the same file at the end of their runs
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.executescript(SCHEMA)
+
+    # attempts: [(nodeid, attempt, outcome, signature), ...]
+    def record(self, attempts, run_id=RUN_ID):
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO attempts VALUES (?, ?, ?, ?, ?, ?)",
+                [(nodeid, run_id, *attempt, now) for nodeid, *attempt in attempts],
+            )
+            self.connection.executemany(
+                "DELETE FROM attempts WHERE nodeid = ? AND rowid NOT IN "
+                "(SELECT rowid FROM attempts WHERE nodeid = ? ORDER BY rowid DESC LIMIT ?)",
+                [(nodeid, nodeid, FLAKINESS_KEEP) for nodeid in {attempt[0] for attempt in attempts}],
+            )
+
+    # {nodeid: {run_id: [(outcome, signature), ...]}} in the order of the attempts
+    def _runs(self):
+        runs = {}
+        for nodeid, run_id, outcome, signature in self.connection.execute(
+            "SELECT nodeid, run_id, outcome, signature FROM attempts WHERE outcome != 'skipped' ORDER BY rowid"
+        ):
+            runs.setdefault(nodeid, {}).setdefault(run_id, []).append((outcome, signature))
+        return runs
+
+    # {(nodeid, signature), ...} of failures that passed on the same code: a later attempt of the same run
+    # passed, or the test failed with the signature, passed in a later run and failed with it again
+    # (a regression fails from some run on and is not flaky, neither is a failure that a fix made pass)
+    def known_flaky(self, runs=None):
+        flaky = set()
+        for nodeid, test_runs in (runs or self._runs()).items():
+            failed, recovered = set(), set()  # signatures seen so far, and those a pass followed
+            for attempts in test_runs.values():
+                failed_in_run = set()
+                for outcome, signature in attempts:
+                    if outcome == "failed":
+                        if signature in recovered:
+                            flaky.add((nodeid, signature))
+                        failed.add(signature)
+                        failed_in_run.add(signature)
+                    else:
+                        flaky.update((nodeid, signature) for signature in failed_in_run)
+                        recovered |= failed
+        return flaky
+
+    # [(nodeid, runs, flaky runs, flake rate, signatures), ...] of tests with known-flaky failures
+    # A run is flaky when the test failed in it with one of its known-flaky signatures
+    def flake_rates(self):
+        runs = self._runs()
+        flaky_signatures = self.known_flaky(runs)
+        rows = []
+        for nodeid, test_runs in runs.items():
+            flaky = [
+                {signature for outcome, signature in attempts if (nodeid, signature) in flaky_signatures}
+                for attempts in test_runs.values()
+            ]
+            flaky = [signatures for signatures in flaky if signatures]
+            if flaky:
+                signatures = sorted(set().union(*flaky))
+                rows.append((nodeid, len(test_runs), len(flaky), len(flaky) / len(test_runs), signatures))
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    # Flaky tests above the threshold, with enough recorded runs to tell
+    def quarantine(self, rate=FLAKY_QUARANTINE_RATE, min_runs=FLAKY_MIN_RUNS):
+        return [row for row in self.flake_rates() if row[1] >= min_runs and row[3] > rate]
+
+    def close(self):
+        self.connection.close()
+
+
+# Plugin part (registered in conftest.py)
+
+
+class FlakinessTracker:
+    def __init__(self, retries=FLAKY_RETRIES):
+        self.retries = retries
+        self.store = None
+        self.flaky_signatures = set()
+        self.attempts = []
+        self.retried = []  # (nodeid, signature, attempts, final outcome)
+        self.quarantined = []
+
+    def pytest_sessionstart(self, session):
+        self.store = FlakinessStore()
+        self.flaky_signatures = self.store.known_flaky()
+
+    # Runs the test and retries it (alone, right away) while it fails with a known-flaky signature
+    # Only the reports of the last attempt are logged. tryfirst: the first protocol hook to return runs the test,
+    # another plugin's one (e.g. a rerun plugin) would otherwise bypass the retries
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        attempt = 0
+        first_signature = None
+        while True:
+            reports = runtestprotocol(item, nextitem=nextitem, log=False)
+            failure = next((report for report in reports if report.failed), None)
+            if failure:
+                signature = failure_signature(failure)
+                outcome = "failed"
+            else:
+                signature = None
+                outcome = "skipped" if any(report.skipped for report in reports) else "passed"
+            self.attempts.append((item.nodeid, attempt, outcome, signature))
+            first_signature = first_signature or signature
+
+            if not failure or attempt >= self.retries or (item.nodeid, signature) not in self.flaky_signatures:
+                break
+            attempt += 1
+
+        if attempt:
+            self.retried.append((item.nodeid, first_signature, attempt + 1, outcome))
+        for report in reports:
+            item.ihook.pytest_runtest_logreport(report=report)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        return True
+
+    # A run without attempts (--collect-only, nothing selected) leaves the store and quarantine.json alone
+    def pytest_sessionfinish(self, session):
+        if session.config.option.collectonly or not self.attempts:
+            return
+        self.store.record(self.attempts)
+        self.quarantined = self.store.quarantine()
+        report = [
+            {"nodeid": nodeid, "runs": runs, "flaky_runs": flaky, "rate": round(rate, 3), "signatures": signatures}
+            for nodeid, runs, flaky, rate, signatures in self.quarantined
+        ]
+        with open(QUARANTINE_FILE, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.retried:
+            terminalreporter.write_sep("-", "retried known-flaky failures")
+            for nodeid, signature, attempts, outcome in self.retried:
+                terminalreporter.write_line(f"{nodeid}: {outcome} after {attempts} attempts ({signature})")
+        if self.quarantined:
+            terminalreporter.write_sep("-", f"quarantine (flake rate > {FLAKY_QUARANTINE_RATE:.0%})")
+            for nodeid, runs, flaky, rate, signatures in self.quarantined:
+                terminalreporter.write_line(f"{rate:>6.1%} {nodeid} ({flaky}/{runs} runs): {', '.join(signatures)}")
+            terminalreporter.write_line(f"Quarantine report: {QUARANTINE_FILE}")
+        if self.store:
+            self.store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flake rates and known-flaky failure signatures")
+    parser.parse_args(argv)
+
+    store = FlakinessStore()
+    print(f"{'rate':>6} {'runs':>5}  test / signatures")
+    for nodeid, runs, flaky, rate, signatures in store.flake_rates():
+        print(f"{rate:>6.1%} {runs:>5}  {nodeid}")
+        for signature in signatures:
+            print(f"{'':>14}{signature}")
+    print(f"\nKnown-flaky signatures (retried up to {FLAKY_RETRIES} times):")
+    for nodeid, signature in sorted(store.known_flaky()):
+        print(f"  {nodeid}: {signature}")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,218 @@
+"""
+Schema-aware fuzzing of /regkurz/formsave.php
+
+Generates random valid payloads (Tools/RegistrationSchema.py), applies 1-3 field mutations (invalid
+values, wrong types, missing fields, huge strings, a switched person type...) and sends them
+concurrently. Responses are grouped by status and body signature; a response whose status differs
+from the schema's expectation is shrunk to a minimal reproducer: fields are reset to the canonical
+valid payload (or dropped) and strings cut down while the same unexpected response comes back.
+
+One reproducer per unexpected group is saved to ARTIFACTS_DIR/fuzz/corpus.jsonl and replayed
+first by every later run, so a known problem is checked with a handful of requests.
+
+    python -m Tools.Fuzzer --count 5000 --seed 1 --local-server
+    python -m Tools.Fuzzer --replay-only
+
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+
+from Data_and_Config.Configuration import *
+from Tools.Registration import send_payload_batch
+from Tools.RegistrationSchema import canonical_payload, expected_status, mutate, valid_payload
+
+FUZZ_DIR = os.path.join(ARTIFACTS_DIR, "fuzz")
+CORPUS_FILE = os.path.join(FUZZ_DIR, "corpus.jsonl")
+JSON_HEADERS = {"Content-Type": "application/json"}
+MAX_SHRINK_ROUNDS = 100
+SHRINK_CHARACTERS_BELOW = 16  # strings up to this length are shrunk character by character
+
+VOLATILE_PATTERN = re.compile(r"\d+")
+
+
+# Stable description of a response body: result/message of a JSON body, otherwise its beginning
+def body_signature(body):
+    try:
+        data = json.loads(body or "")
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        text = " ".join(str(data[key]) for key in ("result", "message", "error") if key in data)
+    else:
+        text = (body or "").strip()[:80]
+    return VOLATILE_PATTERN.sub("N", text) or "<empty>"
+
+
+class Outcome:
+    def __init__(self, payload, status, body):
+        self.payload = payload
+        self.status = status
+        self.signature = body_signature(body) if status is not None else "<no response>"
+        self.expected = expected_status(payload)
+
+    @property
+    def unexpected(self):
+        return self.status != self.expected
+
+    @property
+    def group(self):
+        return (self.status, self.signature, self.expected)
+
+
+# Sends the payloads concurrently, returns their Outcomes in the same order
+def send(payloads, concurrency=API_CONCURRENCY, url=URL_REGKURZ_FORM):
+    cases = [{"id": f"fuzz-{index}", "raw": payload} for index, payload in enumerate(payloads)]
+    results = send_payload_batch(cases, concurrency, url, JSON_HEADERS)
+    return [Outcome(result.payload, result.status, result.body) for result in results]
+
+
+def generate(count, seed):
+    rng = random.Random(seed)
+    return [mutate(valid_payload(rng), rng)[0] for _ in range(count)]
+
+
+# One-step simplifications of the payload towards the canonical valid payload
+def shrink_candidates(payload):
+    canonical = canonical_payload()
+    candidates = []
+    for field in sorted(set(payload) | set(canonical)):
+        value = payload.get(field)
+        if field not in canonical:
+            candidates.append({key: item for key, item in payload.items() if key != field})
+        elif field not in payload or value != canonical[field]:
+            candidates.append(dict(payload, **{field: canonical[field]}))
+        if isinstance(value, str) and len(value) > 1 and value != canonical.get(field):
+            # Halves of a long string, single characters dropped from a short one
+            half = len(value) // 2
+            parts = [value[:half], value[half:]]
+            if len(value) <= SHRINK_CHARACTERS_BELOW:
+                parts += [value[:index] + value[index + 1 :] for index in range(len(value))]
+            candidates.extend(dict(payload, **{field: part}) for part in parts)
+    return candidates
+
+
+# Greedy shrinking: every round sends all candidates at once and keeps the first one
+# that still gives the same unexpected response
+def shrink(outcome, send_batch=send):
+    current = outcome
+    for _ in range(MAX_SHRINK_ROUNDS):
+        candidates = shrink_candidates(current.payload)
+        if not candidates:
+            break
+        reproducing = [
+            candidate
+            for candidate in send_batch(candidates)
+            if candidate.unexpected and candidate.group == outcome.group
+        ]
+        if not reproducing:
+            break
+        current = reproducing[0]
+    return current
+
+
+def load_corpus(path=CORPUS_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def save_corpus(entries, path=CORPUS_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        for entry in entries:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def _entry(outcome):
+    return {
+        "payload": outcome.payload,
+        "expected_status": outcome.expected,
+        "status": outcome.status,
+        "signature": outcome.signature,
+    }
+
+
+# Replays the saved reproducers: (still reproducing entries, fixed entries)
+def replay(corpus, send_batch=send):
+    outcomes = send_batch([entry["payload"] for entry in corpus]) if corpus else []
+    still, fixed = [], []
+    for entry, outcome in zip(corpus, outcomes):
+        same = (outcome.status, outcome.signature) == (entry["status"], entry["signature"])
+        reproduces = outcome.unexpected and same
+        (still if reproduces else fixed).append(entry)
+    return still, fixed
+
+
+# Fuzzes `count` payloads: returns ({group: count}, [minimal reproducer Outcome per unexpected group])
+def fuzz(count, seed, send_batch=send):
+    outcomes = send_batch(generate(count, seed))
+    groups = {}
+    first_unexpected = {}
+    for outcome in outcomes:
+        groups[outcome.group] = groups.get(outcome.group, 0) + 1
+        if outcome.unexpected:
+            first_unexpected.setdefault(outcome.group, outcome)
+    reproducers = [shrink(outcome, send_batch) for outcome in first_unexpected.values()]
+    return groups, reproducers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Schema-aware fuzzing of formsave.php")
+    parser.add_argument("--count", type=int, default=1000, help="number of generated payloads")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the generator (random by default)")
+    parser.add_argument("--concurrency", type=int, default=API_CONCURRENCY)
+    parser.add_argument("--url", default=URL_REGKURZ_FORM)
+    parser.add_argument("--replay-only", action="store_true", help="only replay the saved corpus")
+    parser.add_argument("--local-server", action="store_true", help="run against an in-process stand-in server")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if args.local_server:
+        from Tools.StandInServer import StandInServer
+
+        server = StandInServer(port=0).start()
+        url = f"{server.url}/regkurz/formsave.php"
+
+    def send_batch(payloads):
+        return send(payloads, args.concurrency, url)
+
+    try:
+        corpus = load_corpus()
+        still, fixed = replay(corpus, send_batch)
+        print(f"Corpus: {len(still)} reproducers still failing, {len(fixed)} fixed")
+        for entry in still:
+            status = f"{entry['status']} (expected {entry['expected_status']})"
+            print(f"  {status} {entry['signature']}: {entry['payload']}")
+        corpus = still
+
+        if not args.replay_only:
+            seed = args.seed if args.seed is not None else random.randrange(2**32)
+            groups, reproducers = fuzz(args.count, seed, send_batch)
+            print(f"\n{args.count} payloads (seed {seed}), responses by status and body:")
+            for (status, signature, expected), count in sorted(groups.items(), key=lambda item: -item[1]):
+                flag = "  UNEXPECTED" if status != expected else ""
+                print(f"{count:>7}  {status} {signature} (expected {expected}){flag}")
+            known = {(entry["status"], entry["signature"], entry["expected_status"]) for entry in corpus}
+            for outcome in reproducers:
+                print(f"\nMinimal reproducer ({outcome.status}, expected {outcome.expected}): {outcome.payload}")
+                if outcome.group not in known:
+                    corpus.append(_entry(outcome))
+                    known.add(outcome.group)
+    finally:
+        if server:
+            server.stop()
+
+    save_corpus(corpus)
+    print(f"\nCorpus: {CORPUS_FILE} ({len(corpus)} reproducers)")
+    return 1 if corpus else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,145 @@
+"""
+Benchmark of the API clients on the registration case set
+
+Sends the cases of Data_and_Config/RegistrationCases.jsonl one after another, the way the API
+suites do, through a new Playwright APIRequestContext per round (the api_context fixture) and
+through a new PooledRequestContext per round (HTTP_CLIENT=pool, Tools/HttpPool.py). Reports the
+context setup time, the request latencies and the connection statistics of the pool.
+
+    python -m Tools.HttpBenchmark --rounds 20 --local-server
+    python -m Tools.HttpBenchmark --pool-size 1 --no-keep-alive
+
+"""
+
+import argparse
+import json
+import time
+
+from playwright.sync_api import sync_playwright
+
+from Data_and_Config.Configuration import *
+from Tools.HttpPool import PooledRequestContext
+from Tools.LoadTest import load_requests
+from Tools.Stats import percentile
+
+
+class ClientResult:
+    def __init__(self, name):
+        self.name = name
+        self.setup_ms = []
+        self.latencies_ms = []
+        self.round_ms = []
+        self.unexpected = 0
+        self.pool_stats = None
+
+    def report(self):
+        return {
+            "client": self.name,
+            "rounds": len(self.round_ms),
+            "requests": len(self.latencies_ms),
+            "unexpected": self.unexpected,
+            "setup_ms_p50": round(percentile(self.setup_ms, 0.5), 2),
+            "round_ms_p50": round(percentile(self.round_ms, 0.5), 2),
+            "latency_ms": {
+                "p50": round(percentile(self.latencies_ms, 0.5), 2),
+                "p95": round(percentile(self.latencies_ms, 0.95), 2),
+                "max": round(max(self.latencies_ms), 2),
+            },
+            "pool": self.pool_stats,
+        }
+
+
+# One round: creates the context, sends every case, disposes the context
+def run_round(result, new_context, requests, url):
+    started = time.perf_counter()
+    context = new_context()
+    result.setup_ms.append((time.perf_counter() - started) * 1000)
+    for case, payload in requests:
+        sent = time.perf_counter()
+        response = context.post(url, data=payload)
+        response.body()
+        result.latencies_ms.append((time.perf_counter() - sent) * 1000)
+        result.unexpected += response.status != case["expected_status"]
+    result.round_ms.append((time.perf_counter() - started) * 1000)
+    return context
+
+
+def benchmark(requests, rounds, url=URL_REGKURZ_FORM, pool_size=HTTP_POOL_SIZE, keep_alive=HTTP_KEEP_ALIVE):
+    playwright_result = ClientResult("playwright")
+    pool_result = ClientResult("pool")
+    pool_connections = []
+    with sync_playwright() as playwright:
+        # Rounds interleaved, so both clients see the same server and machine load
+        for _ in range(rounds):
+            context = run_round(playwright_result, playwright.request.new_context, requests, url)
+            context.dispose()
+            context = run_round(pool_result, lambda: PooledRequestContext(pool_size, keep_alive), requests, url)
+            pool_connections.append(context.stats())
+            context.dispose()
+
+    requests_total = sum(stats["requests"] for stats in pool_connections)
+    connections_total = sum(stats["connections"] for stats in pool_connections)
+    pool_result.pool_stats = {
+        "connections": connections_total,
+        "reuse_ratio": round((requests_total - connections_total) / requests_total, 3) if requests_total else 0.0,
+        "connect_ms_p50": round(
+            percentile([stats["connect_ms"]["p50"] for stats in pool_connections if stats["connect_ms"]], 0.5), 2
+        ),
+        "protocols": sorted({protocol for stats in pool_connections for protocol in stats["protocols"]}),
+    }
+    return [playwright_result.report(), pool_result.report()]
+
+
+def print_report(reports):
+    print(f"{'client':<12}{'setup p50':>11}{'round p50':>11}{'req p50':>10}{'req p95':>10}{'unexpected':>12}")
+    for report in reports:
+        latency = report["latency_ms"]
+        print(
+            f"{report['client']:<12}{report['setup_ms_p50']:>8.2f} ms{report['round_ms_p50']:>8.2f} ms"
+            f"{latency['p50']:>7.2f} ms{latency['p95']:>7.2f} ms{report['unexpected']:>12}"
+        )
+    baseline, pooled = reports
+    if pooled["round_ms_p50"]:
+        print(f"\nRound time: pool {baseline['round_ms_p50'] / pooled['round_ms_p50']:.2f}x faster than playwright")
+    pool = pooled["pool"]
+    print(
+        f"Pool: {pool['connections']} connections for {pooled['requests']} requests "
+        f"(reuse ratio {pool['reuse_ratio']:.1%}, connect p50 {pool['connect_ms_p50']} ms, "
+        f"{', '.join(pool['protocols'])})"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Playwright APIRequestContext vs pooled http.client on the cases")
+    parser.add_argument("--rounds", type=int, default=10, help="rounds over the whole case set per client")
+    parser.add_argument("--table", default="RegistrationCases.jsonl")
+    parser.add_argument("--url", default=URL_REGKURZ_FORM)
+    parser.add_argument("--pool-size", type=int, default=HTTP_POOL_SIZE)
+    parser.add_argument("--no-keep-alive", action="store_true", help="new connection for every pooled request")
+    parser.add_argument("--local-server", action="store_true", help="run against an in-process stand-in server")
+    parser.add_argument("--json", default=None, help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if args.local_server:
+        from Tools.StandInServer import StandInServer
+
+        server = StandInServer(port=0).start()
+        url = f"{server.url}/regkurz/formsave.php"
+
+    try:
+        reports = benchmark(load_requests(args.table), args.rounds, url, args.pool_size, not args.no_keep_alive)
+    finally:
+        if server:
+            server.stop()
+
+    print_report(reports)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(reports, file, indent=2)
+    return 1 if any(report["unexpected"] for report in reports) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
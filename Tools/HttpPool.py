@@ -0,0 +1,262 @@
+"""
+Pooled HTTP client for the API suites (HTTP_CLIENT=pool)
+
+PooledRequestContext offers the get/post/fetch/dispose part of Playwright's APIRequestContext on
+http.client connections: at most HTTP_POOL_SIZE persistent connections per origin, reused while the
+server keeps them alive (HTTP_KEEP_ALIVE=0 opens a new connection per request). A dict or list as
+`data` is sent as JSON like in Playwright; redirects are not followed.
+
+Every connection keeps its statistics: TCP connect time, TLS handshake time (https only), the
+negotiated protocol and the number of requests it served. stats() sums them up with the reuse
+ratio, i.e. the share of requests that did not open a new connection.
+
+HTTP/1.1 only: the standard library has no HTTP/2, and requests are not pipelined (POSTs are not
+idempotent and a pipelined failure cannot be attributed to one request).
+
+"""
+
+import http.client
+import json
+import queue
+import select
+import socket
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+from Data_and_Config.Configuration import *
+from Tools.Stats import percentile
+
+# Errors of a kept-alive connection the server has meanwhile closed
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# Methods sent again when the connection broke after the request was written (the server may have
+# processed it already: a repeated POST could register someone twice)
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"}
+
+
+# The server closed the connection before the request was written, it was not processed
+class _NotSent(Exception):
+    pass
+
+
+class ConnectionStats:
+    def __init__(self, origin):
+        self.origin = origin
+        self.connect_ms = None
+        self.tls_ms = None
+        self.protocol = "HTTP/1.1"
+        self.requests = 0
+
+
+class _TimedHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, host, port, stats, timeout):
+        super().__init__(host, port, timeout=timeout)
+        self.stats = stats
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stats.connect_ms = (time.perf_counter() - started) * 1000
+
+
+class _TimedHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, host, port, stats, timeout):
+        context = ssl.create_default_context()
+        context.set_alpn_protocols(["http/1.1"])
+        super().__init__(host, port, timeout=timeout, context=context)
+        self.stats = stats
+
+    # TCP connect and TLS handshake timed separately (no proxy tunnels)
+    def connect(self):
+        started = time.perf_counter()
+        http.client.HTTPConnection.connect(self)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connected = time.perf_counter()
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host)
+        self.stats.connect_ms = (connected - started) * 1000
+        self.stats.tls_ms = (time.perf_counter() - connected) * 1000
+        self.stats.protocol = f"HTTP/1.1 over {self.sock.version()}"
+
+
+# Response read completely from the connection, offers the parts of APIResponse the suites use
+class PooledResponse:
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    @property
+    def ok(self):
+        return 200 <= self.status <= 299
+
+    def body(self):
+        return self._body
+
+    def text(self):
+        return self._body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self._body)
+
+    def dispose(self):
+        pass
+
+
+# Persistent connections to one origin, at most `size` of them open at a time
+class ConnectionPool:
+    def __init__(self, scheme, host, port, size=HTTP_POOL_SIZE, keep_alive=HTTP_KEEP_ALIVE, timeout=30):
+        self.origin = f"{scheme}://{host}:{port}"
+        self.connection_class = _TimedHTTPSConnection if scheme == "https" else _TimedHTTPConnection
+        self.host = host
+        self.port = port
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = queue.LifoQueue()  # the most recently used connection is the least likely to be stale
+        self.lock = threading.Lock()
+        self.connections = []  # ConnectionStats of every connection ever opened
+
+    def _new_connection(self):
+        stats = ConnectionStats(self.origin)
+        with self.lock:
+            self.connections.append(stats)
+        return self.connection_class(self.host, self.port, stats, self.timeout)
+
+    # An idle connection is readable only when the server closed it (EOF) or sent something unasked,
+    # either way it cannot carry the next request (the check of urllib3's is_connection_dropped)
+    @staticmethod
+    def _is_dropped(connection):
+        if connection.sock is None:
+            return False  # closed by http.client itself, request() connects it again
+        try:
+            return bool(select.select([connection.sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    # Most recently used idle connection that is still open, None when there is none
+    def _idle_connection(self):
+        while True:
+            try:
+                connection = self.idle.get_nowait()
+            except queue.Empty:
+                return None
+            if not self._is_dropped(connection):
+                return connection
+            connection.close()
+
+    def _exchange(self, connection, method, path, body, headers, timeout):
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+        except (ConnectionResetError, BrokenPipeError) as error:
+            raise _NotSent() from error
+        response = connection.getresponse()
+        data = response.read()
+        connection.stats.requests += 1
+        return response, data
+
+    # timeout in milliseconds like in Playwright (None or 0: the pool's timeout)
+    def request(self, method, path, body=None, headers=None, timeout=None):
+        headers = dict(headers or {})
+        if not self.keep_alive:
+            headers.setdefault("Connection", "close")
+        timeout = timeout / 1000 if timeout else self.timeout
+        with self.slots:
+            connection = self._idle_connection()
+            try:
+                if connection is None:
+                    connection = self._new_connection()
+                    response, data = self._exchange(connection, method, path, body, headers, timeout)
+                else:
+                    try:
+                        response, data = self._exchange(connection, method, path, body, headers, timeout)
+                    except (_NotSent, *STALE_CONNECTION_ERRORS) as error:
+                        # The server closed the idle connection after the check above: retried on a new one
+                        # when the request was not written yet or can be repeated safely
+                        if not isinstance(error, _NotSent) and method.upper() not in IDEMPOTENT_METHODS:
+                            raise
+                        connection.close()
+                        connection = self._new_connection()
+                        response, data = self._exchange(connection, method, path, body, headers, timeout)
+            except _NotSent as error:
+                if connection is not None:
+                    connection.close()
+                raise error.__cause__
+            except BaseException:
+                if connection is not None:
+                    connection.close()
+                raise
+            if self.keep_alive and not response.will_close:
+                self.idle.put(connection)
+            else:
+                connection.close()
+        return response.status, dict(response.getheaders()), data
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class PooledRequestContext:
+    def __init__(self, size=HTTP_POOL_SIZE, keep_alive=HTTP_KEEP_ALIVE, timeout=30):
+        self.size = size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def _pool(self, parts):
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        with self.lock:
+            if key not in self.pools:
+                self.pools[key] = ConnectionPool(*key, self.size, self.keep_alive, self.timeout)
+            return self.pools[key]
+
+    def get(self, url, **kwargs):
+        return self.fetch(url, method="GET", **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.fetch(url, method="POST", **kwargs)
+
+    def fetch(self, url, method="GET", headers=None, data=None, timeout=None):
+        headers = dict(headers or {})
+        body = data
+        if isinstance(data, (dict, list)):
+            body = json.dumps(data).encode("utf-8")
+            if not any(name.lower() == "content-type" for name in headers):
+                headers["Content-Type"] = "application/json"
+        elif isinstance(data, str):
+            body = data.encode("utf-8")
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += f"?{parts.query}"
+        status, response_headers, response_body = self._pool(parts).request(method, path, body, headers, timeout)
+        return PooledResponse(url, status, response_headers, response_body)
+
+    def stats(self):
+        connections = [stats for pool in self.pools.values() for stats in pool.connections]
+        requests = sum(stats.requests for stats in connections)
+        connect = [stats.connect_ms for stats in connections if stats.connect_ms is not None]
+        tls = [stats.tls_ms for stats in connections if stats.tls_ms is not None]
+        return {
+            "connections": len(connections),
+            "requests": requests,
+            "reuse_ratio": round((requests - len(connections)) / requests, 3) if requests else 0.0,
+            "connect_ms": {"p50": round(percentile(connect, 0.5), 2), "max": round(max(connect), 2)} if connect else {},
+            "tls_ms": {"p50": round(percentile(tls, 0.5), 2), "max": round(max(tls), 2)} if tls else {},
+            "protocols": sorted({stats.protocol for stats in connections}),
+        }
+
+    def dispose(self):
+        for pool in self.pools.values():
+            pool.close()
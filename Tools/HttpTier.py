@@ -0,0 +1,205 @@
+"""
+HTTP execution tier for the server-side validation checks of the E2E suite
+
+Login, registration and forgot-password errors are rendered by the server into data-test elements,
+so these checks do not need a browser: HttpFormClient loads the form (session cookie, CSRF token),
+posts it like the browser would, follows the redirect and parses the data-test elements of the
+resulting page with html.parser. Checks that read the browser-native validationMessage stay in the
+browser.
+
+BrowserFormClient offers the same interface on a Playwright page. With --tier-equivalence every
+check runs through EquivalenceClient, which drives both tiers and fails when their pages differ.
+
+"""
+
+import re
+import urllib.error
+import urllib.request
+from html.parser import HTMLParser
+from http.cookiejar import CookieJar
+from urllib.parse import urlencode, urljoin
+
+from Data_and_Config.TestData import *
+from Data_and_Config.Configuration import *
+
+DATA_TEST_PATTERN = re.compile(r"""\[data-test=["']?([\w-]+)["']?\]""")
+FORM_FIELDS = ("input", "textarea", "select")
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+SNAPSHOT_SCRIPT = """() => Array.from(document.querySelectorAll('[data-test]'))
+    .filter(e => !['INPUT', 'TEXTAREA', 'SELECT'].includes(e.tagName))
+    .map(e => [e.getAttribute('data-test'), e.textContent.replace(/\\s+/g, ' ').trim()])"""
+
+
+def data_test_name(locator):
+    match = DATA_TEST_PATTERN.fullmatch(locator.strip())
+    if not match:
+        raise ValueError(f"Only [data-test=...] locators are supported by the HTTP tier: {locator}")
+    return match.group(1)
+
+
+def _normalize(text):
+    return " ".join(text.split())
+
+
+# Collects the title, the text of every data-test element and the hidden _token of the page
+class DataTestParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.token = None
+        self.elements = []  # [[data-test, text], ...] in document order
+        self.open = []  # [(tag, element or None), ...]
+        self.in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "title":
+            self.in_title = True
+        if tag == "input" and attrs.get("name") == "_token":
+            self.token = attrs.get("value")
+        element = None
+        if "data-test" in attrs and tag not in FORM_FIELDS:
+            element = [attrs["data-test"], ""]
+            self.elements.append(element)
+        if tag not in VOID_ELEMENTS:
+            self.open.append((tag, element))
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self.in_title = False
+        for index in range(len(self.open) - 1, -1, -1):
+            if self.open[index][0] == tag:
+                del self.open[index:]
+                break
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title += data
+        for _, element in self.open:
+            if element is not None:
+                element[1] += data
+
+    def snapshot(self):
+        return [(name, _normalize(text)) for name, text in self.elements]
+
+
+class HttpFormClient:
+    def __init__(self, base_url=URL_BASE, timeout=TIMEOUT_BROWSER / 1000):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        self.url = None
+        self.status = None
+        self.document = None
+
+    def _request(self, url, data=None):
+        request = urllib.request.Request(urljoin(self.base_url, url), data=data)
+        try:
+            response = self.opener.open(request, timeout=self.timeout)
+        except urllib.error.HTTPError as error:
+            response = error
+        with response:
+            body = response.read().decode("utf-8", errors="replace")
+            self.url, self.status = response.geturl(), response.status
+        self.document = DataTestParser()
+        self.document.feed(body)
+        self.document.close()
+        return self
+
+    def open(self, url):
+        return self._request(url)
+
+    # Loads the form page (unless already there) and posts the fields with its CSRF token
+    def submit(self, form_url, **fields):
+        if self.url != urljoin(self.base_url, form_url):
+            self.open(form_url)
+        data = urlencode({"_token": self.document.token or "", **fields}).encode("utf-8")
+        return self._request(form_url, data)
+
+    @property
+    def title(self):
+        return _normalize(self.document.title)
+
+    # Text of the first element of the locator, None when the page has no such element
+    def text(self, locator):
+        name = data_test_name(locator)
+        return next((text for element, text in self.document.snapshot() if element == name), None)
+
+    def snapshot(self):
+        return self.document.snapshot()
+
+    def is_logged_in(self):
+        return self.text(LOCATOR_LOGOUT_BUTTON) == TEXT_LOGOUT_BUTTON
+
+
+class BrowserFormClient:
+    def __init__(self, page):
+        self.page = page
+
+    def open(self, url):
+        self.page.goto(url)
+        return self
+
+    def submit(self, form_url, **fields):
+        if self.page.url != form_url:
+            self.page.goto(form_url)
+        for name, value in fields.items():
+            self.page.fill(f"form [name={name}]", value)
+        with self.page.expect_navigation():
+            self.page.click("form [type=submit]")
+        return self
+
+    @property
+    def title(self):
+        return _normalize(self.page.title())
+
+    def text(self, locator):
+        element = self.page.locator(locator)
+        return _normalize(element.first.text_content()) if element.count() else None
+
+    def snapshot(self):
+        return [tuple(item) for item in self.page.evaluate(SNAPSHOT_SCRIPT)]
+
+    def is_logged_in(self):
+        return self.text(LOCATOR_LOGOUT_BUTTON) == TEXT_LOGOUT_BUTTON
+
+
+class TierMismatch(AssertionError):
+    pass
+
+
+# Drives the HTTP and the browser tier side by side and compares every page they end up on
+class EquivalenceClient:
+    def __init__(self, http, browser):
+        self.http = http
+        self.browser = browser
+
+    def _compare(self):
+        http, browser = (self.http.title, self.http.snapshot()), (self.browser.title, self.browser.snapshot())
+        if http != browser:
+            raise TierMismatch(f"HTTP and browser tiers disagree\nHTTP:    {http}\nbrowser: {browser}")
+        return self
+
+    def open(self, url):
+        self.http.open(url)
+        self.browser.open(url)
+        return self._compare()
+
+    def submit(self, form_url, **fields):
+        self.http.submit(form_url, **fields)
+        self.browser.submit(form_url, **fields)
+        return self._compare()
+
+    @property
+    def title(self):
+        return self.http.title
+
+    def text(self, locator):
+        return self.http.text(locator)
+
+    def snapshot(self):
+        return self.http.snapshot()
+
+    def is_logged_in(self):
+        return self.http.is_logged_in()
@@ -0,0 +1,172 @@
+"""
+Pre-generated pool of test identities (Czech name, unique email, password)
+
+Identities are generated in large batches with one Faker("cs_CZ") and stored in a memory-mapped file
+of fixed-width records (ARTIFACTS_DIR/identities/batch-<id>.bin), so handing one out is O(1) and no
+test pays for Faker. A shared cursor file, protected by a file lock, is advanced in blocks: every
+process (parallel worker, later run) claims its own block of records, so an identity is never handed
+out twice. Emails contain the batch id, so different batches never collide either.
+
+    python -m Tools.Identity --count 50000     # pre-generate a batch (otherwise done on first use)
+
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from Data_and_Config.Configuration import *
+from Tools.FileLock import file_lock
+
+IDENTITY_DIR = os.path.join(ARTIFACTS_DIR, "identities")
+CURSOR_FILE = os.path.join(IDENTITY_DIR, "cursor.json")
+LOCK_FILE = os.path.join(IDENTITY_DIR, "cursor.lock")
+
+MAGIC = b"IDP1"
+HEADER = struct.Struct("<4s8sI")  # magic, batch id, record count
+COLUMNS = (("name", 48), ("email", 96), ("password", 32))  # fixed widths in bytes (UTF-8, zero padded)
+RECORD_SIZE = sum(width for _, width in COLUMNS)
+
+
+class Identity:
+    __slots__ = ("name", "email", "password")
+
+    def __init__(self, name, email, password):
+        self.name = name
+        self.email = email
+        self.password = password
+
+    def __repr__(self):
+        return f"Identity({self.name!r}, {self.email!r})"
+
+
+def _batch_path(batch_id):
+    return os.path.join(IDENTITY_DIR, f"batch-{batch_id}.bin")
+
+
+def _fits(value, width):
+    return len(value.encode("utf-8")) <= width and value.isprintable()
+
+
+def generate_batch(count=IDENTITY_BATCH_SIZE):
+    from faker import Faker
+
+    fake = Faker("cs_CZ")
+    batch_id = os.urandom(4).hex()
+    os.makedirs(IDENTITY_DIR, exist_ok=True)
+    path = _batch_path(batch_id)
+    with open(path + ".tmp", "wb") as file:
+        file.write(HEADER.pack(MAGIC, batch_id.encode("ascii"), count))
+        for index in range(count):
+            name = fake.first_name()
+            local_part = fake.user_name()
+            if not local_part.isascii():
+                local_part = "user"
+            email = f"{local_part}.{batch_id}n{index}@{fake.free_email_domain()}"
+            password = fake.password(length=10, special_chars=True, digits=True, upper_case=True, lower_case=True)
+            for (_, width), value in zip(COLUMNS, (name if _fits(name, 48) else "Jana", email, password)):
+                file.write(value.encode("utf-8").ljust(width, b"\0"))
+    os.replace(path + ".tmp", path)
+    return batch_id
+
+
+# Used-up batches except the previous one (other processes may still read it)
+def _remove_batches(keep):
+    for name in os.listdir(IDENTITY_DIR):
+        if name.startswith("batch-") and name.endswith(".bin") and name[6:-4] not in keep:
+            os.remove(os.path.join(IDENTITY_DIR, name))
+
+
+# Atomically reserves `size` records: returns (batch id, first index, end index)
+# A new batch is generated when the current one is used up
+def claim_block(size=IDENTITY_BLOCK_SIZE):
+    with file_lock(LOCK_FILE):
+        cursor = {"batch": None, "next": 0, "count": 0}
+        if os.path.exists(CURSOR_FILE):
+            with open(CURSOR_FILE, encoding="utf-8") as file:
+                cursor = json.load(file)
+        if cursor["batch"] is None or cursor["next"] >= cursor["count"]:
+            count = max(IDENTITY_BATCH_SIZE, size)
+            previous = cursor["batch"]
+            cursor = {"batch": generate_batch(count), "next": 0, "count": count}
+            _remove_batches(keep=(previous, cursor["batch"]))
+        start = cursor["next"]
+        end = min(start + size, cursor["count"])
+        cursor["next"] = end
+        with open(CURSOR_FILE + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(cursor, file)
+        os.replace(CURSOR_FILE + ".tmp", CURSOR_FILE)
+    return cursor["batch"], start, end
+
+
+class IdentityPool:
+    def __init__(self, block_size=IDENTITY_BLOCK_SIZE):
+        self.block_size = block_size
+        self.maps = {}
+        self.batch = None
+        self.position = 0
+        self.end = 0
+        self.lock = threading.Lock()  # the account factory thread takes identities too
+
+    def _map(self, batch_id):
+        if batch_id not in self.maps:
+            with open(_batch_path(batch_id), "rb") as file:
+                self.maps[batch_id] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.maps[batch_id]
+
+    def _read(self, batch_id, index):
+        data = self._map(batch_id)
+        offset = HEADER.size + index * RECORD_SIZE
+        values = []
+        for _, width in COLUMNS:
+            values.append(data[offset : offset + width].rstrip(b"\0").decode("utf-8"))
+            offset += width
+        return Identity(*values)
+
+    # Next never-used identity
+    def next(self):
+        with self.lock:
+            if self.position >= self.end:
+                self.batch, self.position, self.end = claim_block(self.block_size)
+            identity = self._read(self.batch, self.position)
+            self.position += 1
+        return identity
+
+    def close(self):
+        for data in self.maps.values():
+            data.close()
+        self.maps.clear()
+
+
+_pool = None
+
+
+# Pool shared by all tests of this process
+def get_identity_pool():
+    global _pool
+    if _pool is None:
+        _pool = IdentityPool()
+    return _pool
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate a batch of test identities")
+    parser.add_argument("--count", type=int, default=IDENTITY_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    with file_lock(LOCK_FILE):
+        batch_id = generate_batch(args.count)
+        with open(CURSOR_FILE + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({"batch": batch_id, "next": 0, "count": args.count}, file)
+        os.replace(CURSOR_FILE + ".tmp", CURSOR_FILE)
+    print(f"Generated {args.count} identities (batch {batch_id}) in {time.monotonic() - started:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
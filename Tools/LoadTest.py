@@ -0,0 +1,188 @@
+"""
+Load test of /regkurz/formsave.php with the registration case table
+
+Replays the valid and invalid cases of Data_and_Config/RegistrationCases.jsonl for a set duration,
+either at a target request rate (open loop, --rps) or with a fixed number of concurrent clients
+(closed loop, --concurrency only), and reports throughput, latency percentiles, a latency histogram
+and the error rate per expected status.
+
+    python -m Tools.LoadTest --rps 200 --duration 10 --local-server
+    python -m Tools.LoadTest --concurrency 20 --duration 30
+
+In open-loop mode the latency is measured from the scheduled send time, so a saturated client
+or server shows up as latency instead of a silently lower request rate.
+
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from playwright.async_api import async_playwright
+
+from Data_and_Config.Configuration import *
+from Tools.CaseTable import case_fields, load_case_table
+from Tools.Registration import build_registration_payload
+from Tools.Stats import format_histogram, percentile
+
+
+# (case, payload) pairs of all cases that pass the fyz/pra preconditions
+def load_requests(table="RegistrationCases.jsonl"):
+    requests = []
+    for case in load_case_table(table):
+        try:
+            requests.append((case, build_registration_payload(**case_fields(case))))
+        except AssertionError:
+            continue
+    return requests
+
+
+class LoadResult:
+    def __init__(self):
+        self.samples = []  # (expected_status, status, latency_ms)
+        self.started = None
+        self.finished = None
+
+    def add(self, expected_status, status, latency_ms):
+        self.samples.append((expected_status, status, latency_ms))
+
+    @property
+    def elapsed(self):
+        return self.finished - self.started
+
+    def report(self):
+        latencies = [latency for _, _, latency in self.samples]
+        by_status = {}
+        for expected, status, _ in self.samples:
+            bucket = by_status.setdefault(str(expected), {"requests": 0, "unexpected": 0})
+            bucket["requests"] += 1
+            bucket["unexpected"] += status != expected
+        for bucket in by_status.values():
+            bucket["error_rate"] = round(bucket["unexpected"] / bucket["requests"], 4)
+        return {
+            "requests": len(self.samples),
+            "duration_s": round(self.elapsed, 3),
+            "throughput_rps": round(len(self.samples) / self.elapsed, 1) if self.elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.50), 2),
+                "p95": round(percentile(latencies, 0.95), 2),
+                "p99": round(percentile(latencies, 0.99), 2),
+                "max": round(max(latencies), 2),
+            }
+            if latencies
+            else {},
+            "by_expected_status": by_status,
+        }
+
+
+async def _send(request_context, url, case, payload, result, scheduled):
+    try:
+        response = await request_context.post(url, data=payload)
+        status = response.status
+        await response.dispose()
+    except Exception:
+        status = None
+    result.add(case["expected_status"], status, (time.monotonic() - scheduled) * 1000)
+
+
+async def run_load(requests, duration, rps=None, concurrency=API_CONCURRENCY, url=URL_REGKURZ_FORM):
+    result = LoadResult()
+    async with async_playwright() as playwright:
+        request_context = await playwright.request.new_context()
+        result.started = time.monotonic()
+        deadline = result.started + duration
+
+        if rps:
+            # Open loop: request i is due at started + i / rps, at most `concurrency` in flight
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def scheduled_send(case, payload, due):
+                async with semaphore:
+                    await _send(request_context, url, case, payload, result, due)
+
+            tasks = []
+            index = 0
+            while True:
+                due = result.started + index / rps
+                if due >= deadline:
+                    break
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                case, payload = requests[index % len(requests)]
+                tasks.append(asyncio.create_task(scheduled_send(case, payload, due)))
+                index += 1
+            await asyncio.gather(*tasks)
+        else:
+            # Closed loop: `concurrency` clients send back to back until the deadline
+            async def client(offset):
+                index = offset
+                while time.monotonic() < deadline:
+                    case, payload = requests[index % len(requests)]
+                    await _send(request_context, url, case, payload, result, time.monotonic())
+                    index += concurrency
+
+            await asyncio.gather(*(client(offset) for offset in range(concurrency)))
+
+        result.finished = time.monotonic()
+        await request_context.dispose()
+    return result
+
+
+def print_report(result):
+    report = result.report()
+    print(f"Requests:   {report['requests']} in {report['duration_s']} s")
+    print(f"Throughput: {report['throughput_rps']} req/s")
+    latency = report["latency_ms"]
+    if latency:
+        print(
+            f"Latency:    p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+            f"p99 {latency['p99']} ms, max {latency['max']} ms"
+        )
+    for expected, bucket in sorted(report["by_expected_status"].items()):
+        print(
+            f"Expected {expected}: {bucket['requests']} requests, "
+            f"{bucket['unexpected']} unexpected ({bucket['error_rate']:.2%})"
+        )
+    print("Latency histogram:")
+    for line in format_histogram([latency for _, _, latency in result.samples]):
+        print(line)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test of formsave.php with the registration cases")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--rps", type=float, default=None, help="target request rate (open loop)")
+    parser.add_argument("--concurrency", type=int, default=API_CONCURRENCY, help="concurrent requests/clients")
+    parser.add_argument("--table", default="RegistrationCases.jsonl")
+    parser.add_argument("--url", default=URL_REGKURZ_FORM)
+    parser.add_argument("--local-server", action="store_true", help="run against an in-process stand-in server")
+    parser.add_argument("--json", default=None, help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    requests = load_requests(args.table)
+    server = None
+    url = args.url
+    if args.local_server:
+        from Tools.StandInServer import StandInServer
+
+        server = StandInServer(port=0).start()
+        url = f"{server.url}/regkurz/formsave.php"
+
+    try:
+        result = asyncio.run(run_load(requests, args.duration, args.rps, args.concurrency, url))
+    finally:
+        if server:
+            server.stop()
+
+    report = print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,167 @@
+"""
+Process-parallel test runner
+
+Spreads the collected tests over N pytest worker processes and merges their JUnit reports:
+
+    python -m Tools.ParallelRunner -n 4 courses_e2e_test.py [-- extra pytest args]
+
+Every worker runs its own pytest (and therefore its own browser) with WORKER_ID/WORKER_COUNT
+and a shared RUN_ID in the environment. Generated identities come from the shared identity pool,
+which hands out disjoint blocks to every process (Tools/Identity.py).
+Tests are assigned longest first by their historical durations (Tools/Timings.py) and the predicted
+and actual wall-clock times are reported. Tests marked shared_account use fixed accounts of the
+tested site and all run on worker 0, one after another. With LOCAL_SERVER=1 every worker gets its
+own stand-in server port.
+
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from Data_and_Config.Configuration import *
+from Tools.Timings import TimingStore, estimate, schedule_longest_first
+
+PARALLEL_DIR = os.path.join(ARTIFACTS_DIR, "parallel")
+
+
+# Plugin part (loaded into the collecting pytest with -p Tools.ParallelRunner)
+
+
+def pytest_addoption(parser):
+    parser.addoption("--collection-dump", default=None, help=argparse.SUPPRESS)
+
+
+def pytest_collection_finish(session):
+    path = session.config.getoption("collection_dump")
+    if not path:
+        return
+    items = [
+        {"nodeid": item.nodeid, "markers": sorted({marker.name for marker in item.iter_markers()})}
+        for item in session.items
+    ]
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(items, file)
+
+
+# Runner part
+
+
+def collect(pytest_args):
+    os.makedirs(PARALLEL_DIR, exist_ok=True)
+    dump = os.path.join(PARALLEL_DIR, "collection.json")
+    command = [sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "Tools.ParallelRunner"]
+    command += [f"--collection-dump={dump}", *pytest_args]
+    result = subprocess.run(command, cwd=PROJECT_DIR, capture_output=True, text=True)
+    if result.returncode not in (0, 5):
+        sys.stdout.write(result.stdout + result.stderr)
+        raise SystemExit(result.returncode)
+    with open(dump, encoding="utf-8") as file:
+        return json.load(file)
+
+
+# Tests using fixed accounts go to worker 0, the rest longest first onto the least loaded worker
+# Returns (shards, predicted load of every worker in seconds)
+def assign(items, workers, store=None):
+    nodeids = [item["nodeid"] for item in items]
+    store = store or TimingStore()
+    estimates = estimate(nodeids, store.samples())
+    pinned = [item["nodeid"] for item in items if "shared_account" in item["markers"]]
+    free = [nodeid for nodeid in nodeids if nodeid not in set(pinned)]
+    return schedule_longest_first(free, workers, estimates, pinned)
+
+
+# Test paths are replaced by the worker's node ids, options are passed through
+def worker_options(pytest_args):
+    return [arg for arg in pytest_args if not os.path.exists(os.path.join(PROJECT_DIR, arg.split("::")[0]))]
+
+
+def start_worker(index, workers, nodeids, pytest_args, run_id):
+    report = os.path.join(PARALLEL_DIR, f"worker-{index}.xml")
+    log = open(os.path.join(PARALLEL_DIR, f"worker-{index}.log"), "w", encoding="utf-8")
+    env = dict(os.environ, WORKER_ID=str(index), WORKER_COUNT=str(workers), RUN_ID=run_id)
+    if LOCAL_SERVER:
+        env["LOCAL_SERVER_PORT"] = str(LOCAL_SERVER_PORT + index)
+    command = [sys.executable, "-m", "pytest", "-q", f"--junitxml={report}", *worker_options(pytest_args), *nodeids]
+    process = subprocess.Popen(command, cwd=PROJECT_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return process, report, log
+
+
+def merge_reports(reports, output):
+    merged = ET.Element("testsuites")
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    for report in reports:
+        if not os.path.exists(report):
+            continue
+        root = ET.parse(report).getroot()
+        suites = [root] if root.tag == "testsuite" else list(root)
+        for suite in suites:
+            merged.append(suite)
+            for key in totals:
+                totals[key] += int(suite.get(key, 0))
+    for key, value in totals.items():
+        merged.set(key, str(value))
+    ET.ElementTree(merged).write(output, encoding="utf-8", xml_declaration=True)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the test suites in parallel worker processes")
+    parser.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--junitxml", default=os.path.join(PARALLEL_DIR, "report.xml"), help="merged report")
+    parser.add_argument("pytest_args", nargs="*", help="test paths and pytest options (after --)")
+    args = parser.parse_args(argv)
+
+    items = collect(args.pytest_args)
+    workers = max(1, min(args.workers, len(items)))
+    store = TimingStore()
+    shards, loads = assign(items, workers, store)
+    overhead = store.startup()
+    predicted = max(loads) + overhead
+    run_id = os.environ.get("RUN_ID") or RUN_ID
+
+    print(f"Running {len(items)} tests on {workers} workers (run {run_id}), predicted {predicted:.1f} s")
+    started = time.monotonic()
+    running = {
+        index: start_worker(index, workers, nodeids, args.pytest_args, run_id)
+        for index, nodeids in enumerate(shards)
+        if nodeids
+    }
+    finished = {}
+    exit_code = 0
+    while len(finished) < len(running):
+        for index, (process, _, log) in running.items():
+            if index not in finished and process.poll() is not None:
+                finished[index] = time.monotonic() - started
+                exit_code = max(exit_code, process.returncode)
+                log.close()
+        time.sleep(0.05)
+    elapsed = time.monotonic() - started
+
+    for index in sorted(running):
+        print(
+            f"worker {index}: {len(shards[index])} tests, "
+            f"predicted {loads[index] + overhead:.1f} s, actual {finished[index]:.1f} s"
+        )
+    print(f"Makespan: predicted {predicted:.1f} s, actual {elapsed:.1f} s (worker start-up {overhead:.1f} s)")
+    # Start-up of a worker: its wall-clock time minus the durations its tests recorded
+    durations = store.run_durations(run_id)
+    startup = [finished[index] - sum(durations.get(nodeid, 0.0) for nodeid in shards[index]) for index in running]
+    store.record_run(run_id, workers, len(items), predicted, elapsed, max(0.0, min(startup)))
+    store.close()
+
+    totals = merge_reports([report for _, report, _ in running.values()], args.junitxml)
+    print(
+        f"{totals['tests']} tests, {totals['failures']} failures, {totals['errors']} errors, "
+        f"{totals['skipped']} skipped in {elapsed:.2f} s"
+    )
+    print(f"Merged report: {args.junitxml} (worker logs in {PARALLEL_DIR})")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
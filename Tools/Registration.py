@@ -0,0 +1,211 @@
+"""
+Course registration payloads and concurrent batch sending to /regkurz/formsave.php
+
+The batches are sent by one async Playwright driver and request context in an event loop thread of its own,
+started by the first batch and shared by all later ones (close_batch_sender() stops it, at the latest at exit).
+Like the per-case tests, every request goes through the record/replay cassette and the exchange log.
+
+"""
+
+import asyncio
+import atexit
+import threading
+
+from playwright.async_api import async_playwright
+
+from Data_and_Config.Configuration import *
+from Tools.Cassette import CassetteMiss, async_cassette_context
+from Tools.CaseTable import case_fields
+from Tools.ExchangeLog import exchange_log
+
+
+# Builds the formsave.php payload from the form inputs
+# and checks the person type preconditions (fyz needs address, pra needs ico)
+def build_registration_payload(course, name, surname, email, phone, person, count, comment, consent, **kwargs):
+
+    if person == "fyz":
+        address = kwargs.get("address")
+        if not address:
+            raise AssertionError("The 'address' field is required for a fyz person.")
+    elif person == "pra":
+        ico = kwargs.get("ico")
+        if not ico:
+            raise AssertionError("The 'ico' field is required for a pra person.")
+    else:
+        raise AssertionError("The 'person' value must be either 'fyz' or 'pra'.")
+
+    payload = {
+        "targetid": "",
+        "kurz": course,
+        "name": name,
+        "surname": surname,
+        "email": email,
+        "phone": phone,
+        "person": person,
+        "count": count,
+        "comment": comment,
+        "souhlas": consent,
+    }
+
+    if person == "fyz":
+        payload["address"] = address
+    if person == "pra":
+        payload["ico"] = ico
+
+    return payload
+
+
+class BatchResult:
+    def __init__(self, case, payload=None, status=None, body=None, error=None):
+        self.case = case
+        self.payload = payload
+        self.status = status
+        self.body = body
+        self.error = error
+        self.exchange = None  # Tools/ExchangeLog.py record of the request, for the assertion message
+
+    @property
+    def expected_status(self):
+        return self.case.get("expected_status")
+
+    @property
+    def expected_error(self):
+        return self.case.get("expected_error")
+
+    @property
+    def ok(self):
+        if self.expected_error is not None:
+            return self.error == self.expected_error
+        return self.error is None and self.status == self.expected_status
+
+    def __repr__(self):
+        return f"BatchResult(id={self.case.get('id')!r}, status={self.status}, error={self.error!r})"
+
+
+class _BatchSender:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+        self.playwright = None
+        self.request_context = None
+
+    def _start(self):
+        with self.lock:
+            if self.loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="registration-batch", daemon=True)
+            thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._open(), loop).result()
+            except BaseException:
+                self._stop_loop(loop, thread)
+                raise
+            self.loop, self.thread = loop, thread
+            atexit.register(self.close)
+
+    async def _open(self):
+        self.playwright = await async_playwright().start()
+        try:
+            self.request_context = async_cassette_context(await self.playwright.request.new_context())
+        except BaseException:
+            await self.playwright.stop()
+            raise
+
+    async def _close(self):
+        try:
+            await self.request_context.dispose()
+        finally:
+            await self.playwright.stop()
+
+    @staticmethod
+    def _stop_loop(loop, thread):
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    async def _send(self, results, concurrency, url, headers):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(result):
+            async with semaphore:
+                # A failed request (timeout, reset connection, missing cassette entry) fails its own case only
+                try:
+                    response = await self.request_context.post(url, data=result.payload, headers=headers)
+                except CassetteMiss as error:
+                    result.error = str(error)
+                    return
+                except Exception as error:
+                    result.error = f"{type(error).__name__}: {error}"
+                    return
+                result.status = response.status
+                result.body = response.text()
+                result.exchange = exchange_log.record("POST", url, result.payload, response)
+
+        await asyncio.gather(*(send(result) for result in results if result.error is None))
+        return results
+
+    def send(self, results, concurrency, url, headers):
+        self._start()
+        return asyncio.run_coroutine_threadsafe(self._send(results, concurrency, url, headers), self.loop).result()
+
+    def close(self):
+        with self.lock:
+            loop, thread, self.loop = self.loop, self.thread, None
+            if loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._close(), loop).result()
+            finally:
+                self._stop_loop(loop, thread)
+                atexit.unregister(self.close)
+
+
+_batch_sender = _BatchSender()
+
+
+# Stops the driver of the batches (a later batch starts a new one)
+def close_batch_sender():
+    _batch_sender.close()
+
+
+# Sends all registration cases concurrently (at most `concurrency` requests in flight)
+# Each case is a dict of send_registration arguments plus "expected_status" (or "expected_error"
+# for a failing fyz/pra precondition) and an optional "id", e.g. a row of a case table.
+# The event loop runs in its own thread, so this also works while a sync Playwright runtime is active.
+# A case whose request failed (or whose response is missing from a replay-mode cassette) gets the error
+# instead of a status, the other cases of the batch are still sent.
+def send_registration_batch(cases, concurrency=API_CONCURRENCY, url=URL_REGKURZ_FORM):
+    results = []
+    for case in cases:
+        try:
+            results.append(BatchResult(case, build_registration_payload(**case_fields(case))))
+        except AssertionError as error:
+            results.append(BatchResult(case, error=str(error)))
+    return _batch_sender.send(results, concurrency, url, None)
+
+
+# Same as send_registration_batch for cases that already hold the raw formsave.php payload
+# (the "raw" request body of a case wins over its payload fields)
+def send_payload_batch(cases, concurrency=API_CONCURRENCY, url=URL_REGKURZ_FORM, headers=None):
+    results = [BatchResult(case, case["raw"] if "raw" in case else case_fields(case)) for case in cases]
+    return _batch_sender.send(results, concurrency, url, headers)
+
+
+# Per-case status assertion over a whole batch, reports all mismatches at once
+def assert_batch(results):
+    failures = []
+    for result in results:
+        if result.ok:
+            continue
+        case_id = result.case.get("id", result.payload)
+        if result.expected_error is not None:
+            failures.append(f"{case_id}: {result.error} != {result.expected_error}")
+        elif result.error is not None:
+            failures.append(f"{case_id}: Expected {result.expected_status}, the request failed: {result.error}")
+        else:
+            failures.append(
+                result.exchange.render(f"{case_id}: Expected {result.expected_status}, got {result.status}")
+            )
+    assert not failures, "\n".join(failures)
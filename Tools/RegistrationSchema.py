@@ -0,0 +1,194 @@
+"""
+Schema of the /regkurz/formsave.php payload: field rules, the expected verdict and field mutations
+
+The rules model the server: a course 1-3, required name and surname (at most 255 characters), a valid
+email and a phone of 9-12 digits, person "fyz" with an address or "pra" with an 8-digit ICO, a positive
+count, a comment without HTML and the consent flag. expected_status() is the oracle of the fuzzer
+(Tools/Fuzzer.py) and of the pairwise table, and validation_error() validates the payloads of the
+stand-in server (Tools/StandInServer.py).
+
+Only part of them is confirmed by the suites' cases against testovani.kitner.cz: course "2" is accepted
+and an empty one rejected, phones 608123123 and +420608123123 are accepted while 12345, 608ABC123 and
+123456789012345 are rejected, an email without "@" or domain and an empty surname are rejected, a
+100-character surname is accepted, pra needs an ICO (25596641 is accepted), fyz an address, and a
+<script> comment is rejected. The rest is ASSUMED, not checked against the real form: courses "1" and
+"3", the exact 9-12 digit range and spaces in phones, the 8-digit ICO, consent values other than true,
+the count rule, "<"/">" anywhere in a comment and the 255-character surname limit. Results that depend
+on them are trusted on the stand-in server only.
+
+"""
+
+import re
+
+# Values and limits marked "assumed" are not confirmed against the remote host (see above)
+COURSES = ("1", "2", "3")  # "2" confirmed, "1" and "3" assumed
+PERSON_TYPES = ("fyz", "pra")
+CONSENT_VALUES = (True, "true", "1", "on")  # True confirmed, the others assumed
+SURNAME_MAX_LENGTH = 255  # assumed
+
+RE_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+RE_PHONE = re.compile(r"^\+?\d{9,12}$")  # 9-12 digits assumed
+RE_ICO = re.compile(r"^\d{8}$")  # assumed
+RE_HTML_TAG = re.compile(r"[<>]")  # <script> confirmed, any "<" or ">" assumed
+
+STATUS_VALID = 200
+STATUS_INVALID = 500
+
+# Marker of a mutation that removes the field from the payload
+MISSING = object()
+
+# Valid values every generated payload is built from
+VALID_VALUES = {
+    "targetid": ("",),
+    "kurz": COURSES,
+    "name": ("Jan", "Jana", "Zdeněk", "Ann-Marie"),
+    "surname": ("Novak", "Novakščěšíů", "O'Brien", "N" * SURNAME_MAX_LENGTH),
+    "email": ("jan.novak@abc.cz", "j+tag@sub.example.com", "x@y.io"),
+    "phone": ("608123123", "+420608123123", "608 123 123"),
+    "count": ("1", "2", "25"),
+    "comment": (None, "", "Prosím o fakturu.", "Příliš žluťoučký kůň"),
+    "souhlas": CONSENT_VALUES,
+    "address": ("Brno", "Dlouhá 12, 110 00 Praha 1"),
+    "ico": ("25596641", "00000001"),
+}
+
+# Values that break the field (plus the generic ones below)
+INVALID_VALUES = {
+    "kurz": ("0", "4", "-1", "abc", "1.0", 2.5),
+    "name": ("",),
+    "surname": ("", "N" * (SURNAME_MAX_LENGTH + 1)),
+    "email": ("emailwithoutatsign", "a@b", "a b@c.cz", "@abc.cz", "jan@.cz."),
+    "phone": ("abcdefghi", "60812312", "6081231231234", "+42O608123123", "608-123-123"),
+    "person": ("", "FYZ", "firma", 1),
+    "count": ("0", "-1", "1.5", "abc", "", " 1"),
+    "comment": ("<script>alert(1)</script>", "a > b", "<b>"),
+    "souhlas": (False, "false", "0", "", None),
+    "address": ("",),
+    "ico": ("2559664", "255966410", "2559664a", ""),
+}
+
+# Type and size mutations applied to any field
+GENERIC_VALUES = (
+    MISSING, None, 0, [], {}, True, " ", "x" * 10000, "'; DROP TABLE users; --", "\u0000", "\U0001F600"
+)
+
+
+# Expected status of formsave.php for the payload (200 valid, 500 rejected)
+def expected_status(payload):
+    return STATUS_VALID if validation_error(payload) is None else STATUS_INVALID
+
+
+# Scalars are compared as text, a missing value as an empty string
+def _text(value):
+    return "" if value is None else str(value)
+
+
+# Rules of the single fields, a missing field is checked as None
+def _valid_kurz(value):
+    return _text(value) in COURSES
+
+
+def _valid_surname(value):
+    return bool(value) and len(_text(value)) <= SURNAME_MAX_LENGTH
+
+
+def _valid_email(value):
+    return RE_EMAIL.match(_text(value)) is not None
+
+
+def _valid_phone(value):
+    return RE_PHONE.match(_text(value).replace(" ", "")) is not None
+
+
+def _valid_count(value):
+    count = _text(value)
+    return count.isdigit() and int(count) >= 1
+
+
+def _valid_comment(value):
+    return value is None or not RE_HTML_TAG.search(_text(value))
+
+
+def _valid_consent(value):
+    return value in CONSENT_VALUES
+
+
+# The rules in the order the server checks them; "person" also checks address or ico (person_error)
+RULES = (
+    ("kurz", _valid_kurz),
+    ("name", bool),
+    ("surname", _valid_surname),
+    ("email", _valid_email),
+    ("phone", _valid_phone),
+    ("person", None),
+    ("count", _valid_count),
+    ("comment", _valid_comment),
+    ("souhlas", _valid_consent),
+)
+
+
+# fyz needs an address, pra an 8-digit ico: the violated rule or None
+def person_error(person, address, ico):
+    if person == "fyz":
+        return None if address else "address"
+    if person == "pra":
+        return None if RE_ICO.match(_text(ico)) else "ico"
+    return "person"
+
+
+# First violated rule of the payload (None for a valid one)
+def validation_error(payload):
+    if not isinstance(payload, dict):
+        return "payload"
+    for field, rule in RULES:
+        if rule is None:
+            error = person_error(payload.get("person"), payload.get("address"), payload.get("ico"))
+            if error:
+                return error
+        elif not rule(payload.get(field)):
+            return field
+    return None
+
+
+# Smallest valid payload, the target of the shrinking
+def canonical_payload():
+    payload = {field: values[0] for field, values in VALID_VALUES.items() if field != "ico"}
+    payload["person"] = "fyz"
+    return payload
+
+
+# Random valid payload: the person type decides whether address or ico is sent
+def valid_payload(rng):
+    payload = {
+        field: rng.choice(values) for field, values in VALID_VALUES.items() if field not in ("address", "ico")
+    }
+    payload["person"] = rng.choice(PERSON_TYPES)
+    extra = "address" if payload["person"] == "fyz" else "ico"
+    payload[extra] = rng.choice(VALID_VALUES[extra])
+    return payload
+
+
+# Candidate values of one field: invalid ones first, then generic type/size mutations
+def field_mutations(field):
+    return INVALID_VALUES.get(field, ()) + GENERIC_VALUES
+
+
+# Applies 1..max_mutations random mutations (a switch of the person type is one of them)
+# Returns (payload, [(field, value), ...])
+def mutate(payload, rng, max_mutations=3):
+    mutated = dict(payload)
+    applied = []
+    for _ in range(rng.randint(1, max_mutations)):
+        if rng.random() < 0.1:
+            person = "pra" if mutated.get("person") == "fyz" else "fyz"
+            mutated["person"] = person
+            applied.append(("person", person))
+            continue
+        field = rng.choice(sorted(set(VALID_VALUES) | {"person"}))
+        value = rng.choice(field_mutations(field))
+        if value is MISSING:
+            mutated.pop(field, None)
+        else:
+            mutated[field] = value
+        applied.append((field, value))
+    return mutated, applied
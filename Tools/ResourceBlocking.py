@@ -0,0 +1,147 @@
+"""
+Network resource blocking profile for E2E page loads
+
+The assertions only look at data-test elements and titles, so images, fonts, media and third-party
+hosts (analytics, CDNs...) are aborted before they are downloaded. Only matching requests are routed
+through Python: the patterns are regexes evaluated by the Playwright driver.
+
+A test that needs a blocked resource allows it with a marker (resource types or host names):
+
+    @pytest.mark.allow_resources("image", "fonts.googleapis.com")
+
+Benchmark of the profile (page-load time and bytes transferred with and without it):
+
+    python -m Tools.ResourceBlocking --runs 10 --local-server
+
+"""
+
+import argparse
+import re
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from Data_and_Config.Configuration import *
+
+STUB_CONTENT_TYPES = {"stylesheet": "text/css", "script": "application/javascript"}
+
+# File extensions of the blocked resource types (used for the driver-side URL pattern)
+RESOURCE_EXTENSIONS = {
+    "image": ("png", "jpg", "jpeg", "gif", "svg", "webp", "avif", "ico", "bmp"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "media": ("mp4", "webm", "ogg", "mp3", "wav", "m4a"),
+    "stylesheet": ("css",),
+}
+
+
+class ResourceBlocker:
+    def __init__(self, block_types=BLOCKED_RESOURCE_TYPES, stub_types=(), first_party=(URL_BASE,)):
+        self.block_types = set(block_types) | set(stub_types)
+        self.stub_types = set(stub_types)
+        self.first_party = {urlsplit(url).netloc for url in first_party}
+        self.allowed = set()
+        self.blocked = 0
+        self.stubbed = 0
+
+        extensions = [ext for kind in sorted(self.block_types) for ext in RESOURCE_EXTENSIONS.get(kind, ())]
+        hosts = "|".join(re.escape(host) for host in sorted(self.first_party))
+        self.patterns = [re.compile(rf"^https?://(?!(?:{hosts})(?:/|$))")]
+        if extensions:
+            self.patterns.append(re.compile(rf"\.(?:{'|'.join(extensions)})(?:[?#].*)?$", re.IGNORECASE))
+
+    def install(self, context):
+        for pattern in self.patterns:
+            context.route(pattern, self.handle)
+
+    # Per-test allow-list of resource types and host names (from the allow_resources marker)
+    def allow(self, *entries):
+        self.allowed = set(entries)
+
+    def handle(self, route):
+        request = route.request
+        host = urlsplit(request.url).netloc
+        kind = request.resource_type
+        third_party = host not in self.first_party
+
+        if kind in self.allowed or host in self.allowed:
+            return route.continue_()
+        if kind in self.stub_types:
+            self.stubbed += 1
+            return route.fulfill(status=200, body="", content_type=STUB_CONTENT_TYPES.get(kind, "text/plain"))
+        if third_party or kind in self.block_types:
+            self.blocked += 1
+            return route.abort("blockedbyclient")
+        # First-party request matched only by its extension but of another type (e.g. a fetch of an .svg)
+        return route.continue_()
+
+
+# Benchmark
+
+
+def _load(browser, url, blocker):
+    context = browser.new_context()
+    if blocker:
+        blocker.install(context)
+    page = context.new_page()
+    transferred = []
+    page.on("requestfinished", lambda request: transferred.append(request.sizes()))
+    started = time.monotonic()
+    page.goto(url, wait_until="load")
+    elapsed = time.monotonic() - started
+    context.close()
+    size = sum(item["responseBodySize"] + item["responseHeadersSize"] for item in transferred)
+    return elapsed * 1000, size, len(transferred)
+
+
+def benchmark(url=URL_COURSES, runs=10, browser_name="chromium"):
+    from playwright.sync_api import sync_playwright
+
+    results = {}
+    with sync_playwright() as playwright:
+        browser = getattr(playwright, browser_name).launch()
+        for label, blocker in (("full", None), ("profile", ResourceBlocker(first_party=(url,)))):
+            samples = [_load(browser, url, blocker) for _ in range(runs)]
+            results[label] = {
+                "load_ms": statistics.median(sample[0] for sample in samples),
+                "bytes": statistics.median(sample[1] for sample in samples),
+                "requests": statistics.median(sample[2] for sample in samples),
+            }
+        browser.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Page-load benchmark with and without the resource blocking profile")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--url", default=URL_COURSES)
+    parser.add_argument("--browser", default="chromium")
+    parser.add_argument("--local-server", action="store_true", help="load the page from an in-process stand-in server")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if args.local_server:
+        from Tools.StandInServer import StandInServer
+
+        server = StandInServer(port=0).start()
+        url = f"{server.url}/courses"
+    try:
+        results = benchmark(url, args.runs, args.browser)
+    finally:
+        if server:
+            server.stop()
+
+    print(f"{'':<8} {'load ms':>9} {'bytes':>9} {'requests':>9}   (median of {args.runs} loads of {url})")
+    for label, result in results.items():
+        print(f"{label:<8} {result['load_ms']:>9.1f} {result['bytes']:>9.0f} {result['requests']:>9.0f}")
+    full, profile = results["full"], results["profile"]
+    if full["load_ms"]:
+        print(
+            f"Savings: {100 * (1 - profile['load_ms'] / full['load_ms']):.1f} % load time, "
+            f"{full['bytes'] - profile['bytes']:.0f} bytes per page"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,243 @@
+"""
+Resource governor of long E2E runs: RSS watchdog of the Playwright driver and browser processes
+
+After every test that used the context pool, the resident memory of the Playwright driver that runs
+the pool's browser and of its descendants (the browser processes) is read from /proc. Other drivers
+and browsers of the test process (account factory, async scenario runner) are not counted, recycling
+the pool could not free them. Above MEMORY_RECYCLE_MB the idle contexts of the pool are replaced; if
+the memory is still above MEMORY_RESTART_MB, the browser is restarted. After either action the
+governor only samples for MEMORY_COOLDOWN_TESTS tests, and a restart that freed less than a tenth of
+the memory disables further restarts. Independently of memory, a pooled context is closed after
+CONTEXT_MAX_USES tests (Tools/ContextPool.py).
+
+Every sample goes to ARTIFACTS_DIR/memory/worker-<id>.jsonl (new file every run) and to the rss_mb
+property of the test in the JUnit report; the terminal summary shows the growth over the second half
+of the run, which should stay close to zero in soak runs. Without /proc (not Linux) only the
+per-context limit applies, as for a remote browser (connect_options). Disabled with RESOURCE_GOVERNOR=0.
+
+    python -m Tools.ResourceGovernor .artifacts/memory/worker-0.jsonl
+
+"""
+
+import argparse
+import json
+import os
+import time
+
+import pytest
+
+from Data_and_Config.Configuration import *
+from Tools.Stats import slope
+
+MEMORY_DIR = os.path.join(ARTIFACTS_DIR, "memory")
+MB = 1024 * 1024
+
+
+def _parents():
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as file:
+                stat = file.read()
+        except OSError:
+            continue  # process ended meanwhile
+        # Fields after the command name (which may contain spaces): state, ppid, ...
+        parents[int(entry)] = int(stat.rsplit(")", 1)[1].split()[1])
+    return parents
+
+
+def _rss(pid):
+    try:
+        with open(f"/proc/{pid}/statm", encoding="utf-8") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+# RSS in bytes of the test process ("harness"), the driver process and its descendants ("browser")
+# None without /proc
+def process_rss(driver):
+    if not os.path.isdir("/proc/self"):
+        return None
+    children = {}
+    for pid, parent in _parents().items():
+        children.setdefault(parent, []).append(pid)
+
+    rss = {"harness": _rss(os.getpid()), "driver": _rss(driver), "browser": 0}
+    pending = list(children.get(driver, []))
+    while pending:
+        pid = pending.pop()
+        rss["browser"] += _rss(pid)
+        pending.extend(children.get(pid, []))
+    return rss
+
+
+# Pid of the local Playwright driver that runs the browser, None for a connected remote browser
+def driver_pid(browser):
+    try:
+        return browser._impl_obj._connection._transport._proc.pid
+    except AttributeError:
+        return None
+
+
+def pool_rss(pool):
+    driver = driver_pid(pool.browser)
+    return process_rss(driver) if driver else None
+
+
+# Growth in MB per 100 tests over the second half of the timeline (the first one includes the warm-up)
+def growth_per_100_tests(timeline):
+    values = [entry["rss_mb"] for entry in timeline[len(timeline) // 2 :] if entry.get("rss_mb") is not None]
+    growth = slope(values)
+    return None if growth is None else growth * 100
+
+
+class ResourceGovernor:
+    def __init__(
+        self,
+        recycle_mb=MEMORY_RECYCLE_MB,
+        restart_mb=MEMORY_RESTART_MB,
+        cooldown=MEMORY_COOLDOWN_TESTS,
+        path=None,
+        sampler=pool_rss,
+    ):
+        self.recycle_mb = recycle_mb
+        self.restart_mb = restart_mb
+        self.cooldown = cooldown
+        self.path = path or os.path.join(MEMORY_DIR, f"worker-{WORKER_ID}.jsonl")
+        self.sampler = sampler
+        self.pool = None
+        self.timeline = []
+        self.recycles = 0
+        self.last_action = None  # index in the timeline of the last recycle or restart
+        self.restarts_help = True  # False once a restart freed (almost) nothing
+        self.origin = time.monotonic()
+        self.file = None
+
+    # Governs the context pool of the session (called by the context_pool fixture)
+    def attach(self, pool):
+        self.pool = pool
+
+    def detach(self):
+        self.pool = None
+
+    def _rss_mb(self):
+        rss = self.sampler(self.pool)
+        if rss is None:
+            return None, None
+        return rss, round((rss["driver"] + rss["browser"]) / MB, 1)
+
+    # Samples the memory after a test and recycles contexts or restarts the browser when it is too high
+    def after_test(self, test):
+        rss, rss_mb = self._rss_mb()
+        action = None
+        cooling_down = self.last_action is not None and len(self.timeline) - self.last_action < self.cooldown
+        if rss_mb is not None and rss_mb >= self.recycle_mb and not cooling_down:
+            self.pool.recycle()
+            self.recycles += 1
+            self.last_action = len(self.timeline)
+            action = "recycle"
+            rss, rss_mb = self._rss_mb()
+            if rss_mb >= self.restart_mb and self.restarts_help:
+                before = rss_mb
+                self.pool.restart_browser()
+                action = "restart"
+                rss, rss_mb = self._rss_mb()
+                if rss_mb is not None and rss_mb > 0.9 * before:
+                    self.restarts_help = False
+
+        entry = {
+            "t": round(time.monotonic() - self.origin, 2),
+            "test": test,
+            "rss_mb": rss_mb,
+            **{f"{group}_mb": round(value / MB, 1) for group, value in (rss or {}).items()},
+            "contexts": self.pool.created,
+            "retired": self.pool.retired,
+            "action": action,
+        }
+        self.timeline.append(entry)
+        self._write(entry)
+        return entry
+
+    def _write(self, entry):
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.file = open(self.path, "w", encoding="utf-8")
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    # Plugin part (registered in conftest.py)
+
+    # After the fixtures of the test are torn down; not after the last test (the pool is closed by then)
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item, nextitem):
+        yield
+        if self.pool is not None and nextitem is not None and "context_pool" in item.fixturenames:
+            entry = self.after_test(item.nodeid)
+            if entry["rss_mb"] is not None:
+                item.user_properties.append(("rss_mb", entry["rss_mb"]))
+
+    def pytest_sessionfinish(self, session):
+        self.close()
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.timeline:
+            return
+        terminalreporter.write_sep("-", "browser memory")
+        last = self.timeline[-1]
+        restarts = sum(entry["action"] == "restart" for entry in self.timeline)
+        samples = [entry["rss_mb"] for entry in self.timeline if entry["rss_mb"] is not None]
+        if samples:
+            growth = growth_per_100_tests(self.timeline)
+            trend = f", {growth:+.1f} MB per 100 tests in the second half" if growth is not None else ""
+            terminalreporter.write_line(
+                f"Driver + browser RSS {samples[0]:.0f} -> {samples[-1]:.0f} MB (peak {max(samples):.0f} MB) "
+                f"over {len(self.timeline)} tests{trend}"
+            )
+        terminalreporter.write_line(
+            f"{last['contexts']} contexts created, {last['retired']} retired, "
+            f"{self.recycles} memory recycles, {restarts} browser restarts; timeline: {self.path}"
+        )
+        if not self.restarts_help:
+            terminalreporter.write_line("A browser restart freed less than 10 % of the memory, no further restarts")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory timeline of an E2E run")
+    parser.add_argument("path", nargs="?", default=os.path.join(MEMORY_DIR, f"worker-{WORKER_ID}.jsonl"))
+    parser.add_argument("--width", type=int, default=50, help="width of the bars")
+    args = parser.parse_args(argv)
+
+    with open(args.path, encoding="utf-8") as file:
+        timeline = [json.loads(line) for line in file if line.strip()]
+    samples = [entry["rss_mb"] for entry in timeline if entry["rss_mb"] is not None]
+    if not samples:
+        print(f"{len(timeline)} tests, no memory samples (no /proc)")
+        return 0
+
+    # One line per bucket of tests: mean RSS as a bar, actions taken in the bucket
+    largest = max(samples)
+    step = max(1, len(timeline) // 40)
+    for start in range(0, len(timeline), step):
+        bucket = [entry for entry in timeline[start : start + step] if entry["rss_mb"] is not None]
+        if not bucket:
+            continue
+        mean = sum(entry["rss_mb"] for entry in bucket) / len(bucket)
+        actions = ", ".join(sorted({entry["action"] for entry in bucket if entry["action"]}))
+        bar = "#" * max(1, round(args.width * mean / largest))
+        print(f"{start + 1:>6} {mean:>8.1f} MB {bar} {actions}")
+    growth = growth_per_100_tests(timeline)
+    trend = f", {growth:+.1f} MB per 100 tests in the second half" if growth is not None else ""
+    print(f"\n{len(timeline)} tests, peak {largest:.1f} MB{trend}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
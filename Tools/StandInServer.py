@@ -0,0 +1,449 @@
+"""
+Local in-process stand-in for testovani.kitner.cz
+
+Emulates /courses, /home, /login, /register, /forgot-password, /logout and /regkurz/formsave.php
+with the same data-test locators, titles and validation messages the suites assert on. formsave.php
+validates with the rules of Tools/RegistrationSchema.py, some of which are assumed (see there).
+
+Run standalone:  python -m Tools.StandInServer [--port 8765]
+Use from pytest: LOCAL_SERVER=1 python -m pytest
+
+"""
+
+import argparse
+import html
+import json
+import secrets
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from Data_and_Config.TestData import *
+from Data_and_Config.Configuration import LOCAL_SERVER_HOST, LOCAL_SERVER_PORT
+from Tools.RegistrationSchema import COURSES, RE_EMAIL, validation_error
+
+SESSION_COOKIE = "laravel_session"
+
+TITLE_LOGIN = "Testování - Přihlášení"
+TITLE_REGISTER = "Testování - Registrace"
+TITLE_HOME = "Testování - Domů"
+
+ERROR_EMAIL_INVALID = "The email field must be a valid email address."
+ERROR_PASSWORD_MIN = "The password field must be at least 8 characters."
+ERROR_CSRF = "CSRF token mismatch."
+
+# Accounts that exist on the real host and are used by the E2E suite
+SEED_USERS = {
+    USER1_EMAIL: {"name": "Novák", "password": USER1_PASSWORD},
+    "janca.tester@seznam.cz": {"name": "Janča", "password": "janca.tester"},
+    "rostislavjelinek@example.com": {"name": "Rostislav", "password": "rostislav123"},
+}
+
+# Names of the courses of the registration schema, in its order
+COURSE_NAMES = dict(zip(COURSES, ("Základy testování", "Automatizace testů v Pythonu", "Testování API")))
+
+# Message returned with status 500 for the first violated rule of Tools/RegistrationSchema.py
+RULE_ERRORS = {
+    "payload": "Invalid JSON",
+    "kurz": "Course is required",
+    "name": "Name is required",
+    "surname": "Surname is required",
+    "email": "Invalid email",
+    "phone": "Invalid phone",
+    "address": "Address is required",
+    "ico": "Invalid ICO",
+    "person": "Invalid person type",
+    "count": "Invalid count",
+    "comment": "Comment contains HTML",
+    "souhlas": "Consent is required",
+}
+
+STYLESHEET = b"body{font-family:sans-serif;margin:2rem}header{display:flex;gap:1rem}.error{color:#b00}"
+LOGO = (
+    b'<svg xmlns="http://www.w3.org/2000/svg" width="120" height="32">'
+    b'<text x="0" y="24" font-size="24">Testovani</text></svg>'
+)
+
+
+# Validation rules of /regkurz/formsave.php (the ones of Tools/RegistrationSchema.py)
+# Returns None for a valid payload or the error message returned with status 500
+
+
+def validate_registration(payload):
+    rule = validation_error(payload)
+    if rule == "surname" and payload.get("surname"):
+        return "Surname is too long"
+    return RULE_ERRORS[rule] if rule else None
+
+
+# HTML rendering
+
+
+def _render_errors(errors, field):
+    if field not in errors:
+        return ""
+    return f'<span class="error" data-test="{field}_input_errors">{html.escape(errors[field])}</span>'
+
+
+def _render_page(title, session, body):
+    token = html.escape(session["token"])
+    if session["user"]:
+        auth = (
+            '<form method="post" action="/logout">'
+            f'<input type="hidden" name="_token" value="{token}">'
+            f'<button type="submit" data-test="logout_button">{TEXT_LOGOUT_BUTTON}</button>'
+            "</form>"
+        )
+    else:
+        auth = f'<a href="/login" data-test="login_link">{TEXT_LOGIN_LINK}</a>'
+    return (
+        "<!DOCTYPE html>\n"
+        '<html lang="cs"><head><meta charset="utf-8">'
+        f'<meta name="csrf-token" content="{token}">'
+        f"<title>{html.escape(title)}</title>"
+        '<link rel="stylesheet" href="/css/app.css"></head>'
+        f'<body><header><a href="/courses"><img src="/img/logo.svg" alt="logo"></a>{auth}</header>'
+        f"<main>{body}</main></body></html>"
+    )
+
+
+def _render_courses(session, flash):
+    items = "".join(f"<li>{html.escape(name)}</li>" for name in COURSE_NAMES.values())
+    return _render_page(TITLE_COURSES, session, f"<h1>Přehled kurzů</h1><ul>{items}</ul>")
+
+
+def _render_home(session, flash):
+    welcome = WELCOME_USER.format(fake_name=session["name"])
+    return _render_page(TITLE_HOME, session, f'<section data-test="home_section">{html.escape(welcome)}</section>')
+
+
+def _render_login(session, flash):
+    errors = flash.get("errors", {})
+    old = flash.get("old", {})
+    body = (
+        '<form method="post" action="/login">'
+        f'<input type="hidden" name="_token" value="{html.escape(session["token"])}">'
+        f'<input type="email" name="email" data-test="email_input" value="{html.escape(old.get("email", ""))}">'
+        f"{_render_errors(errors, 'email')}"
+        '<input type="password" name="password" data-test="password_input">'
+        f"{_render_errors(errors, 'password')}"
+        '<button type="submit" data-test="login_button">Přihlásit</button>'
+        "</form>"
+        '<a href="/register" data-test="register_link">Registrovat</a>'
+        '<a href="/forgot-password" data-test="forgot_password_link">Zapomenuté heslo</a>'
+    )
+    return _render_page(TITLE_LOGIN, session, body)
+
+
+def _render_register(session, flash):
+    errors = flash.get("errors", {})
+    old = flash.get("old", {})
+    body = (
+        '<form method="post" action="/register">'
+        f'<input type="hidden" name="_token" value="{html.escape(session["token"])}">'
+        f'<input type="text" name="name" data-test="name_input" value="{html.escape(old.get("name", ""))}">'
+        f"{_render_errors(errors, 'name')}"
+        f'<input type="email" name="email" data-test="email_input" value="{html.escape(old.get("email", ""))}">'
+        f"{_render_errors(errors, 'email')}"
+        '<input type="password" name="password" data-test="password_input">'
+        f"{_render_errors(errors, 'password')}"
+        '<input type="password" name="password_confirmation" data-test="password_again_input">'
+        '<button type="submit" data-test="register_button">Registrovat</button>'
+        "</form>"
+        '<a href="/forgot-password" data-test="forgot_password_link">Zapomenuté heslo</a>'
+    )
+    return _render_page(TITLE_REGISTER, session, body)
+
+
+def _render_forgot_password(session, flash):
+    errors = flash.get("errors", {})
+    old = flash.get("old", {})
+    status = ""
+    if "status" in flash:
+        status = f'<div data-test="status_div">{html.escape(flash["status"])}</div>'
+    body = (
+        f"{status}"
+        '<form method="post" action="/forgot-password">'
+        f'<input type="hidden" name="_token" value="{html.escape(session["token"])}">'
+        f'<input type="email" name="email" data-test="email_input" value="{html.escape(old.get("email", ""))}">'
+        f"{_render_errors(errors, 'email')}"
+        '<button type="submit" data-test="submit_button">Odeslat odkaz</button>'
+        "</form>"
+    )
+    return _render_page(TITLE_FORGOT_PASSWORD, session, body)
+
+
+# Server state shared by all handler threads
+
+
+class _State:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.users = {email: dict(data) for email, data in SEED_USERS.items()}
+        self.registrations = []
+
+    def reset(self):
+        with self.lock:
+            self.sessions.clear()
+            self.users = {email: dict(data) for email, data in SEED_USERS.items()}
+            self.registrations.clear()
+
+
+STATE = _State()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "StandIn/1.0"
+    # Headers and body are written separately: without TCP_NODELAY every response on a kept-alive
+    # connection waits for the client's delayed ACK (about 40 ms)
+    disable_nagle_algorithm = True
+
+    state = STATE
+
+    def log_message(self, format, *args):
+        pass
+
+    # Session handling (cookie + CSRF token, flash data for the next request)
+
+    def _load_session(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        sid = cookie[SESSION_COOKIE].value if SESSION_COOKIE in cookie else None
+        with self.state.lock:
+            if sid not in self.state.sessions:
+                sid = secrets.token_hex(16)
+                self.state.sessions[sid] = {"user": None, "name": "", "token": secrets.token_hex(20), "flash": {}}
+            self.session_id = sid
+            self.session = self.state.sessions[sid]
+
+    def _pull_flash(self):
+        flash = self.session["flash"]
+        self.session["flash"] = {}
+        return flash
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        data = body if isinstance(body, bytes) else body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if hasattr(self, "session_id"):
+            self.send_header("Set-Cookie", f"{SESSION_COOKIE}={self.session_id}; Path=/; HttpOnly; SameSite=Lax")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _redirect(self, location):
+        self._send(302, b"", headers={"Location": location})
+
+    def _back(self, location, errors=None, old=None, status=None):
+        flash = {}
+        if errors:
+            flash["errors"] = errors
+        if old:
+            flash["old"] = old
+        if status:
+            flash["status"] = status
+        self.session["flash"] = flash
+        self._redirect(location)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _read_form(self):
+        fields = parse_qs(self._read_body().decode("utf-8"), keep_blank_values=True)
+        return {key: values[0] for key, values in fields.items()}
+
+    # Routing
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip("/") or "/"
+        if path == "/css/app.css":
+            return self._send(200, STYLESHEET, "text/css")
+        if path == "/img/logo.svg":
+            return self._send(200, LOGO, "image/svg+xml")
+
+        pages = {
+            "/courses": _render_courses,
+            "/login": _render_login,
+            "/register": _render_register,
+            "/forgot-password": _render_forgot_password,
+            "/home": _render_home,
+        }
+        if path == "/":
+            return self._redirect("/courses")
+        if path not in pages:
+            return self._send(404, "Not Found", "text/plain")
+
+        self._load_session()
+        if path == "/home" and not self.session["user"]:
+            return self._redirect("/login")
+        if path in ("/login", "/register", "/forgot-password") and self.session["user"]:
+            return self._redirect("/home")
+        self._send(200, pages[path](self.session, self._pull_flash()))
+
+    def do_POST(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        if path == "/regkurz/formsave.php":
+            return self._formsave()
+
+        handlers = {
+            "/login": self._login,
+            "/register": self._register,
+            "/forgot-password": self._forgot_password,
+            "/logout": self._logout,
+        }
+        if path not in handlers:
+            return self._send(404, "Not Found", "text/plain")
+
+        self._load_session()
+        form = self._read_form()
+        if form.get("_token") != self.session["token"]:
+            return self._send(419, ERROR_CSRF, "text/plain")
+        handlers[path](form)
+
+    # POST handlers
+
+    def _login(self, form):
+        email, password = form.get("email", ""), form.get("password", "")
+        errors = {}
+        if not email:
+            errors["email"] = ERROR_EMAIL_REQUIRED
+        elif not RE_EMAIL.match(email):
+            errors["email"] = ERROR_EMAIL_INVALID
+        if not password:
+            errors["password"] = ERROR_PASSWORD_REQUIRED
+        if not errors:
+            user = self.state.users.get(email)
+            if not user or user["password"] != password:
+                errors["email"] = ERROR_INVALID_CREDENTIALS
+        if errors:
+            return self._back("/login", errors, {"email": email})
+        self._sign_in(email)
+        self._redirect("/home")
+
+    def _register(self, form):
+        name, email = form.get("name", ""), form.get("email", "")
+        password, confirmation = form.get("password", ""), form.get("password_confirmation", "")
+        errors = {}
+        if not name:
+            errors["name"] = ERROR_NAME_REQUIRED
+        if not email:
+            errors["email"] = ERROR_EMAIL_REQUIRED
+        elif not RE_EMAIL.match(email):
+            errors["email"] = ERROR_EMAIL_INVALID
+        elif email in self.state.users:
+            errors["email"] = ERROR_EMAIL_TAKEN
+        if not password:
+            errors["password"] = ERROR_PASSWORD_REQUIRED
+        elif password != confirmation:
+            errors["password"] = ERROR_PASSWORD_CONFIRMATION
+        elif len(password) < 8:
+            errors["password"] = ERROR_PASSWORD_MIN
+        if errors:
+            return self._back("/register", errors, {"name": name, "email": email})
+        with self.state.lock:
+            if email in self.state.users:
+                return self._back("/register", {"email": ERROR_EMAIL_TAKEN}, {"name": name, "email": email})
+            self.state.users[email] = {"name": name, "password": password}
+        self._sign_in(email)
+        self._redirect("/home")
+
+    def _forgot_password(self, form):
+        email = form.get("email", "")
+        if not email:
+            return self._back("/forgot-password", {"email": ERROR_EMAIL_REQUIRED})
+        if email not in self.state.users:
+            return self._back("/forgot-password", {"email": ERROR_USER_NOT_FOUND}, {"email": email})
+        self._back("/forgot-password", status=STATUS_PASSWORD_RESET_SENT)
+
+    def _logout(self, form):
+        self._sign_in(None)
+        self._redirect("/courses")
+
+    # Laravel regenerates the session id and CSRF token on login and logout
+    def _sign_in(self, email):
+        with self.state.lock:
+            del self.state.sessions[self.session_id]
+            self.session_id = secrets.token_hex(16)
+            name = self.state.users[email]["name"] if email else ""
+            self.session = {"user": email, "name": name, "token": secrets.token_hex(20), "flash": {}}
+            self.state.sessions[self.session_id] = self.session
+
+    def _formsave(self):
+        raw = self._read_body()
+        if "application/x-www-form-urlencoded" in self.headers.get("Content-Type", ""):
+            payload = {key: values[0] for key, values in parse_qs(raw.decode("utf-8")).items()}
+        else:
+            try:
+                payload = json.loads(raw.decode("utf-8"))
+            except ValueError:
+                payload = None
+        error = validate_registration(payload)
+        if error:
+            body = json.dumps({"result": "error", "message": error})
+            return self._send(500, body, "application/json")
+        with self.state.lock:
+            self.state.registrations.append(payload)
+            registration_id = len(self.state.registrations)
+        self._send(200, json.dumps({"result": "ok", "id": registration_id}), "application/json")
+
+
+class StandInServer:
+    def __init__(self, host=LOCAL_SERVER_HOST, port=LOCAL_SERVER_PORT):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def state(self):
+        return _Handler.state
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="stand-in-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in server for testovani.kitner.cz")
+    parser.add_argument("--host", default=LOCAL_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=LOCAL_SERVER_PORT)
+    args = parser.parse_args()
+
+    server = StandInServer(args.host, args.port)
+    print(f"Stand-in server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Small statistics helpers shared by the timing, wait and load-test tools
+
+"""
+
+import math
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+# Counts per logarithmic bucket (powers of two in milliseconds): [(upper_bound_ms, count), ...]
+def log_histogram(values_ms):
+    buckets = {}
+    for value in values_ms:
+        bound = 2 ** max(0, math.ceil(math.log2(max(value, 1))))
+        buckets[bound] = buckets.get(bound, 0) + 1
+    return sorted(buckets.items())
+
+
+def format_histogram(values_ms, width=40):
+    histogram = log_histogram(values_ms)
+    if not histogram:
+        return []
+    largest = max(count for _, count in histogram)
+    lines = []
+    for bound, count in histogram:
+        bar = "#" * max(1, round(width * count / largest))
+        lines.append(f"{'<= ' + str(bound) + ' ms':>12} {bar} {count}")
+    return lines
+
+
+# Least-squares slope of values over their index (growth per step), None for fewer than 2 values
+def slope(values):
+    if len(values) < 2:
+        return None
+    mean_x, mean_y = (len(values) - 1) / 2, sum(values) / len(values)
+    numerator = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    denominator = sum((x - mean_x) ** 2 for x in range(len(values)))
+    return numerator / denominator
@@ -0,0 +1,202 @@
+"""
+Historical test durations (SQLite) and longest-first scheduling of tests onto workers
+
+Every pytest run appends the duration of each test (setup + call + teardown) to
+ARTIFACTS_DIR/timings.sqlite; the last TIMINGS_KEEP samples per test are kept. The parallel runner
+estimates every test from its samples and assigns the tests longest first, each to the least loaded
+worker (LPT bin packing). Tests without history are estimated from the other tests of their module,
+or from the whole suite.
+
+    python -m Tools.Timings [--limit 20]     # per-test distribution and recent runs
+
+"""
+
+import argparse
+import heapq
+import os
+import sqlite3
+import statistics
+import time
+
+from Data_and_Config.Configuration import *
+from Tools.Stats import percentile
+
+TIMINGS_DB = os.path.join(ARTIFACTS_DIR, "timings.sqlite")
+TIMINGS_KEEP = 50  # samples kept per test
+DEFAULT_ESTIMATE = 5.0  # seconds, for the very first run without any history
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS durations (
+    nodeid TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS durations_nodeid ON durations (nodeid);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT NOT NULL,
+    workers INTEGER NOT NULL,
+    tests INTEGER NOT NULL,
+    predicted REAL NOT NULL,
+    actual REAL NOT NULL,
+    startup REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+"""
+
+
+def module_of(nodeid):
+    return nodeid.split("::")[0]
+
+
+class TimingStore:
+    def __init__(self, path=TIMINGS_DB):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Parallel workers write to the same file at the end of their runs
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.executescript(SCHEMA)
+
+    # rows: [(nodeid, outcome, duration_s), ...]
+    def record(self, rows, run_id=RUN_ID):
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO durations VALUES (?, ?, ?, ?, ?)",
+                [(nodeid, run_id, outcome, duration, now) for nodeid, outcome, duration in rows],
+            )
+            self.connection.executemany(
+                "DELETE FROM durations WHERE nodeid = ? AND rowid NOT IN "
+                "(SELECT rowid FROM durations WHERE nodeid = ? ORDER BY rowid DESC LIMIT ?)",
+                [(nodeid, nodeid, TIMINGS_KEEP) for nodeid in {row[0] for row in rows}],
+            )
+
+    def record_run(self, run_id, workers, tests, predicted, actual, startup):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, workers, tests, predicted, actual, startup, time.time()),
+            )
+
+    # {nodeid: [duration, ...]} of passed and failed runs (skipped tests say nothing about the duration)
+    def samples(self):
+        result = {}
+        rows = self.connection.execute(
+            "SELECT nodeid, duration FROM durations WHERE outcome != 'skipped' ORDER BY rowid"
+        )
+        for nodeid, duration in rows:
+            result.setdefault(nodeid, []).append(duration)
+        return result
+
+    # {nodeid: duration} recorded by the given run
+    def run_durations(self, run_id):
+        rows = self.connection.execute("SELECT nodeid, duration FROM durations WHERE run_id = ?", (run_id,))
+        return dict(rows.fetchall())
+
+    # Worker start-up cost not covered by the test durations (interpreter, imports, browser launch),
+    # median over the last runs
+    def startup(self, runs=10):
+        rows = self.connection.execute("SELECT startup FROM runs ORDER BY recorded_at DESC LIMIT ?", (runs,))
+        values = [row[0] for row in rows]
+        return statistics.median(values) if values else 0.0
+
+    def runs(self, limit=10):
+        return self.connection.execute(
+            "SELECT run_id, workers, tests, predicted, actual FROM runs ORDER BY recorded_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+
+# Estimated duration of every node id: median of its samples,
+# otherwise median of the known tests of its module, of all known tests, or DEFAULT_ESTIMATE
+def estimate(nodeids, samples):
+    known = {nodeid: statistics.median(values) for nodeid, values in samples.items() if values}
+    by_module = {}
+    for nodeid, value in known.items():
+        by_module.setdefault(module_of(nodeid), []).append(value)
+    overall = statistics.median(known.values()) if known else DEFAULT_ESTIMATE
+
+    estimates = {}
+    for nodeid in nodeids:
+        if nodeid in known:
+            estimates[nodeid] = known[nodeid]
+        elif module_of(nodeid) in by_module:
+            estimates[nodeid] = statistics.median(by_module[module_of(nodeid)])
+        else:
+            estimates[nodeid] = overall
+    return estimates
+
+
+# Longest processing time first: every test goes to the currently least loaded worker
+# pinned: node ids that must run on worker 0 (in their original order)
+# Returns (shards, predicted load of every worker in seconds)
+def schedule_longest_first(nodeids, workers, estimates, pinned=()):
+    shards = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    for nodeid in pinned:
+        shards[0].append(nodeid)
+        loads[0] += estimates[nodeid]
+
+    heap = [(load, index) for index, load in enumerate(loads)]
+    heapq.heapify(heap)
+    for nodeid in sorted(nodeids, key=lambda nodeid: (-estimates[nodeid], nodeid)):
+        load, index = heapq.heappop(heap)
+        shards[index].append(nodeid)
+        loads[index] = load + estimates[nodeid]
+        heapq.heappush(heap, (loads[index], index))
+    return shards, loads
+
+
+# Plugin part (registered in conftest.py): records the durations of the run
+
+
+class TimingRecorder:
+    def __init__(self):
+        self.durations = {}
+        self.outcomes = {}
+
+    def pytest_runtest_logreport(self, report):
+        self.durations[report.nodeid] = self.durations.get(report.nodeid, 0.0) + report.duration
+        if report.when == "call" or report.outcome != "passed":
+            self.outcomes.setdefault(report.nodeid, report.outcome)
+
+    def pytest_sessionfinish(self, session):
+        rows = [
+            (nodeid, self.outcomes.get(nodeid, "passed"), duration) for nodeid, duration in self.durations.items()
+        ]
+        if not rows or session.config.getoption("collectonly"):
+            return
+        store = TimingStore()
+        try:
+            store.record(rows)
+        finally:
+            store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Historical test durations")
+    parser.add_argument("--limit", type=int, default=20, help="number of slowest tests shown")
+    args = parser.parse_args(argv)
+
+    store = TimingStore()
+    samples = store.samples()
+    rows = sorted(samples.items(), key=lambda item: statistics.median(item[1]), reverse=True)[: args.limit]
+    print(f"{'test':<72} {'runs':>5} {'p50 s':>7} {'p90 s':>7} {'max s':>7}")
+    for nodeid, values in rows:
+        print(
+            f"{nodeid[-72:]:<72} {len(values):>5} {statistics.median(values):>7.2f} "
+            f"{percentile(values, 0.9):>7.2f} {max(values):>7.2f}"
+        )
+    runs = store.runs()
+    if runs:
+        print(f"\n{'run':<10} {'workers':>7} {'tests':>6} {'predicted s':>12} {'actual s':>9}")
+        for run_id, workers, tests, predicted, actual in runs:
+            print(f"{run_id:<10} {workers:>7} {tests:>6} {predicted:>12.1f} {actual:>9.1f}")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+"""
+Per-step timing spans for the E2E helpers and Playwright actions
+
+Enabled with TRACE_STEPS=1. Every helper decorated with @traced and every Playwright action
+(navigation, fill, click, expect...) records a span with monotonic timestamps. At the end of the run
+the spans are written as a Chrome trace (ARTIFACTS_DIR/trace.json, open in chrome://tracing or
+https://ui.perfetto.dev) and the slowest steps are printed in the terminal summary.
+
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from Data_and_Config.Configuration import *
+
+TRACE_FILE = os.path.join(ARTIFACTS_DIR, "trace.json")
+
+# Playwright methods recorded as spans, grouped by span category
+PLAYWRIGHT_ACTIONS = {
+    "Page": {
+        "navigation": ("goto", "reload", "go_back", "wait_for_url"),
+        "click": ("click", "check", "press"),
+        "fill": ("fill", "select_option"),
+        "evaluate": ("evaluate",),
+    },
+    "Locator": {
+        "click": ("click", "check", "press"),
+        "fill": ("fill",),
+        "evaluate": ("evaluate",),
+        "wait": ("wait_for",),
+    },
+    "PageAssertions": {
+        "expect": ("to_have_title", "to_have_url"),
+    },
+    "LocatorAssertions": {
+        "expect": ("to_have_text", "to_contain_text", "to_be_visible", "to_be_hidden", "to_have_value"),
+    },
+}
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = TRACE_STEPS
+        self.spans = []
+        self.lock = threading.Lock()
+        self.origin = time.monotonic()
+
+    @contextmanager
+    def span(self, name, category="helper", **args):
+        if not self.enabled:
+            yield
+            return
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            finished = time.monotonic()
+            with self.lock:
+                self.spans.append(
+                    {
+                        "name": name,
+                        "cat": category,
+                        "start": started - self.origin,
+                        "duration": finished - started,
+                        "tid": threading.get_ident(),
+                        "args": args,
+                    }
+                )
+
+    def chrome_trace(self):
+        events = [
+            {
+                "name": span["name"],
+                "cat": span["cat"],
+                "ph": "X",
+                "ts": round(span["start"] * 1e6),
+                "dur": round(span["duration"] * 1e6),
+                "pid": os.getpid(),
+                "tid": span["tid"],
+                "args": {key: str(value) for key, value in span["args"].items()},
+            }
+            for span in self.spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path=TRACE_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.chrome_trace(), file)
+        return path
+
+    # [(name, category, count, total_s, mean_s, max_s), ...] sorted by total time, tests excluded
+    def slowest(self, limit=15):
+        totals = {}
+        for span in self.spans:
+            if span["cat"] == "test":
+                continue
+            key = (span["name"], span["cat"])
+            count, total, longest = totals.get(key, (0, 0.0, 0.0))
+            totals[key] = (count + 1, total + span["duration"], max(longest, span["duration"]))
+        rows = [
+            (name, category, count, total, total / count, longest)
+            for (name, category), (count, total, longest) in totals.items()
+        ]
+        return sorted(rows, key=lambda row: row[3], reverse=True)[:limit]
+
+
+tracer = Tracer()
+
+
+# Records a span for every call of the decorated helper
+def traced(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not tracer.enabled:
+            return function(*args, **kwargs)
+        with tracer.span(function.__name__):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+# Selector or URL the action works on (Page methods get it as the first argument)
+def _action_target(api_object, args):
+    if args and isinstance(args[0], str):
+        return args[0]
+    impl = getattr(api_object, "_impl_obj", None)
+    locator = getattr(impl, "_actual_locator", impl)
+    return getattr(locator, "_selector", "")
+
+
+def _traced_method(method, class_name, category):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not tracer.enabled:
+            return method(self, *args, **kwargs)
+        with tracer.span(f"{class_name}.{method.__name__}", category, target=_action_target(self, args)):
+            return method(self, *args, **kwargs)
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+# Wraps the Playwright sync API methods listed in PLAYWRIGHT_ACTIONS (once per process)
+def instrument_playwright():
+    import playwright.sync_api as sync_api
+
+    for class_name, categories in PLAYWRIGHT_ACTIONS.items():
+        cls = getattr(sync_api, class_name)
+        for category, methods in categories.items():
+            for method_name in methods:
+                method = getattr(cls, method_name)
+                if not getattr(method, "__traced__", False):
+                    setattr(cls, method_name, _traced_method(method, class_name, category))
+
+
+def format_summary(rows):
+    lines = [f"{'step':<48} {'kind':<10} {'calls':>6} {'total s':>9} {'mean ms':>9} {'max ms':>9}"]
+    for name, category, count, total, mean, longest in rows:
+        lines.append(f"{name:<48} {category:<10} {count:>6} {total:>9.3f} {mean * 1000:>9.1f} {longest * 1000:>9.1f}")
+    return lines
@@ -0,0 +1,313 @@
+"""
+Local model of the formsave.php validation rules, checked against the server with few requests
+
+The case space is the cartesian product of per-field value domains (valid, invalid and generic
+values of Tools/RegistrationSchema.py), about 5.7e13 combinations. The model compiles the schema's
+RULES into lookup tables over the distinct values of each field (person, address and ico as one
+joint unit), so the predicted status of any combination is a few table lookups and the number of
+combinations in each stratum (valid, or the first violated rule) is computed exactly as a product
+of table counts, without enumerating the space.
+
+Only a stratified sample (--per-stratum uniform combinations of every stratum) and the cases at the
+rule boundaries (lengths, digit counts, minimal values) are sent to the server. A response whose
+status differs from the model's prediction is a disagreement: it is reported and saved to
+ARTIFACTS_DIR/validation_model/disagreements.jsonl.
+
+    python -m Tools.ValidationModel --per-stratum 20 --local-server
+    python -m Tools.ValidationModel --verify 200000     # compiled model vs. schema, no requests
+
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from Data_and_Config.Configuration import *
+from Tools.RegistrationSchema import (
+    GENERIC_VALUES,
+    INVALID_VALUES,
+    MISSING,
+    RULES,
+    STATUS_INVALID,
+    STATUS_VALID,
+    SURNAME_MAX_LENGTH,
+    VALID_VALUES,
+    canonical_payload,
+    expected_status,
+    person_error,
+    validation_error,
+)
+
+VALIDATION_MODEL_DIR = os.path.join(ARTIFACTS_DIR, "validation_model")
+DISAGREEMENTS_FILE = os.path.join(VALIDATION_MODEL_DIR, "disagreements.jsonl")
+PERSON_UNIT = ("person", "address", "ico")
+
+# Values on both sides of each rule boundary, sent on top of the canonical valid payload
+BOUNDARY_VALUES = {
+    "kurz": ("1", "3", "0", "4"),
+    "surname": ("N", "N" * SURNAME_MAX_LENGTH, "N" * (SURNAME_MAX_LENGTH + 1)),
+    "email": ("a@b.c", "a@b.", "@b.c", "a@.c"),
+    "phone": ("123456789", "12345678", "123456789012", "1234567890123", "+123456789", "+12345678"),
+    "count": ("1", "0", "9", "10"),
+    "comment": (None, "", "<", ">", "a"),
+    "ico": ("12345678", "1234567", "123456789"),
+}
+
+
+# Every field: valid values, then invalid ones, then the generic type and size mutations
+# (targetid is not validated and keeps its single value)
+def default_domains():
+    domains = {}
+    for field in (*VALID_VALUES, "person"):
+        if field == "targetid":
+            domains[field] = VALID_VALUES[field]
+            continue
+        values = VALID_VALUES.get(field, ("fyz", "pra") if field == "person" else ())
+        domains[field] = tuple(values) + INVALID_VALUES.get(field, ()) + GENERIC_VALUES
+    return domains
+
+
+def _product(values):
+    result = 1
+    for value in values:
+        result *= value
+    return result
+
+
+def _value(value):
+    return None if value is MISSING else value
+
+
+# Mixed-radix numbering of the combinations of the field domains
+class CaseSpace:
+    def __init__(self, domains=None):
+        self.domains = dict(domains or default_domains())
+        self.fields = list(self.domains)
+        self.size = _product(len(values) for values in self.domains.values())
+        self.strides = {}
+        stride = 1
+        for field in reversed(self.fields):
+            self.strides[field] = stride
+            stride *= len(self.domains[field])
+
+    def digit(self, index, field):
+        return index // self.strides[field] % len(self.domains[field])
+
+    def digits(self, index):
+        return {field: self.digit(index, field) for field in self.fields}
+
+    def payload(self, digits):
+        payload = {}
+        for field in self.fields:
+            value = self.domains[field][digits[field]]
+            if value is not MISSING:
+                payload[field] = value
+        return payload
+
+
+class ValidationModel:
+    def __init__(self, space):
+        self.space = space
+        domains = space.domains
+        self.units = []  # (stratum names, {digits key: stratum or None}) in rule order
+        for field, rule in RULES:
+            if rule is None:
+                # person, address and ico are validated together: the table is keyed by their digit triple
+                table = {}
+                for p, person in enumerate(domains["person"]):
+                    for a, address in enumerate(domains["address"]):
+                        for i, ico in enumerate(domains["ico"]):
+                            table[(p, a, i)] = person_error(_value(person), _value(address), _value(ico))
+                self.units.append((PERSON_UNIT, table))
+            else:
+                table = {index: None if rule(_value(value)) else field for index, value in enumerate(domains[field])}
+                self.units.append(((field,), table))
+        # Digits keys of every unit by the rule they violate (None: they pass), for sampling
+        self.keys = {}
+        for fields, table in self.units:
+            by_error = self.keys.setdefault(fields, {})
+            for key, error in table.items():
+                by_error.setdefault(error, []).append(key)
+        ruled = {field for fields, _ in self.units for field in fields}
+        self.free = [field for field in space.fields if field not in ruled]  # not validated (targetid)
+
+    @staticmethod
+    def _key(fields, digits):
+        return tuple(digits[field] for field in fields) if len(fields) > 1 else digits[fields[0]]
+
+    # (status, first violated rule or None) of the combination with these digits
+    def predict_digits(self, digits):
+        for fields, table in self.units:
+            error = table[self._key(fields, digits)]
+            if error:
+                return STATUS_INVALID, error
+        return STATUS_VALID, None
+
+    # Same for a combination number: only the digits of the units up to the first violated rule are decoded
+    def predict(self, index):
+        digit = self.space.digit
+        for fields, table in self.units:
+            if len(fields) > 1:
+                error = table[tuple(digit(index, field) for field in fields)]
+            else:
+                error = table[digit(index, fields[0])]
+            if error:
+                return STATUS_INVALID, error
+        return STATUS_VALID, None
+
+    # Exact number of combinations per stratum ("valid" or the first violated rule)
+    def strata(self):
+        sizes = [len(table) for _, table in self.units]
+        free = _product(len(self.space.domains[field]) for field in self.free)
+        counts = {}
+        passing = 1  # combinations of the earlier units that pass all their rules
+        for position, (_, table) in enumerate(self.units):
+            later = _product(sizes[position + 1 :]) * free
+            errors = {}
+            for error in table.values():
+                errors[error] = errors.get(error, 0) + 1
+            for error, count in errors.items():
+                if error:
+                    counts[error] = counts.get(error, 0) + passing * count * later
+            passing *= errors.get(None, 0)
+        counts["valid"] = passing * free
+        return counts
+
+    # Uniform random combination of the stratum: earlier units pass, the stratum's unit fails with its
+    # rule, later units and the free fields take any value
+    def sample(self, stratum, rng):
+        wanted = None if stratum == "valid" else stratum
+        digits = {field: rng.randrange(len(values)) for field, values in self.space.domains.items()}
+        for fields, table in self.units:
+            failing = wanted is not None and wanted in self.keys[fields]
+            key = rng.choice(self.keys[fields][wanted if failing else None])
+            for field, digit in zip(fields, key if len(fields) > 1 else (key,)):
+                digits[field] = digit
+            if failing:
+                break
+        return digits
+
+
+# Canonical valid payload with one field at a boundary value (ico with a pra person)
+def boundary_payloads():
+    payloads = []
+    for field, values in BOUNDARY_VALUES.items():
+        for value in values:
+            payload = canonical_payload()
+            if field == "ico":
+                payload["person"] = "pra"
+            payload[field] = value
+            payloads.append(payload)
+    return payloads
+
+
+# Stratified sample plus the boundary cases: [(payload, stratum, predicted status), ...]
+def select_cases(model, per_stratum, rng):
+    cases = []
+    for stratum in sorted(model.strata()):
+        for _ in range(per_stratum):
+            digits = model.sample(stratum, rng)
+            cases.append((model.space.payload(digits), stratum, model.predict_digits(digits)[0]))
+    for payload in boundary_payloads():
+        cases.append((payload, f"boundary:{validation_error(payload) or 'valid'}", expected_status(payload)))
+    return cases
+
+
+# Compiled predictions of `count` random combinations checked against the schema's rules on their payloads
+# Returns (mismatching indexes, combinations per second of the model, of building the payload + schema rules)
+def verify(model, count, rng):
+    space = model.space
+    indexes = [rng.randrange(space.size) for _ in range(count)]
+    started = time.perf_counter()
+    predicted = [model.predict(index)[1] for index in indexes]
+    model_time = time.perf_counter() - started
+    started = time.perf_counter()
+    checked = [validation_error(space.payload(space.digits(index))) for index in indexes]
+    schema_time = time.perf_counter() - started
+    mismatches = [index for index, left, right in zip(indexes, predicted, checked) if left != right]
+    return mismatches, count / model_time, count / schema_time
+
+
+def save_disagreements(disagreements, path=DISAGREEMENTS_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        for entry in disagreements:
+            file.write(json.dumps(entry, ensure_ascii=False, default=repr) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local model of the formsave.php rules vs. the server")
+    parser.add_argument("--per-stratum", type=int, default=20, help="sampled combinations per stratum")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the sampling (random by default)")
+    parser.add_argument("--verify", type=int, default=0, help="check this many combinations against the schema")
+    parser.add_argument("--concurrency", type=int, default=API_CONCURRENCY)
+    parser.add_argument("--url", default=URL_REGKURZ_FORM)
+    parser.add_argument("--local-server", action="store_true", help="run against an in-process stand-in server")
+    args = parser.parse_args(argv)
+
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+    rng = random.Random(seed)
+    model = ValidationModel(CaseSpace())
+    strata = model.strata()
+    print(f"Case space: {model.space.size:,} combinations of {len(model.space.fields)} fields (seed {seed})")
+    for stratum, count in sorted(strata.items(), key=lambda item: -item[1]):
+        status = STATUS_VALID if stratum == "valid" else STATUS_INVALID
+        print(f"  {stratum:<10} {status}  {count:>22,}  {count / model.space.size:>8.3%}")
+
+    if args.verify:
+        mismatches, model_rate, schema_rate = verify(model, args.verify, rng)
+        print(
+            f"\nVerified {args.verify:,} combinations: {len(mismatches)} mismatches, "
+            f"model {model_rate:,.0f}/s, payload + schema rules {schema_rate:,.0f}/s"
+        )
+        return 1 if mismatches else 0
+
+    from Tools.Fuzzer import send
+
+    server = None
+    url = args.url
+    if args.local_server:
+        from Tools.StandInServer import StandInServer
+
+        server = StandInServer(port=0).start()
+        url = f"{server.url}/regkurz/formsave.php"
+
+    cases = select_cases(model, args.per_stratum, rng)
+    try:
+        outcomes = send([payload for payload, _, _ in cases], args.concurrency, url)
+    finally:
+        if server:
+            server.stop()
+
+    disagreements = []
+    by_stratum = {}
+    for (payload, stratum, predicted), outcome in zip(cases, outcomes):
+        sent, disagreed = by_stratum.get(stratum, (0, 0))
+        agrees = outcome.status == predicted
+        by_stratum[stratum] = (sent + 1, disagreed + (not agrees))
+        if not agrees:
+            disagreements.append(
+                {
+                    "stratum": stratum,
+                    "predicted": predicted,
+                    "status": outcome.status,
+                    "signature": outcome.signature,
+                    "payload": payload,
+                }
+            )
+
+    print(f"\n{len(cases)} requests for {model.space.size:,} combinations:")
+    for stratum, (sent, disagreed) in sorted(by_stratum.items()):
+        flag = "  DISAGREEMENT" if disagreed else ""
+        print(f"  {stratum:<20} {sent:>4} sent  {disagreed:>4} disagree{flag}")
+    save_disagreements(disagreements)
+    for entry in disagreements[:10]:
+        print(f"\nPredicted {entry['predicted']}, got {entry['status']} ({entry['signature']}): {entry['payload']}")
+    print(f"\nDisagreements: {DISAGREEMENTS_FILE} ({len(disagreements)})")
+    return 1 if disagreements else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,146 @@
+"""
+Adaptive waits for the E2E helpers
+
+Instead of one global TIMEOUT_BROWSER, every wait is keyed by action and page (e.g. "logged_in:/home").
+Observed durations are kept per key (and persisted between runs), the timeout of a key is its
+p99 times a safety margin, clamped to [WAIT_MIN_TIMEOUT, WAIT_MAX_TIMEOUT]. Keys without enough
+samples use TIMEOUT_BROWSER. After a timed-out wait the key backs off: its next timeouts are at
+least twice the one that ran out (doubling again on every further timeout), until min_samples
+waits in a row succeeded.
+
+Only the timeouts adapt: the waits themselves are Playwright's auto-waiting assertions and actions,
+which already poll their condition until the timeout, so there is no polling loop (or fixed sleep)
+of our own. Parallel workers merge their new samples into the stored ones under a file lock.
+
+"""
+
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+from Data_and_Config.Configuration import *
+from Tools.FileLock import file_lock
+from Tools.Stats import percentile
+
+WAIT_STATS_FILE = os.path.join(ARTIFACTS_DIR, "wait_stats.json")
+
+
+# Wait key of an action on the page's current path
+def page_key(action, page):
+    return f"{action}:{urlsplit(page.url).path or '/'}"
+
+
+class WaitScheduler:
+    def __init__(
+        self,
+        path=WAIT_STATS_FILE,
+        default_timeout=TIMEOUT_BROWSER,
+        min_timeout=WAIT_MIN_TIMEOUT,
+        max_timeout=WAIT_MAX_TIMEOUT,
+        margin=WAIT_MARGIN,
+        min_samples=5,
+        max_samples=200,
+    ):
+        self.path = path
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.margin = margin
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.samples = {}
+        self.backoff = {}  # key: [minimum timeout after a timed-out wait, successful waits since]
+        self.recorded = {}  # key: samples of this process not saved yet
+        self.dirty = False
+        if path and os.path.exists(path):
+            self.samples, self.backoff = self._load()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as file:
+            data = json.load(file)
+        return data.get("samples", {}), data.get("backoff", {})
+
+    def _append(self, key, value):
+        for samples in (self.samples.setdefault(key, []), self.recorded.setdefault(key, [])):
+            samples.append(value)
+            del samples[: -self.max_samples]
+
+    def record(self, key, elapsed_ms):
+        self._append(key, round(elapsed_ms, 1))
+        if key in self.backoff:
+            self.backoff[key][1] += 1
+            if self.backoff[key][1] >= self.min_samples:
+                del self.backoff[key]
+        self.dirty = True
+
+    # A wait that ran out: recorded with the full timeout, and the next waits get at least twice as long
+    # (p99 alone would ignore a few timeouts among many fast samples)
+    def record_timeout(self, key, timeout):
+        self._append(key, timeout)
+        self.backoff[key] = [min(self.max_timeout, 2 * timeout), 0]
+        self.dirty = True
+
+    # Timeout in milliseconds for the next wait of this key
+    def timeout(self, key):
+        samples = self.samples.get(key, [])
+        backoff = self.backoff.get(key, [0])[0]
+        if len(samples) < self.min_samples:
+            return max(self.default_timeout, backoff)
+        adaptive = max(self.min_timeout, percentile(samples, 0.99) * self.margin, backoff)
+        return int(min(self.max_timeout, adaptive))
+
+    # Runs an assertion/action that takes a timeout (ms), records how long it took
+    def run(self, key, action):
+        timeout = self.timeout(key)
+        started = time.monotonic()
+        try:
+            result = action(timeout)
+        except Exception:
+            self.record_timeout(key, timeout)
+            raise
+        self.record(key, (time.monotonic() - started) * 1000)
+        return result
+
+    # Same as run for the async helpers (Tools/AsyncE2E.py): action(timeout) returns an awaitable
+    async def run_async(self, key, action):
+        timeout = self.timeout(key)
+        started = time.monotonic()
+        try:
+            result = await action(timeout)
+        except Exception:
+            self.record_timeout(key, timeout)
+            raise
+        self.record(key, (time.monotonic() - started) * 1000)
+        return result
+
+    def summary(self):
+        return {
+            key: {"samples": len(values), "p50": percentile(values, 0.5), "p99": percentile(values, 0.99)}
+            for key, values in sorted(self.samples.items())
+        }
+
+    # Parallel workers save at the end of their runs: the samples of this process are appended to the
+    # stored ones (which may hold other workers' samples by now), the backoff of the keys it waited for wins
+    def save(self):
+        if not (self.path and self.dirty):
+            return
+        with file_lock(f"{self.path}.lock"):
+            samples, backoff = self._load() if os.path.exists(self.path) else ({}, {})
+            for key, recorded in self.recorded.items():
+                samples[key] = (samples.get(key, []) + recorded)[-self.max_samples :]
+                if key in self.backoff:
+                    backoff[key] = self.backoff[key]
+                else:
+                    backoff.pop(key, None)
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump({"samples": samples, "backoff": backoff}, file)
+            os.replace(temporary, self.path)
+        self.samples, self.backoff = samples, backoff
+        self.recorded = {}
+        self.dirty = False
+
+
+# Shared instance used by the E2E helpers, saved at the end of the pytest session (conftest.py)
+waits = WaitScheduler()
@@ -0,0 +1,22 @@
+"""
+Tests of the background account factory without a server
+
+"""
+
+import itertools
+from types import SimpleNamespace
+
+import Tools.AccountFactory as account_factory_module
+from Tools.AccountFactory import AccountFactory
+
+
+# Registers no more accounts than the run needs, a test that takes one more raises the limit
+def test_refill_stops_at_the_limit(monkeypatch):
+    monkeypatch.setattr(account_factory_module, "register_account", lambda context, identity, base_url: identity)
+    identities = SimpleNamespace(next=itertools.count().__next__)
+    factory = AccountFactory(size=5, identities=identities, limit=2).start()
+    assert [factory.take(), factory.take()] == [0, 1]
+    assert factory.ready.empty() and factory.created == 2
+    assert factory.take() == 2
+    factory.stop()
+    assert factory.created == 3 and factory.error is None
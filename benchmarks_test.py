@@ -0,0 +1,35 @@
+"""
+Tests of the benchmark baselines and the regression gate
+
+"""
+
+from Tools.Benchmarks import baseline_versions, compare, load_baseline, measure, save_baseline
+
+
+def test_baselines_are_versioned_and_latest_is_loaded(tmp_path):
+    assert load_baseline(directory=str(tmp_path)) is None
+    save_baseline({"a": {"median_us": 10.0}, "b": {"skipped": "no browser"}}, str(tmp_path))
+    save_baseline({"a": {"median_us": 12.0}}, str(tmp_path))
+
+    assert baseline_versions(str(tmp_path)) == [1, 2]
+    assert load_baseline(directory=str(tmp_path))["metrics"] == {"a": {"median_us": 12.0}}
+    assert load_baseline(1, str(tmp_path))["metrics"] == {"a": {"median_us": 10.0}}
+
+
+def test_only_slowdowns_beyond_the_tolerance_regress():
+    baseline = {"metrics": {"fast": {"median_us": 100.0}, "slow": {"median_us": 100.0}, "gone": {"median_us": 1.0}}}
+    results = {"fast": {"median_us": 50.0}, "slow": {"median_us": 130.0}, "new": {"median_us": 5.0}}
+
+    rows = {row[0]: row for row in compare(results, baseline, tolerance=0.25)}
+    assert set(rows) == {"fast", "slow"}
+    assert rows["fast"][5] is False
+    assert rows["slow"][5] is True
+    assert not compare(results, baseline, tolerance=0.5)[1][5]
+
+
+def test_measure_calibrates_the_loops():
+    calls = []
+    result = measure(lambda: calls.append(1), repeats=3, min_time=0.001)
+    assert result["loops"] > 1
+    assert len(calls) >= 3 * result["loops"]
+    assert 0 < result["min_us"] <= result["median_us"]
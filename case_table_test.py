@@ -0,0 +1,33 @@
+"""
+Tests of the case tables: loading, duplicate cases and shards
+
+"""
+
+import json
+
+import pytest
+
+from Tools.CaseTable import load_case_table, shard_cases
+
+
+def _table(tmp_path, *records):
+    path = tmp_path / "Cases.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in records), encoding="utf-8")
+    return str(path)
+
+
+def test_shards_are_numbered_from_one_and_cover_every_case_once():
+    cases = load_case_table("RegistrationCases.jsonl")
+    shards = [shard_cases(cases, f"{index}/3") for index in (1, 2, 3)]
+    assert sorted(case["id"] for shard in shards for case in shard) == sorted(case["id"] for case in cases)
+    for shard in ("0/3", "4/3", "3", "a/b"):
+        with pytest.raises(ValueError):
+            shard_cases(cases, shard)
+
+
+def test_duplicate_cases_are_rejected(tmp_path):
+    base = {"base": {"kurz": "2", "name": "Jan"}}
+    with pytest.raises(ValueError, match="duplicate case id 'a'"):
+        load_case_table(_table(tmp_path, base, {"id": "a", "kurz": "1"}, {"id": "a", "kurz": "3"}))
+    with pytest.raises(ValueError, match="case 'b' duplicates case 'a'"):
+        load_case_table(_table(tmp_path, base, {"id": "a", "kurz": "1"}, {"id": "b", "kurz": "1", "description": "x"}))
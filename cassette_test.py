@@ -0,0 +1,123 @@
+"""
+Tests of the record/replay cassette in front of the API request contexts
+
+"""
+
+import asyncio
+import concurrent.futures
+
+import pytest
+
+from Tools.Cassette import AsyncCassetteRequestContext, Cassette, CassetteMiss, CassetteRequestContext, request_key
+
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.headers = {"content-type": "application/json"}
+        self._body = body
+
+    def body(self):
+        return self._body
+
+
+class FakeContext:
+    def __init__(self, status=200):
+        self.status = status
+        self.calls = 0
+
+    def fetch(self, url, method="GET", headers=None, data=None, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.status, b'{"result": "ok"}')
+
+
+class AsyncFakeResponse(FakeResponse):
+    async def body(self):
+        return self._body
+
+
+class AsyncFakeContext(FakeContext):
+    async def fetch(self, url, method="GET", headers=None, data=None, **kwargs):
+        self.calls += 1
+        return AsyncFakeResponse(self.status, b'{"result": "ok"}')
+
+
+# In its own thread: the sync Playwright runtime of the session keeps an event loop running in this one
+def _run(coroutine):
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+@pytest.fixture(scope="function")
+def cassette(tmp_path):
+    return Cassette(path=str(tmp_path / "cassette"))
+
+
+def test_request_key_is_canonical():
+    first = request_key("post", "http://x/formsave.php", {"Content-Type": "a"}, {"kurz": "2", "name": "Jan"})
+    second = request_key("POST", "http://x/formsave.php", {"content-type": "a"}, {"name": "Jan", "kurz": "2"})
+    assert first == second
+    assert first != request_key("POST", "http://x/formsave.php", {"content-type": "a"}, {"kurz": "3", "name": "Jan"})
+
+
+def test_record_then_replay(cassette):
+    server = FakeContext()
+    recorder = CassetteRequestContext(server, cassette, "record")
+    assert recorder.post("http://x/formsave.php", data={"kurz": "2"}).status == 200
+    assert recorder.post("http://x/formsave.php", data={"kurz": "2"}).text() == '{"result": "ok"}'
+    assert server.calls == 1
+
+    offline = CassetteRequestContext(FakeContext(), cassette, "replay")
+    assert offline.post("http://x/formsave.php", data={"kurz": "2"}).json() == {"result": "ok"}
+    with pytest.raises(CassetteMiss):
+        offline.post("http://x/formsave.php", data={"kurz": ""})
+
+
+# The bulk sender's async requests share the cassette with the sync ones
+def test_async_requests_are_recorded_and_replayed(cassette):
+    CassetteRequestContext(FakeContext(), cassette, "record").post("http://x/formsave.php", data={"kurz": "2"})
+    server = AsyncFakeContext(500)
+
+    async def send(mode, data):
+        response = await AsyncCassetteRequestContext(server, cassette, mode).post("http://x/formsave.php", data=data)
+        return response.status, response.text()
+
+    assert _run(send("replay", {"kurz": "2"})) == (200, '{"result": "ok"}')
+    assert _run(send("off", {"kurz": "2"})) == (500, '{"result": "ok"}')
+    with pytest.raises(CassetteMiss):
+        _run(send("replay", {"kurz": "3"}))
+    assert server.calls == 1
+
+
+def test_refresh_reports_drift(cassette):
+    CassetteRequestContext(FakeContext(200), cassette, "record").post("http://x/formsave.php", data={"kurz": "2"})
+    refreshed = CassetteRequestContext(FakeContext(500), cassette, "refresh")
+    assert refreshed.post("http://x/formsave.php", data={"kurz": "2"}).status == 500
+    assert [(drift["was"], drift["now"]) for drift in cassette.drifts] == [(200, 500)]
+    assert (cassette.hits, cassette.misses) == (0, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cassette = Cassette(path=str(tmp_path / "cassette"), max_bytes=400)
+    for index in range(5):
+        cassette.put(f"key{index}", {"status": 200, "headers": {}, "body": "x" * 100})
+        cassette.get("key0")
+    assert "key0" in cassette.index
+    assert "key1" not in cassette.index
+    assert sum(item["size"] for item in cassette.index.values()) <= 400
+
+    # Replays only update last_used in memory until the cassette is saved at the end of the session
+    cassette.get("key4")
+    cassette.save()
+    assert Cassette(path=cassette.path).index["key4"] == cassette.index["key4"]
+
+
+# Parallel workers record into the same cassette, neither may drop the other's entries from the index
+def test_index_of_parallel_workers_is_merged(tmp_path):
+    first, second = Cassette(path=str(tmp_path / "cassette")), Cassette(path=str(tmp_path / "cassette"))
+    first.put("key1", {"status": 200, "headers": {}, "body": "a"})
+    second.put("key2", {"status": 500, "headers": {}, "body": "b"})
+    first.get("key1")
+    first.save()
+    assert set(Cassette(path=first.path).index) == {"key1", "key2"}
+    assert Cassette(path=first.path).get("key2")["status"] == 500
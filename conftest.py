@@ -0,0 +1,236 @@
+"""
+Shared pytest configuration for all test suites
+
+"""
+
+import time
+
+import pytest
+
+from Data_and_Config.Configuration import *
+from Tools.Flakiness import FlakinessTracker
+from Tools.Timings import TimingRecorder
+
+pytest_plugins = ["Tools.CaseTable"]
+
+# Start-up costs of the shared Playwright runtime (reported in the terminal summary)
+RUNTIME_STATS = {"driver_s": None, "browser_s": None, "modules": 0, "http_pool": None}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--tier-equivalence",
+        action="store_true",
+        help="run the HTTP-tier validation checks in the browser too and compare both tiers",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "shared_account: uses a fixed account of the tested site (not parallel-safe)")
+    config.addinivalue_line("markers", "allow_resources(*entries): resource types or hosts not blocked for the test")
+    config.pluginmanager.register(TimingRecorder(), "timing_recorder")
+    config.pluginmanager.register(FlakinessTracker(), "flakiness_tracker")
+    if FAILURE_CAPTURE:
+        from Tools.FailureCapture import FailureCaptureRecorder, instrument_playwright
+
+        instrument_playwright()
+        config.pluginmanager.register(FailureCaptureRecorder(), "failure_capture")
+    if RESOURCE_GOVERNOR:
+        from Tools.ResourceGovernor import ResourceGovernor
+
+        config.pluginmanager.register(ResourceGovernor(), "resource_governor")
+    if TRACE_STEPS:
+        from Tools.Tracing import instrument_playwright
+
+        instrument_playwright()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    if not TRACE_STEPS:
+        yield
+        return
+    from Tools.Tracing import tracer
+
+    with tracer.span(item.nodeid, "test"):
+        yield
+
+
+# Test modules that need the Playwright driver (directly or through page, browser, api_context...)
+# trylast: counted after -k/-m and the case-table modes deselected their items
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(items):
+    RUNTIME_STATS["modules"] = len({item.nodeid.split("::")[0] for item in items if _uses_driver(item)})
+
+
+def _uses_driver(item):
+    return "playwright" in item.fixturenames or (HTTP_CLIENT != "pool" and "api_context" in item.fixturenames)
+
+
+def pytest_sessionfinish(session):
+    from Tools.ExchangeLog import exchange_log
+    from Tools.Registration import close_batch_sender
+    from Tools.WaitScheduler import waits
+
+    waits.save()
+    close_batch_sender()  # before the exchange log, its last batch records are flushed then
+    exchange_log.close()
+    if CASSETTE_MODE != "off":
+        from Tools.Cassette import get_cassette
+
+        get_cassette().save()  # last_used of the replayed entries, for the LRU eviction
+
+
+def pytest_terminal_summary(terminalreporter):
+    if RUNTIME_STATS["driver_s"] is not None:
+        driver_s, modules = RUNTIME_STATS["driver_s"], RUNTIME_STATS["modules"]
+        browser_s = RUNTIME_STATS["browser_s"]
+        terminalreporter.write_sep("-", "playwright runtime")
+        terminalreporter.write_line(
+            f"Driver started once in {driver_s:.2f} s for {modules} test modules "
+            f"(about {driver_s * max(0, modules - 1):.2f} s saved), "
+            + (f"browser launched in {browser_s:.2f} s" if browser_s is not None else "no browser launched")
+        )
+    if RUNTIME_STATS["http_pool"]:
+        pool = RUNTIME_STATS["http_pool"]
+        connect = f", connect p50 {pool['connect_ms']['p50']} ms" if pool["connect_ms"] else ""
+        tls = f", TLS p50 {pool['tls_ms']['p50']} ms" if pool["tls_ms"] else ""
+        terminalreporter.write_sep("-", "http connection pool")
+        terminalreporter.write_line(
+            f"{pool['requests']} requests over {pool['connections']} connections "
+            f"(reuse ratio {pool['reuse_ratio']:.1%}{connect}{tls})"
+        )
+    if TRACE_STEPS:
+        from Tools.Tracing import format_summary, tracer
+
+        terminalreporter.write_sep("-", "slowest steps")
+        for line in format_summary(tracer.slowest()):
+            terminalreporter.write_line(line)
+        terminalreporter.write_line(f"Chrome trace: {tracer.export()}")
+    if CASSETTE_MODE != "off":
+        from Tools.Cassette import get_cassette
+
+        cassette = get_cassette()
+        terminalreporter.write_sep("-", f"cassette ({CASSETTE_MODE})")
+        terminalreporter.write_line(
+            f"{cassette.hits} replayed, {cassette.recorded} recorded, {len(cassette.drifts)} drifted"
+        )
+        for drift in cassette.drifts:
+            terminalreporter.write_line(
+                f"DRIFT {drift['method']} {drift['url']} [{drift['key'][:12]}]: {drift['was']} -> {drift['now']}"
+            )
+
+
+# Fixtures
+
+
+# Starts the local stand-in server when LOCAL_SERVER=1 (URL_BASE then points to it)
+@pytest.fixture(scope="session", autouse=True)
+def _local_server():
+    if not LOCAL_SERVER:
+        yield None
+        return
+
+    from Tools.StandInServer import StandInServer
+
+    with StandInServer(LOCAL_SERVER_HOST, LOCAL_SERVER_PORT) as server:
+        yield server
+
+
+# One Playwright driver for the whole run, shared by the API suites and the E2E suite
+# (overrides pytest-playwright's playwright fixture to measure the start-up)
+@pytest.fixture(scope="session")
+def playwright(_pw_api_request_contexts):
+    from playwright.sync_api import sync_playwright
+
+    started = time.monotonic()
+    runtime = sync_playwright().start()
+    if _pw_api_request_contexts:
+        _pw_api_request_contexts.instrument(runtime)
+    RUNTIME_STATS["driver_s"] = time.monotonic() - started
+    yield runtime
+    runtime.stop()
+
+
+# Browser launched on first use only: runs of the API suites or HTTP-tier checks never start one
+@pytest.fixture(scope="session")
+def browser(launch_browser):
+    started = time.monotonic()
+    browser = launch_browser()
+    RUNTIME_STATS["browser_s"] = time.monotonic() - started
+    yield browser
+    browser.close()
+
+
+# API request context wrapped by the record/replay cassette (Tools/Cassette.py): Playwright's one
+# of the shared runtime, or with HTTP_CLIENT=pool the pooled http.client one (Tools/HttpPool.py)
+@pytest.fixture(scope="session")
+def api_context(request):
+    from Tools.Cassette import cassette_context
+
+    if HTTP_CLIENT == "pool":
+        from Tools.HttpPool import PooledRequestContext
+
+        context = PooledRequestContext()
+    else:
+        context = request.getfixturevalue("playwright").request.new_context()
+    yield cassette_context(context)
+    if HTTP_CLIENT == "pool":
+        RUNTIME_STATS["http_pool"] = context.stats()
+    context.dispose()
+
+
+# Registered accounts created over HTTP and refilled in the background (see Tools/AccountFactory.py)
+# Started on first use only, after the stand-in server; registers one account per collected test that takes one
+@pytest.fixture(scope="session")
+def account_factory(request, _local_server):
+    from Tools.AccountFactory import AccountFactory
+
+    demand = sum("account" in item.fixturenames for item in request.session.items)
+    factory = AccountFactory(ACCOUNT_POOL_SIZE, limit=demand).start()
+    yield factory
+    factory.stop()
+
+
+# Session-wide pool of pre-warmed browser contexts (see Tools/ContextPool.py)
+# Governed by the RSS watchdog (Tools/ResourceGovernor.py), which may restart the browser
+@pytest.fixture(scope="session")
+def context_pool(request, browser, browser_context_args, launch_browser):
+    from Tools.ContextPool import ContextPool
+
+    blocker = None
+    if RESOURCE_BLOCKING:
+        from Tools.ResourceBlocking import ResourceBlocker
+
+        blocker = ResourceBlocker()
+
+    pool = ContextPool(browser, CONTEXT_POOL_SIZE, browser_context_args, blocker=blocker, launch=launch_browser)
+    pool.warm_up()
+    governor = request.config.pluginmanager.get_plugin("resource_governor")
+    if governor:
+        governor.attach(pool)
+    yield pool
+    if governor:
+        governor.detach()
+    pool.close()
+    if pool.browser is not browser:
+        pool.browser.close()  # launched by a restart, the browser fixture closes the first one
+    print(f"\nContext pool: {pool.created} contexts created, {pool.reused} checkouts reused a warm context")
+    if blocker:
+        print(f"Resource blocking: {blocker.blocked} requests aborted, {blocker.stubbed} stubbed")
+
+
+# Overrides pytest-playwright's page: a clean context from the pool, already on the courses page
+# Resources blocked by the profile can be allowed per test with @pytest.mark.allow_resources(...)
+@pytest.fixture(scope="function")
+def page(request, context_pool):
+    marker = request.node.get_closest_marker("allow_resources")
+    allowed = bool(context_pool.blocker and marker)
+    if allowed:
+        context_pool.blocker.allow(*marker.args)
+    context, page = context_pool.checkout(reload=allowed)
+    yield page
+    # Reset before checkin, which warms the page up again for the next test
+    if allowed:
+        context_pool.blocker.allow()
+    context_pool.checkin(context, page)
@@ -4,38 +4,80 @@ Some E2E tests for course registration
 """
 
 import pytest
-from faker import Faker
 from playwright.sync_api import expect
 
 from Data_and_Config.TestData import *
 from Data_and_Config.Configuration import *
+from Tools.ContextPool import StorageStateCache
+from Tools.HttpTier import BrowserFormClient, EquivalenceClient, HttpFormClient
+from Tools.Identity import get_identity_pool
+from Tools.Tracing import traced
+from Tools.WaitScheduler import page_key, waits
 
 # Fixtures
 
 
+# Fresh identity (name, email, password) from the pre-generated pool, never handed out twice
 @pytest.fixture(scope="function")
-def fake():
-    return Faker("cs_CZ")
+def identity():
+    return get_identity_pool().next()
+
+
+# Already registered (and logged out) account from the account factory, created over HTTP
+@pytest.fixture(scope="function")
+def account(account_factory):
+    return account_factory.take()
+
+
+# Client of the server-side validation checks: plain HTTP (Tools/HttpTier.py), no browser needed
+# With --tier-equivalence the checks drive the browser too and both tiers must render the same page
+@pytest.fixture(scope="function")
+def form_client(request):
+    client = HttpFormClient()
+    if request.config.getoption("tier_equivalence"):
+        client = EquivalenceClient(client, BrowserFormClient(request.getfixturevalue("page")))
+    return client
 
 
 # Fixture that ensures opening the courses page before the test
-# and attempts to log out the user after the test (if logged in)
+# and logs out the user after the test (if logged in)
+# Pages from the context pool are already on the courses page, so the navigation is skipped for them
 @pytest.fixture(scope="function")
 def _setup_and_teardown_login(page):
     page.set_default_timeout(TIMEOUT_BROWSER)
-    page.goto(URL_COURSES)
+    if page.url != URL_COURSES:
+        page.goto(URL_COURSES)
     expect(page).to_have_title(TITLE_COURSES)
     yield  # page is not returned, page is a separate fixture in tests
     try:
-        logout(page)
+        if page.locator(LOCATOR_LOGOUT_BUTTON).count():
+            logout(page)
     except Exception:
         # If not logged in/cannot click, skip the error
         pass
 
 
+# Login of USER1 saved once per session and restored into pooled contexts
+@pytest.fixture(scope="session")
+def user1_storage_state():
+    return StorageStateCache(lambda page: login_with_verification(page, USER1_EMAIL, USER1_PASSWORD, True))
+
+
+# Page of a pooled context already logged in as USER1, skips the login form
+# If the test logs the user out, the saved session is dropped and recreated for the next test
+@pytest.fixture(scope="function")
+def authenticated_page(context_pool, user1_storage_state):
+    context, page = context_pool.checkout(storage_state=user1_storage_state.get(context_pool))
+    yield page
+    if not page.locator(LOCATOR_LOGOUT_BUTTON).count():
+        user1_storage_state.invalidate()
+    context_pool.checkin(context, page)
+
+
 # Helper functions
 
 
+@traced
 def login_with_verification(page, email, password, should_be_logged_in):
 
     login_without_verification(page, email, password)
@@ -45,6 +87,7 @@ def login_with_verification(page, email, password, should_be_logged_in):
         verify_user_is_not_logged_in(page)
 
 
+@traced
 def login_without_verification(page, email, password):
     # page.pause()
     print(PRINT_LOGGING_IN_USER.format(email=email, password=password))
@@ -54,38 +97,57 @@ def login_without_verification(page, email, password):
     page.click(LOCATOR_LOGIN_BUTTON)
 
 
+# Waits below use per-page adaptive timeouts learned from previous runs (Tools/WaitScheduler.py)
+
+
+@traced
 def verify_user_is_logged_in(page):
-    expect(page.locator(LOCATOR_LOGOUT_BUTTON).first).to_have_text(TEXT_LOGOUT_BUTTON)
+    logout_button = page.locator(LOCATOR_LOGOUT_BUTTON).first
+    waits.run(
+        page_key("logged_in", page),
+        lambda timeout: expect(logout_button).to_have_text(TEXT_LOGOUT_BUTTON, timeout=timeout),
+    )
 
 
+@traced
 def verify_user_is_not_logged_in(page):
-    expect(page.locator(LOCATOR_LOGIN_LINK).first).to_have_text(TEXT_LOGIN_LINK)
+    login_link = page.locator(LOCATOR_LOGIN_LINK).first
+    waits.run(
+        page_key("logged_out", page),
+        lambda timeout: expect(login_link).to_have_text(TEXT_LOGIN_LINK, timeout=timeout),
+    )
 
 
+@traced
 def logout(page):
-    page.locator(LOCATOR_LOGOUT_BUTTON).click()
+    logout_button = page.locator(LOCATOR_LOGOUT_BUTTON)
+    waits.run(page_key("logout", page), lambda timeout: logout_button.click(timeout=timeout))
     print("User logged out")
     verify_user_is_not_logged_in(page)
 
 
+@traced
 def open_login_page(page):
     page.locator(LOCATOR_LOGIN_LINK).click()
 
 
+@traced
 def open_registration_page(page):
     open_login_page(page)
     page.locator(LOCATOR_REGISTER_LINK).click()
 
 
+@traced
 def open_forgot_password_page(page):
     open_registration_page(page)
     page.locator(LOCATOR_FORGOT_PASSWORD_LINK).click()
 
 
-def register_user(page, fake):
-    fake_name = fake.first_name()
-    fake_email = fake.unique.email()
-    fake_password = fake.password(length=10, special_chars=True, digits=True, upper_case=True, lower_case=True)
+@traced
+def register_user(page, identity):
+    fake_name = identity.name
+    fake_email = identity.email
+    fake_password = identity.password
     print(PRINT_REGISTERING_USER.format(fake_name=fake_name, fake_email=fake_email, fake_password=fake_password))
     open_registration_page(page)
     page.fill(LOCATOR_NAME_INPUT, fake_name)
@@ -93,37 +155,55 @@ def register_user(page, fake):
     page.fill(LOCATOR_PASSWORD_INPUT, fake_password)
     page.fill(LOCATOR_PASSWORD_AGAIN_INPUT, fake_password)
     page.click(LOCATOR_REGISTER_BUTTON)
+    waits.run("register:/home", lambda timeout: expect(page).to_have_url(URL_HOME, timeout=timeout))
     expect(page.locator(LOCATOR_LOGOUT_BUTTON)).to_have_text(TEXT_LOGOUT_BUTTON)
     expect(page.locator(LOCATOR_HOME_SECTION)).to_contain_text(WELCOME_USER.format(fake_name=fake_name))
-    expect(page).to_have_url(URL_HOME)
 
     return fake_email, fake_password, fake_name
 
 
+# Server-side validation checks, run over HTTP by default (see the form_client fixture)
+
+
+def submit_login(client, email, password):
+    print(PRINT_LOGGING_IN_USER.format(email=email, password=password))
+    client.submit(URL_LOGIN, email=email, password=password)
+
+
+def submit_registration(client, name, email, password, password_again):
+    client.submit(URL_REGISTER, name=name, email=email, password=password, password_confirmation=password_again)
+
+
 # Tests
 
 
-def test_login_invalid_email(page, _setup_and_teardown_login):
-    login_with_verification(page, "dsadsad@sdas.cz", "dasdas", False)
-    expect(page.locator(LOCATOR_EMAIL_INPUT_ERRORS)).to_have_text(ERROR_INVALID_CREDENTIALS)
+def test_login_invalid_email(form_client):
+    submit_login(form_client, "dsadsad@sdas.cz", "dasdas")
+    assert form_client.text(LOCATOR_EMAIL_INPUT_ERRORS) == ERROR_INVALID_CREDENTIALS
+    assert not form_client.is_logged_in()
     print("✅ test_login_invalid_email completed")
 
 
-def test_login_invalid_password(page, _setup_and_teardown_login):
-    login_with_verification(page, "janca.tester@seznam.cz", "dasdas", False)
-    expect(page.locator(LOCATOR_EMAIL_INPUT_ERRORS)).to_have_text(ERROR_INVALID_CREDENTIALS)
+@pytest.mark.shared_account
+def test_login_invalid_password(form_client):
+    submit_login(form_client, "janca.tester@seznam.cz", "dasdas")
+    assert form_client.text(LOCATOR_EMAIL_INPUT_ERRORS) == ERROR_INVALID_CREDENTIALS
+    assert not form_client.is_logged_in()
     print("✅ test_login_invalid_password completed")
 
 
-def test_login_long_invalid_password(page, _setup_and_teardown_login):
-    login_with_verification(page, "janca.tester@seznam.cz", "d" * 100, False)
-    expect(page.locator(LOCATOR_EMAIL_INPUT_ERRORS)).to_have_text(ERROR_INVALID_CREDENTIALS)
+@pytest.mark.shared_account
+def test_login_long_invalid_password(form_client):
+    submit_login(form_client, "janca.tester@seznam.cz", "d" * 100)
+    assert form_client.text(LOCATOR_EMAIL_INPUT_ERRORS) == ERROR_INVALID_CREDENTIALS
+    assert not form_client.is_logged_in()
     print("✅ test_login_long_invalid_password completed")
 
 
-def test_login_long_invalid_email(page, _setup_and_teardown_login):
-    login_with_verification(page, LONG_INVALID_EMAIL, USER1_PASSWORD, False)
-    expect(page.locator(LOCATOR_EMAIL_INPUT_ERRORS)).to_have_text(ERROR_INVALID_CREDENTIALS)
+def test_login_long_invalid_email(form_client):
+    submit_login(form_client, LONG_INVALID_EMAIL, USER1_PASSWORD)
+    assert form_client.text(LOCATOR_EMAIL_INPUT_ERRORS) == ERROR_INVALID_CREDENTIALS
+    assert not form_client.is_logged_in()
     print("✅ test_login_long_invalid_email completed")
 
 
@@ -135,46 +215,79 @@ def test_login_script_injection_email(page, _setup_and_teardown_login):
     print("✅ test_login_script_injection_email completed")
 
 
-def test_login_special_chars_password(page, _setup_and_teardown_login):
-    login_with_verification(page, USER1_EMAIL, SPECIAL_CHARS_PASSWORD, False)
-    expect(page.locator(LOCATOR_EMAIL_INPUT_ERRORS)).to_have_text(ERROR_INVALID_CREDENTIALS)
+@pytest.mark.shared_account
+def test_login_special_chars_password(form_client):
+    submit_login(form_client, USER1_EMAIL, SPECIAL_CHARS_PASSWORD)
+    assert form_client.text(LOCATOR_EMAIL_INPUT_ERRORS) == ERROR_INVALID_CREDENTIALS
+    assert not form_client.is_logged_in()
     print("✅ test_login_special_chars_password completed")
 
 
-def test_login_empty_credentials(page, _setup_and_teardown_login):
-    login_with_verification(page, EMPTY, EMPTY, False)
-    expect(page.locator(LOCATOR_EMAIL_INPUT_ERRORS)).to_have_text(ERROR_EMAIL_REQUIRED)
-    expect(page.locator(LOCATOR_PASSWORD_INPUT_ERRORS)).to_have_text(ERROR_PASSWORD_REQUIRED)
+def test_login_empty_credentials(form_client):
+    submit_login(form_client, EMPTY, EMPTY)
+    assert form_client.text(LOCATOR_EMAIL_INPUT_ERRORS) == ERROR_EMAIL_REQUIRED
+    assert form_client.text(LOCATOR_PASSWORD_INPUT_ERRORS) == ERROR_PASSWORD_REQUIRED
+    assert not form_client.is_logged_in()
     print("✅ test_login_empty_credentials completed")
 
 
-def test_login_empty_email(page, _setup_and_teardown_login):
-    login_with_verification(page, EMPTY, USER1_PASSWORD, False)
-    expect(page.locator(LOCATOR_EMAIL_INPUT_ERRORS)).to_have_text(ERROR_EMAIL_REQUIRED)
+def test_login_empty_email(form_client):
+    submit_login(form_client, EMPTY, USER1_PASSWORD)
+    assert form_client.text(LOCATOR_EMAIL_INPUT_ERRORS) == ERROR_EMAIL_REQUIRED
+    assert not form_client.is_logged_in()
     print("✅ test_login_empty_email completed")
 
 
-def test_login_empty_password(page, _setup_and_teardown_login):
-    login_with_verification(page, USER1_EMAIL, EMPTY, False)
-    expect(page.locator(LOCATOR_PASSWORD_INPUT_ERRORS)).to_have_text(ERROR_PASSWORD_REQUIRED)
+def test_login_empty_password(form_client):
+    submit_login(form_client, USER1_EMAIL, EMPTY)
+    assert form_client.text(LOCATOR_PASSWORD_INPUT_ERRORS) == ERROR_PASSWORD_REQUIRED
+    assert not form_client.is_logged_in()
     print("✅ test_login_empty_password completed")
 
 
+@pytest.mark.shared_account
 def test_login_success(page, _setup_and_teardown_login):
     login_with_verification(page, USER1_EMAIL, USER1_PASSWORD, True)
     print("✅ test_login_success completed")
 
 
+@pytest.mark.shared_account
 def test_login_success_with_external_verification(page, _setup_and_teardown_login):
     login_without_verification(page, USER1_EMAIL, USER1_PASSWORD)
     verify_user_is_logged_in(page)
     print("✅ test_login_success_with_external_verification completed")
 
 
+# Tests below start logged in from the saved login of USER1 (authenticated_page), only the logout test drops it
+
+
+@pytest.mark.shared_account
+def test_login_session_survives_reload(authenticated_page):
+    authenticated_page.reload()
+    verify_user_is_logged_in(authenticated_page)
+    print("✅ test_login_session_survives_reload completed")
+
+
+@pytest.mark.shared_account
+def test_logged_in_user_is_redirected_from_login_page(authenticated_page):
+    authenticated_page.goto(URL_LOGIN)
+    expect(authenticated_page).to_have_url(URL_HOME)
+    expect(authenticated_page.locator(LOCATOR_HOME_SECTION)).to_be_visible()
+    verify_user_is_logged_in(authenticated_page)
+    print("✅ test_logged_in_user_is_redirected_from_login_page completed")
+
+
+@pytest.mark.shared_account
+def test_logout_success(authenticated_page):
+    verify_user_is_logged_in(authenticated_page)
+    logout(authenticated_page)
+    print("✅ test_logout_success completed")
+
+
 # verify that user is logged in with new credentials,
 # logout and re-login with new credentials and verify that user is logged in
-def test_registration_success(page, fake, _setup_and_teardown_login):
-    email, password, name = register_user(page, fake)
+def test_registration_success(page, identity, _setup_and_teardown_login):
+    email, password, name = register_user(page, identity)
     logout(page)
 
     # Re-login with new credentials
@@ -182,31 +295,39 @@ def test_registration_success(page, fake, _setup_and_teardown_login):
     print("✅ test_registration_success completed")
 
 
-def test_registration_empty_fields(page, _setup_and_teardown_login):
-    open_registration_page(page)
-    page.click(LOCATOR_REGISTER_BUTTON)
-    expect(page.locator(LOCATOR_NAME_INPUT_ERRORS)).to_have_text(ERROR_NAME_REQUIRED)
-    expect(page.locator(LOCATOR_EMAIL_INPUT_ERRORS)).to_have_text(ERROR_EMAIL_REQUIRED)
-    expect(page.locator(LOCATOR_PASSWORD_INPUT_ERRORS)).to_have_text(ERROR_PASSWORD_REQUIRED)
-    verify_user_is_not_logged_in(page)
+# test_registration_success as concurrent pages of one browser (Tools/AsyncE2E.py), every one in its own context
+# The runner launches its own (async) browser next to the session one while the test runs
+# It registers 2 * E2E_CONCURRENCY accounts, so it runs on the stand-in server only
+@pytest.mark.skipif(not LOCAL_SERVER, reason="registers 2 * E2E_CONCURRENCY accounts, LOCAL_SERVER=1 only")
+def test_registration_success_concurrent(browser_name, browser_type_launch_args):
+    from Tools.AsyncE2E import ScenarioRunner, assert_scenarios, registration_scenario
+
+    pool = get_identity_pool()
+    scenarios = {f"registration-{index}": registration_scenario(pool.next()) for index in range(2 * E2E_CONCURRENCY)}
+    runner = ScenarioRunner(browser_name=browser_name, launch_args=browser_type_launch_args)
+    results = runner.run(scenarios)
+    assert_scenarios(results)
+    print(f"✅ {len(results)} registrations in {runner.elapsed:.2f} s, up to {runner.peak} at a time")
+
+
+def test_registration_empty_fields(form_client):
+    submit_registration(form_client, EMPTY, EMPTY, EMPTY, EMPTY)
+    assert form_client.text(LOCATOR_NAME_INPUT_ERRORS) == ERROR_NAME_REQUIRED
+    assert form_client.text(LOCATOR_EMAIL_INPUT_ERRORS) == ERROR_EMAIL_REQUIRED
+    assert form_client.text(LOCATOR_PASSWORD_INPUT_ERRORS) == ERROR_PASSWORD_REQUIRED
+    assert not form_client.is_logged_in()
     print("✅ test_registration_empty_fields completed")
 
 
-def test_registration_existing_email(page, fake, _setup_and_teardown_login):
+def test_registration_existing_email(form_client, account):
 
-    # First registration - successful
-    email, password, name = register_user(page, fake)
-    logout(page)
+    # First registration - done over HTTP by the account factory
+    email, password, name = account.email, account.password, account.name
 
     # Second registration with the same email - expecting error
-    open_registration_page(page)
-    page.fill(LOCATOR_NAME_INPUT, name)
-    page.fill(LOCATOR_EMAIL_INPUT, email)
-    page.fill(LOCATOR_PASSWORD_INPUT, password)
-    page.fill(LOCATOR_PASSWORD_AGAIN_INPUT, password)
-    page.click(LOCATOR_REGISTER_BUTTON)
-    expect(page.locator(LOCATOR_EMAIL_INPUT_ERRORS)).to_have_text(ERROR_EMAIL_TAKEN)
-    verify_user_is_not_logged_in(page)
+    submit_registration(form_client, name, email, password, password)
+    assert form_client.text(LOCATOR_EMAIL_INPUT_ERRORS) == ERROR_EMAIL_TAKEN
+    assert not form_client.is_logged_in()
     print("✅ test_registration_existing_email completed")
 
 
@@ -232,46 +353,47 @@ def test_registration_invalid_email_format(page, _setup_and_teardown_login):
     print("✅ test_registration_invalid_email_format completed")
 
 
-def test_registration_password_mismatch(page, _setup_and_teardown_login):
+def test_registration_password_mismatch(form_client):
     name = "Test"
     email = "testovy.email@example.com"
     password = "SpravneHeslo"
     password_mismatch = "JineHeslo"
 
-    open_registration_page(page)
-    page.fill(LOCATOR_NAME_INPUT, name)
-    page.fill(LOCATOR_EMAIL_INPUT, email)
-    page.fill(LOCATOR_PASSWORD_INPUT, password)
-    page.fill(LOCATOR_PASSWORD_AGAIN_INPUT, password_mismatch)
-    page.click(LOCATOR_REGISTER_BUTTON)
-    expect(page.locator(LOCATOR_PASSWORD_INPUT_ERRORS)).to_have_text(ERROR_PASSWORD_CONFIRMATION)
+    submit_registration(form_client, name, email, password, password_mismatch)
+    assert form_client.text(LOCATOR_PASSWORD_INPUT_ERRORS) == ERROR_PASSWORD_CONFIRMATION
 
-    verify_user_is_not_logged_in(page)
+    assert not form_client.is_logged_in()
     print("✅ test_registration_password_mismatch completed")
 
 
-def test_forgot_password_success(page, _setup_and_teardown_login):
-    email = "rostislavjelinek@example.com"  # registered email
-
+# The HTTP-tier checks below open the form by its URL, this one follows the links to it
+def test_forgot_password_link(page, _setup_and_teardown_login):
     open_forgot_password_page(page)
-    # page.goto(URL_FORGOT_PASSWORD)
-
+    expect(page).to_have_url(URL_FORGOT_PASSWORD)
     expect(page).to_have_title(TITLE_FORGOT_PASSWORD)
-    page.fill(LOCATOR_EMAIL_INPUT, email)
-    page.click(LOCATOR_SUBMIT_BUTTON)
+    expect(page.locator(LOCATOR_EMAIL_INPUT)).to_be_visible()
+    print("✅ test_forgot_password_link completed")
+
+
+@pytest.mark.shared_account
+def test_forgot_password_success(form_client):
+    email = "rostislavjelinek@example.com"  # registered email
 
-    expect(page.locator(LOCATOR_STATUS_DIV)).to_have_text(STATUS_PASSWORD_RESET_SENT)
+    form_client.open(URL_FORGOT_PASSWORD)
+    assert form_client.title == TITLE_FORGOT_PASSWORD
+    form_client.submit(URL_FORGOT_PASSWORD, email=email)
+
+    assert form_client.text(LOCATOR_STATUS_DIV) == STATUS_PASSWORD_RESET_SENT
     print("✅ test_forgot_password_success completed")
 
 
 # @pytest.mark.skip
-def test_forgot_password_nonexistent_email(page, _setup_and_teardown_login):
+def test_forgot_password_nonexistent_email(form_client):
     nonexistent_email = "jancin_neznamy@email.cz"
 
-    open_forgot_password_page(page)
-    expect(page).to_have_title(TITLE_FORGOT_PASSWORD)
-    page.fill(LOCATOR_EMAIL_INPUT, nonexistent_email)
-    page.click(LOCATOR_SUBMIT_BUTTON)
+    form_client.open(URL_FORGOT_PASSWORD)
+    assert form_client.title == TITLE_FORGOT_PASSWORD
+    form_client.submit(URL_FORGOT_PASSWORD, email=nonexistent_email)
 
-    expect(page.locator(LOCATOR_EMAIL_INPUT_ERRORS)).to_have_text(ERROR_USER_NOT_FOUND)
+    assert form_client.text(LOCATOR_EMAIL_INPUT_ERRORS) == ERROR_USER_NOT_FOUND
     print("✅ test_forgot_password_nonexistent_email completed")
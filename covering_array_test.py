@@ -0,0 +1,40 @@
+"""
+Tests of the covering array generator
+
+"""
+
+import itertools
+
+import pytest
+
+from Tools.CoveringArray import FACTORS, CaseMatrix, all_combinations, covering_array, lower_bound
+
+
+@pytest.mark.parametrize("strength", [2, 3])
+def test_every_combination_is_covered(strength):
+    levels = [3, 2, 2, 3, 3, 2, 2, 2]
+    rows = covering_array(levels, strength, restarts=2)
+    covered = {
+        (factors, tuple(row[factor] for factor in factors))
+        for row in rows
+        for factors in itertools.combinations(range(len(levels)), strength)
+    }
+    assert covered == all_combinations(levels, strength)
+    product = 1
+    for count in levels:
+        product *= count
+    assert lower_bound(levels, strength) <= len(rows) < product
+
+
+def test_each_invalid_class_gets_one_case_with_a_single_invalid_value():
+    matrix = CaseMatrix()
+    cases = matrix.generate(strength=2)
+    invalid = {name: set(FACTORS[name][1]) for name in FACTORS}
+    counts = {}
+    for _, classes, fields, _ in cases:
+        wrong = [name for name, class_name in classes.items() if class_name in invalid[name]]
+        assert len(wrong) <= 1
+        for name in wrong:
+            counts[classes[name]] = counts.get(classes[name], 0) + 1
+        assert ("address" in fields) == (fields["person"] == "fyz")
+    assert counts == {class_name: 1 for classes in invalid.values() for class_name in classes}
@@ -0,0 +1,52 @@
+"""
+Tests of the structured API exchange log
+
+"""
+
+import json
+from types import SimpleNamespace
+
+from Tools.ExchangeLog import ExchangeLog
+
+
+def _response(status, body):
+    return SimpleNamespace(status=status, body=lambda: body)
+
+
+def test_records_are_written_in_background_with_long_fields_truncated(tmp_path):
+    log = ExchangeLog(str(tmp_path / "exchanges.jsonl"), level=2)
+    log.record("POST", "http://host/form", {"comment": "x" * 1000, "name": "Jan"}, _response(200, b'{"result":"ok"}'))
+    log.close()
+
+    record = json.loads((tmp_path / "exchanges.jsonl").read_text(encoding="utf-8"))
+    assert record["status"] == 200
+    assert record["request"]["body"]["name"] == "Jan"
+    assert record["request"]["body"]["comment"]["length"] == 1000
+    assert len(record["request"]["body"]["comment"]["truncated"]) == 256
+    assert record["response"]["body"] == {"result": "ok"}
+
+
+def test_bytes_payload_is_logged_as_the_request(tmp_path):
+    log = ExchangeLog(str(tmp_path / "exchanges.jsonl"), level=2)
+    log.record("POST", "http://host/form", b"kurz=2&name=Jan", _response(500, b"error"))
+    log.close()
+
+    record = json.loads((tmp_path / "exchanges.jsonl").read_text(encoding="utf-8"))
+    assert (record["request"]["body"], record["response"]["body"]) == ("kurz=2&name=Jan", "error")
+
+
+def test_summary_level_has_no_bodies(tmp_path):
+    log = ExchangeLog(str(tmp_path / "exchanges.jsonl"), level=1)
+    log.record("POST", "http://host/form", {"name": "Jan"}, _response(500, b"error"))
+    log.close()
+
+    record = json.loads((tmp_path / "exchanges.jsonl").read_text(encoding="utf-8"))
+    assert record["response"] == {"size": 5, "sha256": record["response"]["sha256"]}
+
+
+def test_full_text_is_rendered_on_demand(tmp_path):
+    log = ExchangeLog(str(tmp_path / "exchanges.jsonl"), level=0)
+    exchange = log.record("POST", "http://host/form", {"name": "Jan"}, _response(500, b"Server error"))
+    message = exchange.render("Expected 200, got 500")
+    assert '"name": "Jan"' in message and "Body: Server error" in message
+    assert not (tmp_path / "exchanges.jsonl").exists()
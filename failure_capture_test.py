@@ -0,0 +1,100 @@
+"""
+Tests of the failure capture ring buffer without a browser
+
+"""
+
+import gzip
+import json
+
+from Tools import FailureCapture as failure_capture_module
+from Tools.FailureCapture import FailureCapture, RingBuffer, _captured_method
+
+
+class FakePage:
+    url = "http://127.0.0.1/courses"
+
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def remove_listener(self, event, handler):
+        del self.handlers[event]
+
+    def content(self):
+        return "<html><body data-test='courses'></body></html>"
+
+    def screenshot(self, **kwargs):
+        return b"\xff\xd8jpeg"
+
+    def goto(self, url):
+        self.url = url
+
+
+class FakeResponse:
+    status = 500
+    url = "http://127.0.0.1/regkurz/formsave.php"
+
+
+def test_ring_buffer_keeps_the_latest_events_under_both_caps():
+    buffer = RingBuffer(max_events=3, max_bytes=10000)
+    for index in range(5):
+        buffer.add("action", index=index)
+    assert [json.loads(line)["index"] for line in buffer.lines()] == [2, 3, 4]
+    assert buffer.dropped == 2
+
+    buffer = RingBuffer(max_events=100, max_bytes=1000)
+    buffer.add("dom", html="x" * 5000)
+    assert json.loads(buffer.lines()[0])["truncated"] is True
+    for index in range(50):
+        buffer.add("action", index=index)
+    assert buffer.size <= 1000
+
+
+def test_only_failed_tests_are_written(tmp_path):
+    capture = FailureCapture(str(tmp_path), max_disk=10**6)
+    page = FakePage()
+
+    capture.begin("suite.py::test_passes")
+    capture.watch(page)
+    capture.record("action", name="Page.goto")
+    assert capture.finish(failed=False) is None
+    assert page.handlers == {}
+
+    capture.begin("suite.py::test_fails")
+    capture.watch(page)
+    page.handlers["response"](FakeResponse())
+    capture.capture_failure()
+    path = capture.finish(failed=True)
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        header, *events = [json.loads(line) for line in file]
+    assert header["test"] == "suite.py::test_fails"
+    assert [event["kind"] for event in events] == ["response", "screenshot", "dom"]
+    assert list(tmp_path.iterdir()) == [tmp_path / "suite.py_test_fails.jsonl.gz"]
+
+
+def test_disk_cap_of_the_run(tmp_path):
+    capture = FailureCapture(str(tmp_path), max_disk=1)
+    capture.begin("suite.py::test_fails")
+    capture.watch(FakePage())
+    assert capture.finish(failed=True) is None
+    assert capture.skipped == ["suite.py::test_fails"]
+
+
+def test_wrapped_action_is_recorded_with_a_dom_snapshot(tmp_path, monkeypatch):
+    capture = FailureCapture(str(tmp_path), max_disk=10**6)
+    monkeypatch.setattr(failure_capture_module, "failure_capture", capture)
+    monkeypatch.setattr(FakePage, "goto", _captured_method(FakePage.goto, "Page", "navigation"))
+    page = FakePage()
+
+    capture.begin("suite.py::test_fails")
+    page.goto("http://127.0.0.1/home")
+    events = [json.loads(line) for line in capture.buffer.lines()]
+    assert [(event["kind"], event.get("name") or event.get("reason")) for event in events] == [
+        ("action", "Page.goto"),
+        ("dom", "Page.goto"),
+    ]
+    assert events[1]["url"] == "http://127.0.0.1/home"
+    assert set(page.handlers) == {"request", "response", "requestfailed", "console", "pageerror"}
+    capture.finish(failed=False)
@@ -0,0 +1,66 @@
+"""
+Tests of the flakiness tracker (failure signatures, flaky signatures, flake rates)
+
+"""
+
+from types import SimpleNamespace
+
+import Tools.Flakiness as flakiness_module
+from Tools.Flakiness import FlakinessStore, FlakinessTracker, failure_signature
+
+
+def _report(message):
+    return SimpleNamespace(longrepr=SimpleNamespace(reprcrash=SimpleNamespace(message=message)))
+
+
+def test_signature_of_playwright_timeout_names_the_locator():
+    message = (
+        "playwright._impl._errors.TimeoutError: Locator.click: Timeout 3000ms exceeded.\n"
+        "Call log:\n  - waiting for locator(\"[data-test=logout_button]\")"
+    )
+    assert failure_signature(_report(message)) == "TimeoutError @ [data-test=logout_button]"
+
+
+def test_signature_ignores_volatile_values():
+    first = failure_signature(_report("AssertionError: assert 'abc@x.cz' == 500"))
+    second = failure_signature(_report("AssertionError: assert 'def@y.cz' == 404"))
+    assert first == second == "AssertionError: assert N == N"
+
+
+def test_only_intermittent_failures_are_flaky(tmp_path):
+    store = FlakinessStore(str(tmp_path / "flakiness.sqlite"))
+    broken = ("t.py::test_broken", 0, "failed", "E: b")
+    retried, retried_passed = ("t.py::test_retried", 0, "failed", "T @ a"), ("t.py::test_retried", 1, "passed", None)
+    regressed = ("t.py::test_regressed", 0, "failed", "E: c")
+    regressed_passed = ("t.py::test_regressed", 0, "passed", None)
+    interleaved = ("t.py::test_interleaved", 0, "failed", "E: c")
+    store.record([retried, broken, regressed_passed, interleaved], "r1")
+    store.record([retried_passed, broken, ("t.py::test_interleaved", 0, "passed", None)], "r2")
+    store.record([retried, retried_passed, regressed, interleaved], "r3")
+    store.record([regressed], "r4")
+
+    # A regression of a test that used to pass, and the same message on another test, are not flaky
+    assert store.known_flaky() == {("t.py::test_retried", "T @ a"), ("t.py::test_interleaved", "E: c")}
+    assert store.flake_rates() == [
+        ("t.py::test_retried", 3, 2, 2 / 3, ["T @ a"]),
+        ("t.py::test_interleaved", 3, 2, 2 / 3, ["E: c"]),
+    ]
+    assert store.quarantine(rate=0.1, min_runs=3) == store.flake_rates()
+    assert store.quarantine(rate=0.1, min_runs=4) == []
+    store.close()
+
+
+def test_run_without_attempts_keeps_the_quarantine_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(flakiness_module, "QUARANTINE_FILE", str(tmp_path / "quarantine.json"))
+    tracker = FlakinessTracker()
+    tracker.store = FlakinessStore(str(tmp_path / "flakiness.sqlite"))
+    collect_only = SimpleNamespace(config=SimpleNamespace(option=SimpleNamespace(collectonly=True)))
+    tracker.pytest_sessionfinish(collect_only)
+    tracker.attempts = [("t.py::test_a", 0, "passed", None)]
+    tracker.pytest_sessionfinish(collect_only)
+    assert not (tmp_path / "quarantine.json").exists()
+
+    collect_only.config.option.collectonly = False
+    tracker.pytest_sessionfinish(collect_only)
+    assert (tmp_path / "quarantine.json").read_text(encoding="utf-8") == "[]"
+    tracker.store.close()
@@ -0,0 +1,50 @@
+"""
+Tests of the formsave.php fuzzer (schema oracle, grouping, shrinking, corpus replay)
+
+"""
+
+import json
+
+from Tools.Fuzzer import Outcome, body_signature, fuzz, replay, shrink
+from Tools.RegistrationSchema import canonical_payload, expected_status, validation_error
+
+
+# Server with a bug: rejects a valid surname with diacritics
+def buggy_send(payloads):
+    outcomes = []
+    for payload in payloads:
+        error = validation_error(payload)
+        if error is None and "š" in str(payload.get("surname")):
+            error = "surname"
+        body = json.dumps({"result": "error", "message": error} if error else {"result": "ok", "id": 7})
+        outcomes.append(Outcome(payload, 500 if error else 200, body))
+    return outcomes
+
+
+def test_schema_oracle():
+    payload = canonical_payload()
+    assert expected_status(payload) == 200
+    assert expected_status(dict(payload, person="pra")) == 500
+    assert expected_status(dict(payload, person="pra", ico="25596641")) == 200
+    assert expected_status(dict(payload, phone="abcdefghi")) == 500
+
+
+def test_body_signature_ignores_ids():
+    assert body_signature('{"result": "ok", "id": 1}') == body_signature('{"result": "ok", "id": 42}')
+
+
+def test_unexpected_response_is_shrunk_to_the_single_cause():
+    payload = dict(canonical_payload(), surname="Novakščěšíů" * 3, name="Ann-Marie", count="25", comment="x")
+    reproducer = shrink(buggy_send([payload])[0], buggy_send)
+    assert reproducer.unexpected
+    assert reproducer.payload == dict(canonical_payload(), surname="š")
+
+
+def test_fuzz_reports_one_reproducer_per_unexpected_group_and_replays_it():
+    groups, reproducers = fuzz(500, seed=3, send_batch=buggy_send)
+    assert sum(groups.values()) == 500
+    assert [outcome.payload["surname"] for outcome in reproducers] == ["š"]
+
+    corpus = [{"payload": reproducers[0].payload, "status": 500, "signature": reproducers[0].signature}]
+    still, fixed = replay(corpus, buggy_send)
+    assert (len(still), len(fixed)) == (1, 0)
@@ -0,0 +1,121 @@
+"""
+Tests of the pooled HTTP client against the stand-in server
+
+"""
+
+import http.client
+import socket
+
+import pytest
+
+from Tools.HttpPool import ConnectionPool, PooledRequestContext
+from Tools.StandInServer import StandInServer
+
+VALID_PAYLOAD = {
+    "targetid": "",
+    "kurz": "1",
+    "name": "Jan",
+    "surname": "Novak",
+    "email": "jan.novak@abc.cz",
+    "phone": "608123123",
+    "person": "fyz",
+    "address": "Brno",
+    "count": "1",
+    "comment": "",
+    "souhlas": True,
+}
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StandInServer(port=0) as server:
+        yield server
+
+
+def test_sequential_requests_reuse_one_connection(server):
+    context = PooledRequestContext(size=4)
+    for _ in range(5):
+        response = context.post(f"{server.url}/regkurz/formsave.php", data=VALID_PAYLOAD)
+        assert response.status == 200
+        assert response.json()["result"] == "ok"
+    stats = context.stats()
+    context.dispose()
+    assert (stats["connections"], stats["requests"], stats["reuse_ratio"]) == (1, 5, 0.8)
+    assert stats["connect_ms"]["p50"] >= 0
+
+
+def test_without_keep_alive_every_request_opens_a_connection(server):
+    context = PooledRequestContext(size=4, keep_alive=False)
+    for _ in range(3):
+        assert context.get(f"{server.url}/login").status == 200
+    stats = context.stats()
+    context.dispose()
+    assert (stats["connections"], stats["reuse_ratio"]) == (3, 0.0)
+
+
+def test_dict_data_is_sent_as_json(server):
+    context = PooledRequestContext()
+    response = context.post(f"{server.url}/regkurz/formsave.php", data=dict(VALID_PAYLOAD, kurz="9"))
+    context.dispose()
+    assert response.status == 500
+    assert response.json()["result"] == "error"
+
+
+class FakeConnection:
+    def __init__(self, broken, sent, sock=None):
+        self.broken = broken
+        self.sent = sent
+        self.sock = sock
+        self.closed = False
+        self.stats = type("Stats", (), {"requests": 0})()
+
+    def request(self, method, path, body=None, headers=None):
+        self.sent.append(method)
+
+    def getresponse(self):
+        if self.broken:
+            raise http.client.RemoteDisconnected("Remote end closed connection without response")
+        return FakeResponse()
+
+    def close(self):
+        self.closed = True
+
+
+class FakeResponse:
+    status = 200
+    will_close = True
+
+    def read(self):
+        return b"ok"
+
+    def getheaders(self):
+        return []
+
+
+# A kept-alive connection that breaks after the request was written: the server may have processed it
+def test_only_idempotent_requests_are_sent_again_on_a_new_connection(monkeypatch):
+    sent = []
+    pool = ConnectionPool("http", "127.0.0.1", 1)
+    monkeypatch.setattr(pool, "_new_connection", lambda: FakeConnection(False, sent))
+
+    pool.idle.put(FakeConnection(True, sent))
+    assert pool.request("GET", "/login")[0] == 200
+    pool.idle.put(FakeConnection(True, sent))
+    with pytest.raises(http.client.RemoteDisconnected):
+        pool.request("POST", "/regkurz/formsave.php", b"{}")
+    assert sent == ["GET", "GET", "POST"]
+
+
+# A connection the server closed while it was idle (keep-alive timeout) is dropped before a POST is written to it
+def test_connections_closed_while_idle_are_not_reused(monkeypatch):
+    sent = []
+    pool = ConnectionPool("http", "127.0.0.1", 1)
+    monkeypatch.setattr(pool, "_new_connection", lambda: FakeConnection(False, sent))
+    client, server = socket.socketpair()
+    server.close()
+    stale = FakeConnection(True, sent, client)
+
+    pool.idle.put(stale)
+    assert pool.request("POST", "/regkurz/formsave.php", b"{}")[0] == 200
+    assert stale.closed and sent == ["POST"]
+    client.close()
@@ -0,0 +1,33 @@
+"""
+Tests of the data-test parsing of the HTTP tier
+
+"""
+
+import pytest
+
+from Tools.HttpTier import DataTestParser, data_test_name
+
+PAGE = (
+    '<html><head><title> Testování -  Přihlášení </title></head><body>'
+    '<form><input type="hidden" name="_token" value="abc&amp;1">'
+    '<input type="email" name="email" data-test="email_input" value="x">'
+    '<span class="error" data-test="email_input_errors">These credentials <b>do not</b> match.</span>'
+    '<br><img src="logo.svg"></form><a data-test="login_link">Přihlásit se</a></body></html>'
+)
+
+
+def test_parser_collects_texts_title_and_token():
+    parser = DataTestParser()
+    parser.feed(PAGE)
+    assert parser.title.strip() == "Testování -  Přihlášení"
+    assert parser.token == "abc&1"
+    assert parser.snapshot() == [
+        ("email_input_errors", "These credentials do not match."),
+        ("login_link", "Přihlásit se"),
+    ]
+
+
+def test_only_data_test_locators_are_supported():
+    assert data_test_name("[data-test=status_div]") == "status_div"
+    with pytest.raises(ValueError):
+        data_test_name("form button.submit")
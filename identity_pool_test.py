@@ -0,0 +1,38 @@
+"""
+Tests of the pre-generated identity pool
+
+"""
+
+import pytest
+
+from Tools import Identity
+from Tools.Identity import IdentityPool
+
+
+@pytest.fixture(scope="function", autouse=True)
+def identity_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Identity, "IDENTITY_DIR", str(tmp_path))
+    monkeypatch.setattr(Identity, "CURSOR_FILE", str(tmp_path / "cursor.json"))
+    monkeypatch.setattr(Identity, "LOCK_FILE", str(tmp_path / "cursor.lock"))
+    monkeypatch.setattr(Identity, "IDENTITY_BATCH_SIZE", 50)
+    return tmp_path
+
+
+def test_identities_are_complete():
+    identity = IdentityPool(block_size=8).next()
+    assert identity.name
+    assert "@" in identity.email
+    assert len(identity.password) == 10
+
+
+def test_pools_never_share_an_identity():
+    first, second = IdentityPool(block_size=8), IdentityPool(block_size=8)
+    emails = [pool.next().email for _ in range(60) for pool in (first, second)]
+    assert len(emails) == len(set(emails))
+
+
+def test_used_up_batches_are_removed(identity_dir):
+    pool = IdentityPool(block_size=50)
+    for _ in range(151):
+        pool.next()
+    assert len(list(identity_dir.glob("batch-*.bin"))) == 2
@@ -0,0 +1,23 @@
+"""
+Tests of the concurrent registration batch sender
+
+"""
+
+import socket
+
+import pytest
+
+from Tools.Registration import assert_batch, send_payload_batch
+
+
+# A request that fails (here: connection refused) fails its own case, the batch still returns every result
+def test_failed_requests_are_reported_per_case():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        url = f"http://127.0.0.1:{probe.getsockname()[1]}/regkurz/formsave.php"
+    cases = [{"id": f"case-{index}", "raw": "{}", "expected_status": 200} for index in range(3)]
+    results = send_payload_batch(cases, url=url)
+    assert [result.status for result in results] == [None, None, None]
+    assert all(result.error for result in results)
+    with pytest.raises(AssertionError, match="case-2: Expected 200, the request failed: Error"):
+        assert_batch(results)
@@ -0,0 +1,146 @@
+"""
+Tests of the context pool (recycling, saved logins) and the RSS watchdog without a browser
+
+"""
+
+import json
+import os
+
+from Tools.ContextPool import ContextPool
+from Tools.ResourceGovernor import ResourceGovernor, growth_per_100_tests, process_rss
+
+MB = 1024 * 1024
+
+
+class FakePage:
+    url = "http://127.0.0.1/courses"
+
+    def __init__(self):
+        self.visited = []
+        self.local_storage = {}
+
+    def goto(self, url):
+        self.url = url
+        self.visited.append(url)
+
+    def evaluate(self, script, items=None):
+        for item in items or []:
+            self.local_storage[(self.url.split("/")[2], item["name"])] = item["value"]
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self.cookies = []
+        self.closed = False
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    def new_page(self):
+        self.pages.append(FakePage())
+        return self.pages[-1]
+
+    def add_cookies(self, cookies):
+        self.cookies.extend(cookies)
+
+    def clear_cookies(self):
+        self.cookies = []
+
+    def clear_permissions(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.closed = False
+
+    def new_context(self, **kwargs):
+        return FakeContext()
+
+    def close(self):
+        self.closed = True
+
+
+def test_context_is_retired_after_max_uses():
+    pool = ContextPool(FakeBrowser(), size=1, start_url=FakePage.url, max_uses=3).warm_up()
+    first, _ = pool.idle[0]
+    for _ in range(3):
+        pool.checkin(*pool.checkout())
+    assert first.closed and pool.retired == 1
+    context, _ = pool.checkout()
+    assert context is not first and pool.created == 2
+
+
+def test_checkout_restores_cookies_and_local_storage():
+    pool = ContextPool(FakeBrowser(), size=1, start_url=FakePage.url).warm_up()
+    cookie = {"name": "laravel_session", "value": "abc", "url": "http://127.0.0.1"}
+    state = {
+        "cookies": [cookie],
+        "origins": [
+            {"origin": "http://127.0.0.1", "localStorage": [{"name": "token", "value": "1"}]},
+            {"origin": "http://cdn.test", "localStorage": [{"name": "consent", "value": "yes"}]},
+        ],
+    }
+    context, page = pool.checkout(storage_state=state)
+    assert context.cookies == [cookie]
+    assert page.local_storage == {("127.0.0.1", "token"): "1", ("cdn.test", "consent"): "yes"}
+    assert page.visited[-2:] == ["http://cdn.test", FakePage.url]
+
+
+def test_governor_recycles_and_restarts_above_the_thresholds(tmp_path):
+    browser = FakeBrowser()
+    pool = ContextPool(browser, size=2, start_url=FakePage.url, launch=FakeBrowser).warm_up()
+    # Driver + browser RSS in MB read by consecutive samples
+    readings = iter([100, 600, 300, 900, 800, 200])
+    governor = ResourceGovernor(
+        recycle_mb=500,
+        restart_mb=700,
+        cooldown=1,
+        path=str(tmp_path / "timeline.jsonl"),
+        sampler=lambda pool: {"harness": 0, "driver": 0, "browser": next(readings) * MB},
+    )
+    governor.attach(pool)
+
+    assert governor.after_test("a")["action"] is None
+    entry = governor.after_test("b")
+    assert (entry["action"], entry["rss_mb"]) == ("recycle", 300.0)
+    assert pool.retired == 2 and pool.browser is browser
+    entry = governor.after_test("c")
+    assert (entry["action"], entry["rss_mb"]) == ("restart", 200.0)
+    assert browser.closed and pool.browser is not browser and len(pool.idle) == 2
+    governor.close()
+
+    with open(governor.path, encoding="utf-8") as file:
+        assert [json.loads(line)["test"] for line in file] == ["a", "b", "c"]
+
+
+# Memory the pool cannot free (e.g. another browser) must not recycle and restart after every test
+def test_governor_cools_down_and_stops_restarts_that_free_nothing(tmp_path):
+    pool = ContextPool(FakeBrowser(), size=1, start_url=FakePage.url, launch=FakeBrowser).warm_up()
+    readings = iter([900, 900, 880, 900, 900, 900, 900, 900])
+    governor = ResourceGovernor(
+        recycle_mb=500,
+        restart_mb=700,
+        cooldown=3,
+        path=str(tmp_path / "timeline.jsonl"),
+        sampler=lambda pool: {"harness": 0, "driver": 0, "browser": next(readings) * MB},
+    )
+    governor.attach(pool)
+    actions = [governor.after_test(test)["action"] for test in "abcd"]
+    governor.close()
+
+    assert actions == ["restart", None, None, "recycle"]
+    assert pool.restarts == 1 and not governor.restarts_help
+
+
+def test_growth_and_process_tree():
+    flat = [{"rss_mb": 300 + index % 3} for index in range(200)]
+    leaking = [{"rss_mb": 300 + index} for index in range(200)]
+    assert abs(growth_per_100_tests(flat)) < 1
+    assert growth_per_100_tests(leaking) == 100
+    if os.path.isdir("/proc/self"):
+        assert process_rss(os.getpid())["driver"] > 0
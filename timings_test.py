@@ -0,0 +1,37 @@
+"""
+Tests of the timing store and the longest-first scheduler
+
+"""
+
+from Tools.Timings import TimingStore, estimate, schedule_longest_first
+
+
+def test_longest_first_balances_workers():
+    estimates = {"a": 7.0, "b": 5.0, "c": 4.0, "d": 3.0, "e": 1.0}
+    shards, loads = schedule_longest_first(list(estimates), 2, estimates)
+    assert sorted(loads) == [10.0, 10.0]
+    assert sorted(nodeid for shard in shards for nodeid in shard) == sorted(estimates)
+
+
+def test_pinned_tests_stay_on_worker_zero():
+    estimates = {"pinned": 6.0, "a": 3.0, "b": 3.0}
+    shards, loads = schedule_longest_first(["a", "b"], 2, estimates, pinned=["pinned"])
+    assert shards == [["pinned"], ["a", "b"]]
+    assert loads == [6.0, 6.0]
+
+
+def test_new_tests_are_estimated_from_their_module():
+    samples = {"x_test.py::test_a": [2.0, 4.0], "y_test.py::test_b": [10.0]}
+    estimates = estimate(["x_test.py::test_a", "x_test.py::test_new", "z_test.py::test_other"], samples)
+    assert estimates["x_test.py::test_a"] == 3.0
+    assert estimates["x_test.py::test_new"] == 3.0
+    assert estimates["z_test.py::test_other"] == 6.5
+
+
+def test_store_keeps_recent_samples(tmp_path, monkeypatch):
+    monkeypatch.setattr("Tools.Timings.TIMINGS_KEEP", 3)
+    store = TimingStore(str(tmp_path / "timings.sqlite"))
+    for index in range(5):
+        store.record([("t.py::test_a", "passed", float(index)), ("t.py::test_b", "skipped", 0.0)])
+    assert store.samples() == {"t.py::test_a": [2.0, 3.0, 4.0]}
+    store.close()
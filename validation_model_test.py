@@ -0,0 +1,53 @@
+"""
+Tests of the compiled validation model against the schema rules
+
+"""
+
+import random
+
+from Tools.RegistrationSchema import validation_error
+from Tools.ValidationModel import CaseSpace, ValidationModel, boundary_payloads
+
+
+def test_strata_cover_the_space_and_match_the_schema():
+    model = ValidationModel(CaseSpace())
+    strata = model.strata()
+    assert sum(strata.values()) == model.space.size
+    assert strata["valid"] > 0
+
+    rng = random.Random(3)
+    for stratum in strata:
+        for _ in range(50):
+            digits = model.sample(stratum, rng)
+            assert (validation_error(model.space.payload(digits)) or "valid") == stratum
+
+
+def test_strata_counts_match_enumeration_of_a_small_space():
+    domains = {
+        "kurz": ("1", "0"),
+        "name": ("Jan", ""),
+        "surname": ("Novak",),
+        "email": ("a@b.cz",),
+        "phone": ("608123123", "abc"),
+        "person": ("fyz", "pra", "x"),
+        "address": ("Brno", ""),
+        "ico": ("12345678", "1"),
+        "count": ("1",),
+        "comment": (None, "<b>"),
+        "souhlas": (True,),
+    }
+    model = ValidationModel(CaseSpace(domains))
+    enumerated = {}
+    for index in range(model.space.size):
+        error = validation_error(model.space.payload(model.space.digits(index)))
+        assert model.predict(index)[1] == error
+        enumerated[error or "valid"] = enumerated.get(error or "valid", 0) + 1
+    assert model.strata() == enumerated
+
+
+def test_boundary_payloads_sit_on_both_sides_of_the_rules():
+    errors = {(payload.get("surname"), payload.get("ico")): validation_error(payload) for payload in boundary_payloads()}
+    assert errors[("N" * 255, None)] is None
+    assert errors[("N" * 256, None)] == "surname"
+    assert errors[("Novak", "12345678")] is None
+    assert errors[("Novak", "1234567")] == "ico"
@@ -0,0 +1,106 @@
+"""
+Tests of the adaptive wait scheduler used by the E2E helpers
+
+"""
+
+import asyncio
+import concurrent.futures
+
+import pytest
+
+from Data_and_Config.Configuration import *
+from Tools.WaitScheduler import WaitScheduler
+
+
+@pytest.fixture(scope="function")
+def scheduler(tmp_path):
+    return WaitScheduler(path=str(tmp_path / "wait_stats.json"), min_timeout=100, max_timeout=5000, margin=2.0)
+
+
+def test_default_timeout_without_history(scheduler):
+    scheduler.record("logged_in:/home", 50)
+    assert scheduler.timeout("logged_in:/home") == TIMEOUT_BROWSER
+
+
+def test_timeout_follows_observed_p99(scheduler):
+    for elapsed in [100, 120, 110, 130, 400]:
+        scheduler.record("logged_in:/home", elapsed)
+    assert scheduler.timeout("logged_in:/home") == 800
+
+
+def test_timeout_is_clamped(scheduler):
+    for _ in range(5):
+        scheduler.record("fast", 1)
+        scheduler.record("slow", 60000)
+    assert scheduler.timeout("fast") == 100
+    assert scheduler.timeout("slow") == 5000
+
+
+def test_failed_wait_records_full_timeout(scheduler):
+    def failing(timeout):
+        raise AssertionError("locator not found")
+
+    with pytest.raises(AssertionError):
+        scheduler.run("logout:/courses", failing)
+    assert scheduler.samples["logout:/courses"] == [TIMEOUT_BROWSER]
+
+
+# Own thread: the sync Playwright runtime of the session keeps an event loop running in the main one
+def _run(coroutine):
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def test_async_wait_gets_the_timeout_and_records_failures(scheduler):
+    async def waiting(timeout):
+        await asyncio.sleep(0)
+        return timeout
+
+    async def failing(timeout):
+        raise AssertionError("locator not found")
+
+    assert _run(scheduler.run_async("logged_in:/home", waiting)) == TIMEOUT_BROWSER
+    with pytest.raises(AssertionError):
+        _run(scheduler.run_async("logout:/courses", failing))
+    assert len(scheduler.samples["logged_in:/home"]) == 1
+    assert scheduler.samples["logout:/courses"] == [TIMEOUT_BROWSER]
+
+
+def test_timed_out_wait_backs_off_until_waits_succeed_again(scheduler):
+    for _ in range(199):
+        scheduler.record("logged_in:/home", 60)
+    assert scheduler.timeout("logged_in:/home") == 120
+
+    def timing_out(timeout):
+        raise AssertionError("locator not found")
+
+    for expected in [240, 480]:
+        with pytest.raises(AssertionError):
+            scheduler.run("logged_in:/home", timing_out)
+        assert scheduler.timeout("logged_in:/home") == expected
+    for _ in range(5):
+        scheduler.run("logged_in:/home", lambda timeout: None)
+    assert scheduler.timeout("logged_in:/home") == 120
+
+
+def test_samples_are_persisted(scheduler):
+    scheduler.record("logged_in:/home", 42)
+    scheduler.record_timeout("logout:/courses", 3000)
+    scheduler.save()
+    saved = WaitScheduler(path=scheduler.path)
+    assert saved.samples == {"logged_in:/home": [42], "logout:/courses": [3000]}
+    assert saved.timeout("logout:/courses") == 5000
+
+
+# Parallel workers save at the end of their runs, none of them may drop the samples of the others
+def test_parallel_workers_merge_their_samples(tmp_path):
+    path = str(tmp_path / "wait_stats.json")
+    first, second = WaitScheduler(path=path), WaitScheduler(path=path)
+    first.record("logged_in:/home", 40)
+    second.record("logged_in:/home", 60)
+    second.record_timeout("logout:/courses", 3000)
+    first.save()
+    second.save()
+    saved = WaitScheduler(path=path)
+    assert saved.samples == {"logged_in:/home": [40, 60], "logout:/courses": [3000]}
+    assert list(saved.backoff) == ["logout:/courses"]